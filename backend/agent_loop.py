@@ -0,0 +1,146 @@
+"""
+Bounded tool-calling loop shared by the chat endpoints.
+
+The model is asked for an answer with the tools advertised; when it requests tools, every
+call of that turn runs concurrently (each under its own timeout), the results are appended
+to the conversation and the model is asked again. Rounds stop after max_iterations or once
+the wall-clock budget is spent, at which point the model is asked to answer without tools,
+so a turn always ends with text.
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from metrics import timed
+
+# (stage, messages, tools or None) -> (text, tool calls in the OpenAI message format)
+Completion = Callable[[str, List[Dict[str, Any]], Optional[List[Dict[str, Any]]]],
+                      Awaitable[Tuple[str, List[Dict[str, Any]]]]]
+# (tool name, parsed arguments) -> tool result
+ToolRunner = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class AgentLimits:
+    """
+    Bounds on one chat turn.
+
+    Args:
+        max_iterations: Model calls allowed to request tools; the next call must answer
+        budget_seconds: Wall-clock budget for tool rounds; once spent, the model answers
+        tool_timeout_seconds: Default limit for a single tool call
+        tool_timeouts: Per-tool overrides of tool_timeout_seconds, by tool name
+    """
+
+    max_iterations: int = 3
+    budget_seconds: float = 120
+    tool_timeout_seconds: float = 60
+    tool_timeouts: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_env(cls, tool_timeouts: Optional[Dict[str, float]] = None) -> "AgentLimits":
+        """
+        Builds the limits from environment variables.
+
+        AGENT_MAX_ITERATIONS: tool rounds per turn (default: 3)
+        AGENT_BUDGET_SECONDS: wall-clock budget for tool rounds (default: 120)
+        AGENT_TOOL_TIMEOUT_SECONDS: default per-call tool timeout (default: 60)
+        """
+        return cls(
+            max_iterations=int(os.getenv("AGENT_MAX_ITERATIONS", "3")),
+            budget_seconds=float(os.getenv("AGENT_BUDGET_SECONDS", "120")),
+            tool_timeout_seconds=float(os.getenv("AGENT_TOOL_TIMEOUT_SECONDS", "60")),
+            tool_timeouts=dict(tool_timeouts or {}),
+        )
+
+    def timeout_for(self, name: str) -> float:
+        return self.tool_timeouts.get(name, self.tool_timeout_seconds)
+
+
+@dataclass
+class AgentResult:
+    text: str
+    # Results of every tool call in the turn, in call order
+    tool_results: List[Any] = field(default_factory=list)
+    iterations: int = 0
+
+
+async def _call_tool(tool_call: Dict[str, Any], execute: ToolRunner, timeout: float) -> Any:
+    """Runs one tool call; failures and timeouts become an error result the model can read."""
+    name = tool_call["function"]["name"]
+    args = tool_call["function"]["arguments"]
+    try:
+        parsed = json.loads(args) if (args and args.strip()) else {}
+    except json.JSONDecodeError:
+        return {"error": f"Invalid JSON arguments for {name}"}
+    try:
+        return await asyncio.wait_for(execute(name, parsed), timeout)
+    except asyncio.TimeoutError:
+        return {"error": f"{name} did not finish within {timeout:g}s"}
+    except Exception as e:
+        return {"error": f"{name} failed: {str(e)}"}
+
+
+async def execute_tool_calls(tool_calls: List[Dict[str, Any]], messages: List[Dict[str, Any]],
+                             execute: ToolRunner, limits: AgentLimits, content: str = "",
+                             deadline: Optional[float] = None) -> List[Any]:
+    """
+    Runs a turn's tool calls concurrently and appends them and their results to messages.
+
+    Each call is limited to its tool's timeout, and to the time left before deadline
+    (a time.monotonic() value) if one is given.
+
+    Returns:
+        The results in call order
+    """
+    messages.append({"role": "assistant", "content": content, "tool_calls": tool_calls})
+
+    def timeout(name: str) -> float:
+        limit = limits.timeout_for(name)
+        return limit if deadline is None else max(0.0, min(limit, deadline - time.monotonic()))
+
+    with timed("tool_dispatch"):
+        results = await asyncio.gather(*(
+            _call_tool(tc, execute, timeout(tc["function"]["name"])) for tc in tool_calls
+        ))
+    for tc, result in zip(tool_calls, results):
+        messages.append({
+            "role": "tool",
+            "tool_call_id": tc["id"],
+            "name": tc["function"]["name"],
+            "content": json.dumps(result, separators=(",", ":"), ensure_ascii=False),
+        })
+    return list(results)
+
+
+async def run_agent(complete: Completion, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]],
+                    execute: ToolRunner, limits: AgentLimits) -> AgentResult:
+    """
+    Runs the tool-calling loop until the model answers with text.
+
+    Args:
+        complete: Makes one model call; it receives "llm_first" or "llm_final" as the stage
+            for metrics, and tools=None when the model must answer without tools
+        messages: Prompt so far; assistant tool calls and tool results are appended to it
+        tools: Tool schemas advertised to the model
+        execute: Runs a tool by name with its parsed arguments
+        limits: Iteration, wall-clock and per-tool bounds
+
+    Returns:
+        AgentResult with the final text and every tool result
+    """
+    deadline = time.monotonic() + limits.budget_seconds
+    result = AgentResult(text="")
+    while True:
+        can_use_tools = result.iterations < limits.max_iterations and time.monotonic() < deadline
+        stage = "llm_first" if result.iterations == 0 else "llm_final"
+        text, tool_calls = await complete(stage, messages, tools if can_use_tools else None)
+        if not tool_calls or not can_use_tools:
+            result.text = text
+            return result
+        result.iterations += 1
+        result.tool_results += await execute_tool_calls(tool_calls, messages, execute, limits, text, deadline)
@@ -1,18 +1,21 @@
-import json
 import logging
 import os
+import sys
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from openai import OpenAI
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from agent_loop import AgentLimits, run_agent
 
 # Load environment variables from the .env file
 load_dotenv()
 
 # --- 1. Initialize FastAPI and OpenAI Client ---
 app = FastAPI()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # --- Configure logging ---
 log_level_name = os.getenv("LOG_LEVEL", "INFO").upper()
@@ -84,41 +87,32 @@ async def chat_with_ai(input_data: ChatInput):
             }
         ]
 
-        response = client.responses.create(
-            model="gpt-4o-mini",
-            input=[
+        async def complete(stage, messages, tools):
+            options = {"tools": tools} if tools else {}
+            response = await client.chat.completions.create(model="gpt-4o-mini", messages=messages, **options)
+            msg = response.choices[0].message
+            logger.debug("OpenAI response received for %s: %s", stage, msg)
+            return msg.content or "", [tc.model_dump() for tc in msg.tool_calls or []]
+
+        async def execute(tool_name, parsed):
+            if tool_name != "listall":
+                logger.error("Unsupported tool requested: %s", tool_name)
+                raise ValueError(f"Unsupported tool: {tool_name}")
+            logger.debug("Executing tool %s", tool_name)
+            return listall()
+
+        turn = await run_agent(
+            complete,
+            [
                 {"role": "system", "content": "You are a helpful assistant."},
                 {"role": "user", "content": input_data.user_message},
             ],
-            tools=tools,
+            tools,
+            execute,
+            AgentLimits.from_env(),
         )
 
-        logger.debug("Initial OpenAI response object received: %s", response)
-        while getattr(response, "required_action", None):
-            tool_calls = response.required_action.submit_tool_outputs.tool_calls
-            outputs = []
-
-            for call in tool_calls:
-                tool_name = getattr(getattr(call, "function", None), "name", None) or getattr(call, "name", None)
-                if tool_name != "listall":
-                    logger.error("Unsupported tool requested: %s", tool_name)
-                    raise ValueError(f"Unsupported tool: {tool_name}")
-
-                logger.debug("Executing tool %s with call id %s", tool_name, call.id)
-                outputs.append(
-                    {
-                        "tool_call_id": call.id,
-                        "output": json.dumps(listall()),
-                    }
-                )
-
-            logger.debug("Submitting tool outputs: %s", outputs)
-            response = client.responses.submit_tool_outputs(
-                response_id=response.id,
-                tool_outputs=outputs,
-            )
-
-        bot_response = response.output[0].content[0].text.value.strip()
+        bot_response = turn.text.strip()
         logger.debug("Final bot response: %s", bot_response)
         return {"bot_response": bot_response}
 
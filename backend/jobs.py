@@ -0,0 +1,348 @@
+"""
+Background research jobs for the chat backend.
+
+A job wraps one resource search. It is started right away and reports its progress as a
+list of stage events ("analyzing", "query", "waiting", "researching", "report", ...), which
+clients can poll through GET /jobs/{id} or follow live over server-sent events. A "result"
+event carries an interim result (e.g. quick research while a deeper run continues), which
+becomes the job's result until a better one arrives. Deep-research runs share a bounded
+number of slots, handed out by urgency (see research_scheduler.py), so the deep-research
+server is never overloaded and urgent searches go first.
+
+Jobs run in the process that started them. Their state is written to a JobStore so that,
+with the SQLite store, any worker process can answer GET /jobs/{id} and stream its events.
+"""
+
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from metrics import start_trace
+from research_scheduler import ResearchScheduler, create_research_scheduler
+
+logger = logging.getLogger(__name__)
+timing_logger = logging.getLogger("timing")
+
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+JobWork = Callable[[ProgressCallback, ResearchScheduler], Awaitable[Any]]
+
+TERMINAL_STATUSES = {"succeeded", "failed"}
+
+
+@dataclass
+class Job:
+    id: str
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    result: Any = None
+    error: Optional[str] = None
+    _changed: asyncio.Condition = field(default_factory=asyncio.Condition, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "stage": self.events[-1]["stage"] if self.events else None,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "events": self.events,
+            "result": self.result,
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Job":
+        return cls(
+            id=data["id"], status=data["status"], created_at=data["created_at"], updated_at=data["updated_at"],
+            events=data["events"], result=data["result"], error=data["error"],
+        )
+
+
+class JobStore:
+    """Interface shared by the job store backends: where job state is published for polling."""
+
+    def save(self, job: Job) -> None:
+        raise NotImplementedError
+
+    def load(self, job_id: str) -> Optional[Job]:
+        """Returns a snapshot of the job, or None if unknown."""
+        raise NotImplementedError
+
+    def prune(self, cutoff: float) -> int:
+        """Forgets finished jobs last updated before cutoff. Returns how many were removed."""
+        raise NotImplementedError
+
+
+class InMemoryJobStore(JobStore):
+    """Process-local store; only the worker that runs a job can report on it."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+
+    def save(self, job: Job) -> None:
+        self._jobs[job.id] = job
+
+    def load(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def prune(self, cutoff: float) -> int:
+        expired = [j.id for j in self._jobs.values() if j.done and j.updated_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """On-disk store shared by every worker process using the same file."""
+
+    def __init__(self, path: str = "jobs.sqlite3"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs (updated_at);
+            """
+        )
+
+    def save(self, job: Job) -> None:
+        data = json.dumps(job.to_dict(), separators=(",", ":"), ensure_ascii=False, default=str)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, status, updated_at, data) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(job_id) DO UPDATE SET status = excluded.status, "
+                "updated_at = excluded.updated_at, data = excluded.data",
+                (job.id, job.status, job.updated_at, data),
+            )
+
+    def load(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return Job.from_dict(json.loads(row[0])) if row else None
+
+    def prune(self, cutoff: float) -> int:
+        placeholders = ",".join("?" * len(TERMINAL_STATUSES))
+        with self._lock, self._conn:
+            return self._conn.execute(
+                f"DELETE FROM jobs WHERE updated_at < ? AND status IN ({placeholders})",
+                (cutoff, *sorted(TERMINAL_STATUSES)),
+            ).rowcount
+
+
+def create_job_store(backend: Optional[str] = None) -> JobStore:
+    """
+    Builds the job store configured through environment variables.
+
+    JOB_STORE: "memory" (default) or "sqlite"; use "sqlite" when running several workers
+    JOB_DB_PATH: SQLite file path (default: jobs.sqlite3)
+    """
+    backend = (backend or os.getenv("JOB_STORE", "memory")).lower()
+    if backend == "sqlite":
+        return SQLiteJobStore(os.getenv("JOB_DB_PATH", "jobs.sqlite3"))
+    if backend == "memory":
+        return InMemoryJobStore()
+    raise ValueError(f"Unknown JOB_STORE backend: {backend}")
+
+
+class JobManager:
+    """
+    Runs research jobs in the background and keeps their state for polling.
+
+    Args:
+        max_concurrent_research: Deep-research runs allowed at once across all jobs of this process,
+            or of every worker with RESEARCH_SLOTS=sqlite, scheduled by urgency (see
+            create_research_scheduler and ResearchScheduler.from_env for the settings)
+        ttl_seconds: How long finished jobs stay queryable
+        store: Where job state is published (default: in memory, visible to this process only)
+        poll_interval: Seconds between store reads when streaming a job another process runs
+    """
+
+    def __init__(self, max_concurrent_research: int = 2, ttl_seconds: float = 3600,
+                 store: Optional[JobStore] = None, poll_interval: float = 0.5):
+        self.research_slots = create_research_scheduler(capacity=max_concurrent_research)
+        self.ttl_seconds = ttl_seconds
+        self.store = store or InMemoryJobStore()
+        self.poll_interval = poll_interval
+        # Jobs running (or recently finished) in this process
+        self._jobs: Dict[str, Job] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Progress is saved from one writer thread, in order, so the event loop never waits on
+        # the store; a job's snapshot still waiting to be written is replaced by a newer one
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-store")
+        self._unsaved: Dict[str, Job] = {}
+        self._unsaved_lock = threading.Lock()
+
+    def submit(self, work: JobWork) -> Job:
+        """
+        Starts a job and returns it immediately.
+
+        Args:
+            work: Coroutine function called with (on_progress, research_slots) that returns the result
+        """
+        self.prune()
+        job = Job(id=uuid.uuid4().hex)
+        self._jobs[job.id] = job
+        self.store.save(job)
+        self._tasks[job.id] = asyncio.create_task(self._run(job, work))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """The job if this process runs it, otherwise a snapshot from the store (None if unknown)."""
+        return self._jobs.get(job_id) or self.store.load(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Job:
+        """Waits up to timeout seconds for a job to finish and returns it either way."""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.wait({task}, timeout=timeout)
+        return self._jobs[job_id]
+
+    async def wait_for_result(self, job_id: str, timeout: float) -> Job:
+        """Waits up to timeout seconds for a job to have a result, interim or final, and returns it."""
+        job = self._jobs[job_id]
+        async with job._changed:
+            try:
+                await asyncio.wait_for(job._changed.wait_for(lambda: job.result is not None or job.done), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    async def stream(self, job_id: str, keepalive: float = 15) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yields a job's events from the beginning, then new ones as they happen, until it finishes.
+        Yields None when no event arrived within keepalive seconds.
+        """
+        if job_id not in self._jobs:
+            async for event in self._poll(job_id, keepalive):
+                yield event
+            return
+        job = self._jobs[job_id]
+        sent = 0
+        while True:
+            while sent < len(job.events):
+                yield job.events[sent]
+                sent += 1
+            if job.done:
+                return
+            async with job._changed:
+                try:
+                    await asyncio.wait_for(
+                        job._changed.wait_for(lambda: sent < len(job.events) or job.done), keepalive
+                    )
+                except asyncio.TimeoutError:
+                    yield None
+
+    async def _poll(self, job_id: str, keepalive: float) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """stream() for a job run by another process, following its state in the store."""
+        sent = 0
+        last_event = time.monotonic()
+        while True:
+            job = self.store.load(job_id)
+            if job is None:
+                return
+            if sent < len(job.events):
+                for event in job.events[sent:]:
+                    yield event
+                sent = len(job.events)
+                last_event = time.monotonic()
+            if job.done:
+                return
+            if time.monotonic() - last_event >= keepalive:
+                last_event = time.monotonic()
+                yield None
+            await asyncio.sleep(self.poll_interval)
+
+    def running(self) -> int:
+        return sum(1 for job in self._jobs.values() if not job.done)
+
+    def prune(self) -> None:
+        """Forgets finished jobs older than the TTL."""
+        cutoff = time.time() - self.ttl_seconds
+        for job_id in [j.id for j in self._jobs.values() if j.done and j.updated_at < cutoff]:
+            del self._jobs[job_id]
+            self._tasks.pop(job_id, None)
+        self.store.prune(cutoff)
+
+    async def _run(self, job: Job, work: JobWork) -> None:
+        def on_progress(stage: str, details: Dict[str, Any]) -> None:
+            if job.status == "queued":
+                job.status = "running"
+            if stage == "result":
+                # Interim results replace the job's result but stay out of the event log
+                details = dict(details)
+                job.result = details.pop("result")
+            self._record(job, stage, details)
+
+        # Each job gets its own trace, separate from the request that started it
+        trace = start_trace()
+        try:
+            result = await work(on_progress, self.research_slots)
+            job.result = result
+            job.status = "succeeded"
+            self._record(job, "done", {"status": job.status})
+        except Exception as e:
+            logger.error(f"Research job {job.id} failed: {str(e)}")
+            job.error = str(e)
+            job.status = "failed"
+            self._record(job, "done", {"status": job.status, "error": job.error})
+        timing_logger.info(json.dumps({
+            "event": "job_timing",
+            "job_id": job.id,
+            "status": job.status,
+            "total_ms": round((job.updated_at - job.created_at) * 1000, 1),
+            "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in trace.items()},
+        }))
+
+    def _record(self, job: Job, stage: str, details: Dict[str, Any]) -> None:
+        job.updated_at = time.time()
+        job.events.append({"stage": stage, "at": job.updated_at, **details})
+        snapshot = dataclasses.replace(job, events=list(job.events))
+        with self._unsaved_lock:
+            pending = job.id in self._unsaved
+            self._unsaved[job.id] = snapshot
+        if not pending:
+            self._writer.submit(self._save_unsaved, job.id)
+        asyncio.create_task(self._wake(job))
+
+    def _save_unsaved(self, job_id: str) -> None:
+        with self._unsaved_lock:
+            job = self._unsaved.pop(job_id)
+        try:
+            self.store.save(job)
+        except Exception as e:
+            logger.error(f"Could not save research job {job_id}: {str(e)}")
+
+    @staticmethod
+    async def _wake(job: Job) -> None:
+        async with job._changed:
+            job._changed.notify_all()
+
+
+def format_sse(event: Optional[Dict[str, Any]]) -> str:
+    """Encodes a job event as a server-sent event; None becomes a keep-alive comment."""
+    if event is None:
+        return ": keep-alive\n\n"
+    return f"event: {event['stage']}\ndata: {json.dumps(event)}\n\n"
@@ -1,22 +1,82 @@
+import asyncio
+import inspect
 import json
 import logging
 import os
 import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from openai import OpenAI
 from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from resource_finder import list_eligible_resources
-from typing import Dict, Any, List
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from resource_finder import (
+    find_eligible_resources_async, find_eligible_resources_batch, find_eligible_resources_progressive,
+    aclose_http_client, research_cache, research_controller, resource_index, warm_up,
+)
+from query_profile import NEED_CATEGORIES
+from session_store import create_session_store
+from jobs import JobManager, create_job_store, format_sse
+from agent_loop import AgentLimits, run_agent
+from conversation_context import ConversationContext, messages_tokens
+from cache_warmer import CacheWarmer
+import metrics
+from metrics import record_usage, start_trace, timed
+from outbound import OPENAI, CircuitOpenError, async_openai_client
+from research_scheduler import URGENCIES
+from typing import Dict, Any, List, Optional
 
 # Load environment variables from the .env file
 load_dotenv()
 
-# --- 1. Initialize FastAPI and OpenAI Client ---
-app = FastAPI()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+SESSION_EVICT_INTERVAL = 60  # seconds between sweeps for expired sessions
+# Keep reports for common searches fresh in the background (see cache_warmer.py)
+CACHE_WARMER = os.getenv("CACHE_WARMER", "false").lower() == "true"
+# Connect to OpenAI and the deep-research API in the background after startup; /ready waits for it
+STARTUP_WARM_UP = os.getenv("STARTUP_WARM_UP", "true").lower() == "true"
+WARM_UP_TIMEOUT_SECONDS = float(os.getenv("WARM_UP_TIMEOUT_SECONDS", "10"))
+# Background warm-up started by lifespan, and its outcome per check once finished
+warm_up_task: Optional[asyncio.Task] = None
+
+
+async def evict_expired_sessions():
+    while True:
+        await asyncio.sleep(SESSION_EVICT_INTERVAL)
+        removed = await asyncio.to_thread(session_store.evict_expired)
+        if removed:
+            logger.info("Evicted %d expired chat sessions", removed)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global warm_up_task
+    eviction_task = asyncio.create_task(evict_expired_sessions())
+    warmer_task = None
+    if CACHE_WARMER:
+        # Its runs queue for the research slots people's searches use, as planning work
+        warmer = CacheWarmer.from_env(research_cache, job_manager.research_slots.limiter("planning"))
+        warmer_task = asyncio.create_task(warmer.run_forever())
+    # Serving starts right away; the warm-up only holds back /ready
+    warm_up_task = asyncio.create_task(warm_up(WARM_UP_TIMEOUT_SECONDS)) if STARTUP_WARM_UP else None
+    yield
+    eviction_task.cancel()
+    if warmer_task:
+        warmer_task.cancel()
+    if warm_up_task:
+        warm_up_task.cancel()
+    # Release pooled keep-alive connections to the deep-research API
+    await aclose_http_client()
+
+
+# --- 1. Initialize FastAPI ---
+# The OpenAI client is outbound.async_openai_client(), shared with resource_finder and created
+# on first use; calls go through outbound.OPENAI (backoff, circuit breaker, metrics)
+app = FastAPI(lifespan=lifespan)
 
 # --- Configure logging ---
 log_level_name = os.getenv("LOG_LEVEL", "INFO").upper()
@@ -26,6 +86,48 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
 )
 logger = logging.getLogger(__name__)
+# One JSON line per request and per research job with the time spent in each stage
+timing_logger = logging.getLogger("timing")
+
+REQUEST_SECONDS = metrics.histogram("http_request_seconds", "Backend request latency", ["route", "status"])
+
+
+class TimingMiddleware:
+    """Traces each HTTP request's pipeline stages and logs them once the response is fully sent."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        trace = start_trace()
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            # Label by route template ("/jobs/{job_id}") so ids do not explode the series count
+            route = getattr(scope.get("route"), "path", scope["path"])
+            REQUEST_SECONDS.observe(elapsed, route=route, status=status)
+            timing_logger.info(json.dumps({
+                "event": "request_timing",
+                "method": scope["method"],
+                "route": route,
+                "status": status,
+                "total_ms": round(elapsed * 1000, 1),
+                "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in trace.items()},
+            }))
 
 # --- 2. Configure CORS ---
 # This is crucial for allowing your React frontend to communicate with this backend.
@@ -35,6 +137,7 @@ origins = [
     "http://localhost:3000",  # Common Create React App dev server
 ]
 
+app.add_middleware(TimingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -43,16 +146,108 @@ app.add_middleware(
     allow_headers=["*"], # Allow all headers
 )
 
-chat_history: Dict[str, List[Dict[str, str]]] = {"messages": []}
+# Conversation history per session, bounded by TTL and a max-message window
+session_store = create_session_store()
+# Prompts carry the session history, compacted to CHAT_HISTORY_TOKENS
+chat_context = ConversationContext.from_env("CHAT_HISTORY", budget_tokens=2000)
+
+# Resource searches run as background jobs sharing a bounded number of deep-research slots,
+# handed out by urgency (RESEARCH_LIMIT_*, RESEARCH_URGENT_RESERVED, RESEARCH_AGING_SECONDS).
+# With several workers, SESSION_STORE=sqlite and JOB_STORE=sqlite let any worker serve any
+# session or job, and RESEARCH_SLOTS=sqlite shares the slots and queue between them
+# (start_api.py --workers sets all three).
+job_manager = JobManager(
+    max_concurrent_research=int(os.getenv("RESEARCH_MAX_CONCURRENCY", "2")),
+    ttl_seconds=float(os.getenv("JOB_TTL_SECONDS", "3600")),
+    store=create_job_store(),
+)
+metrics.gauge("chat_sessions", "Chat sessions currently stored", lambda: len(session_store))
+metrics.gauge("research_jobs_running", "Research jobs not yet finished", lambda: job_manager.running())
+metrics.gauge("research_cache_entries", "Reports in the research cache", lambda: len(research_cache))
+metrics.gauge("research_queued", "Deep-research runs waiting for a slot, by urgency",
+              lambda: {(u,): job_manager.research_slots.queued(u) for u in URGENCIES}, ["urgency"])
+metrics.gauge("research_running", "Deep-research runs in progress, by urgency",
+              lambda: {(u,): job_manager.research_slots.running(u) for u in URGENCIES}, ["urgency"])
+
+# How long the tool waits for a job (e.g. a cache hit) before answering with its id instead
+RESEARCH_INLINE_WAIT_SECONDS = float(os.getenv("RESEARCH_INLINE_WAIT_SECONDS", "10"))
+# Tool rounds per turn, the turn's wall-clock budget and per-tool timeouts (see agent_loop.py)
+AGENT_LIMITS = AgentLimits.from_env()
+# Answer with quick research first and upgrade to a deeper run in the background (see RESEARCH_QUICK_*/DEEP_*)
+RESEARCH_PROGRESSIVE = os.getenv("RESEARCH_PROGRESSIVE", "true").lower() == "true"
+
+
+def tool_payload(result: Dict[str, Any]) -> Dict[str, Any]:
+    # The model only needs the matching records; fall back to the report if none were parsed
+    if result["resources"]:
+        return {"query": result["query"], "resources": result["resources"]}
+    return {"query": result["query"], "report": result["report"]}
+
 
-def search_eligible_resources(conversation_history: List[Dict[str, str]] = None,
-                           breadth: int = 1,
-                           depth: int = 2) -> str:
-    history = conversation_history or chat_history["messages"]
-    return list_eligible_resources(history, breadth=breadth, depth=depth)
+async def search_eligible_resources(conversation_history: List[Dict[str, str]],
+                                    session_id: str,
+                                    breadth: Optional[int] = None,
+                                    depth: Optional[int] = None) -> Any:
+    # Set once the tool has answered, so a later result is added to the session as an upgrade
+    answered = asyncio.Event()
+
+    async def work(on_progress, research_slots):
+        if RESEARCH_PROGRESSIVE:
+            result = await find_eligible_resources_progressive(
+                conversation_history, on_progress=on_progress, limiter=research_slots,
+            )
+        else:
+            result = await find_eligible_resources_async(
+                conversation_history, breadth=breadth, depth=depth,
+                on_progress=on_progress, limiter=research_slots,
+            )
+        if answered.is_set():
+            session_store.append(session_id, {
+                "role": "assistant",
+                "content": "Updated resource search results: "
+                           + json.dumps(tool_payload(result), separators=(",", ":"), ensure_ascii=False),
+            })
+        return result
+
+    job = job_manager.submit(work)
+    job = await job_manager.wait_for_result(job.id, RESEARCH_INLINE_WAIT_SECONDS)
+    if job.status == "failed":
+        raise Exception(job.error)
+    if job.status == "succeeded":
+        return tool_payload(job.result)
+
+    answered.set()
+    if job.result is not None:
+        return {
+            **tool_payload(job.result),
+            "job_id": job.id,
+            "status": job.status,
+            "message": "These are quick results. A deeper search is still running and updated results "
+                       "will appear in the chat when it finishes.",
+        }
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "message": "The resource search is still running and the results will appear in the chat "
+                   "when it finishes. Let the user know you are searching for them.",
+    }
 
 class ChatInput(BaseModel):
     user_message: str
+    session_id: Optional[str] = None  # a new session is started when omitted
+
+class BatchClient(BaseModel):
+    conversation_history: List[Dict[str, str]]
+    client_id: Optional[str] = None  # defaults to the client's position in the batch
+
+class BatchInput(BaseModel):
+    clients: List[BatchClient]
+    # Chosen per search by the research controller when omitted
+    breadth: Optional[int] = None
+    depth: Optional[int] = None
+
+# Largest batch POST /batch accepts
+BATCH_MAX_CLIENTS = int(os.getenv("BATCH_MAX_CLIENTS", "100"))
 
 # Tool schema for OpenAI
 TOOLS = [
@@ -76,69 +271,307 @@ TOOL_IMPLS: Dict[str, Any] = {
     "search_eligible_resources": search_eligible_resources,
 }
 
-@app.post("/chat")
-async def chat_with_ai(input_data: ChatInput):
-    try:
-        messages = [
-            {"role": "system", "content": "You are a helpful assistant."},
-            {
-                "role": "user",
-                "content": input_data.user_message
-            },
-        ]
-        chat_history["messages"].append({"role": "user", "content": input_data.user_message})
-
-        # 1) Ask the model, advertising the tool
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",  # supports tool calling; use your preferred model
-            messages=messages,
-            tools=TOOLS,
-            tool_choice="auto",   # let the model decide
-            temperature=0.2,
-        )
 
-        msg = resp.choices[0].message
+async def run_tool(name: str, parsed: Dict[str, Any], conversation_history: List[Dict[str, str]],
+                   session_id: str) -> Any:
+    """Runs a tool without blocking the event loop: coroutines are awaited, sync tools go to a thread."""
+    impl = TOOL_IMPLS[name]
+    # Tools that need the conversation get the session history and id, not model-supplied args
+    params = inspect.signature(impl).parameters
+    if "conversation_history" in params:
+        parsed = {**parsed, "conversation_history": conversation_history}
+    if "session_id" in params:
+        parsed = {**parsed, "session_id": session_id}
+    if inspect.iscoroutinefunction(impl):
+        return await impl(**parsed)
+    return await asyncio.to_thread(impl, **parsed)
 
-        # 2) If the model wants to call tools, execute them and continue the loop once
-        if getattr(msg, "tool_calls", None):
-            messages.append({"role": "assistant", "content": msg.content or "", "tool_calls": [tc.model_dump() for tc in msg.tool_calls]})
+def start_turn(input_data: "ChatInput") -> tuple:
+    """Resolves the session, records the user message and builds the first prompt from the history."""
+    session_id = input_data.session_id or uuid.uuid4().hex
+    session_store.append(session_id, {"role": "user", "content": input_data.user_message})
+    history = chat_context.compact(session_store.get_messages(session_id))
+    messages = [{"role": "system", "content": "You are a helpful assistant."}] + history
+    return session_id, messages
 
-            for tc in msg.tool_calls:
-                name = tc.function.name
-                args = tc.function.arguments
-                # Parse args if any (ours has none)
-                parsed = json.loads(args) if (args and args.strip()) else {}
 
-                if name not in TOOL_IMPLS:
-                    raise HTTPException(status_code=500, detail=f"Unknown tool requested: {name}")
+def finish_turn(session_id: str, text: str) -> None:
+    """
+    Records the answer and compacts the stored history once it outgrows the chat budget.
 
-                result = TOOL_IMPLS[name](**parsed) if parsed else TOOL_IMPLS[name]()
+    Compacting to half the budget (and half the message cap) leaves room for a few turns
+    before the next summary, and keeps the summary from being trimmed off by the store.
+    """
+    session_store.append(session_id, {"role": "assistant", "content": text})
+    history = session_store.get_messages(session_id)
+    if messages_tokens(history) > chat_context.budget_tokens or len(history) + 2 > session_store.max_messages:
+        session_store.replace(session_id, chat_context.compact(
+            history, chat_context.budget_tokens // 2, max_messages=session_store.max_messages // 2,
+        ))
 
-                # 3) Return the tool result back to the model
-                messages.append({
-                    "role": "tool",
-                    "tool_call_id": tc.id,
-                    "name": name,
-                    "content": json.dumps(result),
-                })
 
-            # 4) Ask the model again for the final user-facing answer
-            resp2 = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=messages,
-            )
-            final_text = resp2.choices[0].message.content
-            chat_history["messages"].append(
-                {"role": "assistant", "content": final_text or ""}
-            )
-            return {"bot_response": final_text}
+async def execute_tool(name: str, parsed: Dict[str, Any], session_id: str) -> Any:
+    if name not in TOOL_IMPLS:
+        raise Exception(f"Unknown tool requested: {name}")
+    return await run_tool(name, parsed, session_store.get_messages(session_id), session_id)
+
+
+def background_job_id(tool_results: List[Any]) -> Optional[str]:
+    """The id of the last research job a tool left running in the background, if any."""
+    job_ids = [r["job_id"] for r in tool_results if isinstance(r, dict) and "job_id" in r]
+    return job_ids[-1] if job_ids else None
+
+
+def completion_options(tools: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    # Advertise the tools while the model may still use them; otherwise it has to answer
+    if tools:
+        return {"tools": tools, "tool_choice": "auto", "temperature": 0.2}
+    return {}
+
 
-        # No tool call: just return the model’s text
-        chat_history["messages"].append(
-            {"role": "assistant", "content": msg.content or ""}
+@app.post("/chat")
+async def chat_with_ai(input_data: ChatInput):
+    try:
+        session_id, messages = start_turn(input_data)
+
+        async def complete(stage, messages, tools):
+            with timed(stage):
+                resp = await OPENAI.acall(
+                    async_openai_client().chat.completions.create,
+                    model="gpt-4o-mini",  # supports tool calling; use your preferred model
+                    messages=messages,
+                    **completion_options(tools),
+                )
+            record_usage(stage, resp.usage)
+            msg = resp.choices[0].message
+            return msg.content or "", [tc.model_dump() for tc in msg.tool_calls or []]
+
+        # Ask the model, running any tools it requests (concurrently, for a bounded number
+        # of rounds) until it answers
+        turn = await run_agent(
+            complete, messages, TOOLS, lambda name, parsed: execute_tool(name, parsed, session_id), AGENT_LIMITS
         )
-        return {"bot_response": msg.content}
+        finish_turn(session_id, turn.text)
+        return {"bot_response": turn.text, "session_id": session_id, "job_id": background_job_id(turn.tool_results)}
 
+    except CircuitOpenError as e:
+        logger.warning(f"/chat rejected: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Error in /chat endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_completion(stage: str, parts: List[str], tool_calls: Dict[int, Dict[str, Any]], **kwargs):
+    """
+    Streams a chat completion, yielding text deltas as they arrive.
+
+    The full text is collected in parts and streamed tool calls are assembled into tool_calls
+    (keyed by their index) so the caller can act on them once the stream ends. Token usage,
+    sent in the final chunk, is recorded under stage.
+    """
+    # Only opening the stream is retried; once deltas have been sent a retry would repeat them
+    stream = await OPENAI.acall(
+        async_openai_client().chat.completions.create, stream=True, stream_options={"include_usage": True}, **kwargs
+    )
+    async for chunk in stream:
+        record_usage(stage, getattr(chunk, "usage", None))
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            parts.append(delta.content)
+            yield delta.content
+        for tc in delta.tool_calls or []:
+            call = tool_calls.setdefault(
+                tc.index, {"id": "", "type": "function", "function": {"name": "", "arguments": ""}}
+            )
+            if tc.id:
+                call["id"] = tc.id
+            if tc.function and tc.function.name:
+                call["function"]["name"] += tc.function.name
+            if tc.function and tc.function.arguments:
+                call["function"]["arguments"] += tc.function.arguments
+
+
+@app.post("/chat/stream")
+async def chat_stream(input_data: ChatInput):
+    """
+    Same conversation flow as /chat, but relays the answer as server-sent events while it is generated.
+
+    Emits "delta" events ({"content": ...}) followed by a "done" event carrying the session id
+    and any background research job id, or an "error" event. The session history is updated
+    once the answer is complete.
+    """
+    session_id, messages = start_turn(input_data)
+
+    async def event_stream():
+        # Text from every model call is relayed as it arrives; None marks the end of the turn
+        deltas: asyncio.Queue = asyncio.Queue()
+
+        async def complete(stage, messages, tools):
+            parts: List[str] = []
+            tool_calls: Dict[int, Dict[str, Any]] = {}
+            with timed(stage):
+                async for text in stream_completion(
+                    stage, parts, tool_calls, model="gpt-4o-mini", messages=messages, **completion_options(tools)
+                ):
+                    deltas.put_nowait(text)
+            return "".join(parts), [tool_calls[i] for i in sorted(tool_calls)]
+
+        async def run_turn():
+            try:
+                return await run_agent(
+                    complete, messages, TOOLS, lambda name, parsed: execute_tool(name, parsed, session_id),
+                    AGENT_LIMITS,
+                )
+            finally:
+                deltas.put_nowait(None)
+
+        task = asyncio.create_task(run_turn())
+        try:
+            while (text := await deltas.get()) is not None:
+                yield sse("delta", {"content": text})
+            turn = await task
+            finish_turn(session_id, turn.text)
+            yield sse("done", {"session_id": session_id, "job_id": background_job_id(turn.tool_results)})
+
+        except Exception as e:
+            logger.error(f"Error in /chat/stream endpoint: {str(e)}")
+            yield sse("error", {"detail": str(e), "session_id": session_id})
+        finally:
+            task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/batch")
+async def batch_search(input_data: BatchInput):
+    """
+    Resource searches for a batch of client conversations, e.g. a caseworker's intake list.
+
+    Clients whose needs and location match share one search (see find_eligible_resources_batch).
+    Streams a "result" event per client as its search finishes ({"client_id", "query",
+    "resources" or "report", "source"}), an "error" event for a client whose search failed,
+    then a "done" event with the number of clients, searches run and clients per minute.
+    """
+    if not 0 < len(input_data.clients) <= BATCH_MAX_CLIENTS:
+        raise HTTPException(status_code=400, detail=f"A batch holds 1 to {BATCH_MAX_CLIENTS} clients")
+    client_ids = [c.client_id or str(i) for i, c in enumerate(input_data.clients)]
+
+    async def event_stream():
+        start = time.perf_counter()
+        queries, failed = set(), 0
+        with timed("batch"):
+            async for index, result in find_eligible_resources_batch(
+                [c.conversation_history for c in input_data.clients],
+                breadth=input_data.breadth, depth=input_data.depth, limiter=job_manager.research_slots,
+            ):
+                if isinstance(result, Exception):
+                    failed += 1
+                    yield sse("error", {"client_id": client_ids[index], "detail": str(result)})
+                    continue
+                queries.add(result["query"])
+                yield sse("result", {"client_id": client_ids[index], **tool_payload(result), "source": result["source"]})
+        minutes = (time.perf_counter() - start) / 60
+        yield sse("done", {
+            "clients": len(client_ids),
+            "failed": failed,
+            "searches": len(queries),
+            "clients_per_minute": round(len(client_ids) / minutes, 1) if minutes else None,
+        })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Returns the status, progress events and (once finished) result of a research job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Streams a research job's progress as server-sent events, ending with a "done" event.
+
+    "result" (interim results) and "done" events include the job's current result.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+
+    async def event_stream():
+        async for event in job_manager.stream(job_id):
+            if event is not None and event["stage"] in ("result", "done"):
+                # Re-read: a job run by another worker is a snapshot
+                event = {**event, "result": job_manager.get(job_id).result}
+            yield format_sse(event)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/resources/nearby")
+async def nearby_resources(latitude: float, longitude: float, need: Optional[str] = None,
+                           radius_km: float = 5, k: int = 8):
+    """
+    Returns indexed resources with known coordinates near a point, nearest first.
+
+    need optionally restricts the results to one need category (e.g. "shelter", "food").
+    """
+    if need is not None and need not in NEED_CATEGORIES:
+        raise HTTPException(status_code=400, detail=f"Unknown need: {need}. Use one of: {', '.join(NEED_CATEGORIES)}")
+    with timed("resource_db"):
+        found = resource_index.nearest(latitude, longitude, k=min(k, 50), radius_km=min(radius_km, 50), need=need)
+    return {"resources": [{**record.to_compact(), "distance_km": round(distance, 2)} for record, distance in found]}
+
+
+@app.get("/ready")
+async def ready():
+    """
+    Readiness probe: 503 while the startup warm-up runs, then 200 with each check's outcome.
+
+    A failed check (e.g. OpenAI unreachable) is reported without holding readiness back, so an
+    outage upstream does not take every worker out of rotation at once.
+    """
+    if warm_up_task is None:
+        return {"ready": True, "checks": {}}
+    if not warm_up_task.done() or warm_up_task.cancelled():
+        return JSONResponse({"ready": False, "checks": {}}, status_code=503)
+    return {"ready": True, "checks": warm_up_task.result()}
+
+
+@app.get("/research/settings")
+async def research_settings():
+    """
+    The research controller's view of the latency/quality tradeoff, for review.
+
+    Per query class and breadth/depth setting: run seconds, distinct resources found and
+    resources per minute (samples 0 means extrapolated), plus the most recent decisions and why.
+    """
+    return research_controller.report()
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Stage latencies, token counts, cache lookups and errors in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,17 +1,40 @@
-from fastmcp import MCPServer
-from pydantic import BaseModel
+import os
+import sys
+from typing import Any, Dict, List
 
-mcp = MCPServer(
+from fastmcp import FastMCP
+from pydantic import BaseModel, Field
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from page_fetcher import PageCache, PageFetcher
+
+SCRAPE_MAX_BATCH = int(os.getenv("SCRAPE_MAX_BATCH", "25"))
+
+mcp = FastMCP(
     "FireCrawler",
-    instructions = "A mcp server that exposes the firecrawler web scraping capabilities",
+    instructions = "A mcp server that scrapes web pages (e.g. the websites of shelters, food banks and "
+                   "clinics) and returns their readable text. Pages are cached and shared between clients.",
 )
+fetcher = PageFetcher.from_env(PageCache.from_env())
 
 class ScrapeInput(BaseModel):
-    query: str
+    url: str
+    max_chars: int = 20000
+
+class BatchScrapeInput(BaseModel):
+    urls: List[str] = Field(min_length=1, max_length=SCRAPE_MAX_BATCH)
+    max_chars: int = 5000
 
 @mcp.tool()
-def scrape_the_internet(input: ScrapeInput) -> str:
-    """Scrape the internet for relevant information based on the query."""
-    # Here you would implement the actual web scraping logic.
-    # For demonstration purposes, we'll return a placeholder string.
-    return f"Scraped data for query: {input.query}"
\ No newline at end of file
+async def scrape_the_internet(input: ScrapeInput) -> Dict[str, Any]:
+    """Fetch a web page and return its title and readable text."""
+    return await fetcher.fetch(input.url, input.max_chars)
+
+@mcp.tool()
+async def scrape_pages(input: BatchScrapeInput) -> List[Dict[str, Any]]:
+    """Fetch several web pages concurrently and return the title and readable text of each."""
+    return await fetcher.fetch_many(input.urls, input.max_chars)
+
+if __name__ == "__main__":
+    mcp.run()
@@ -0,0 +1,449 @@
+"""
+Concurrent web page fetching with a shared on-disk page cache, for the MCP scraping tools.
+
+Pages are fetched through one pooled async HTTP client, at most SCRAPE_MAX_CONCURRENCY at a
+time and with a minimum interval between requests to the same host (or its robots.txt
+Crawl-delay, if longer). Disallowed paths in robots.txt are not fetched, nor are hosts that
+resolve to loopback, private, link-local or other internal addresses (checked again on every
+redirect), since the URLs come from a model. Page bodies are
+stored content-addressed on disk, so identical pages share one file, and a SQLite table
+maps each URL to its body and validators: a page fetched within the TTL is served from disk,
+and an older one is revalidated with If-None-Match / If-Modified-Since before re-downloading.
+"""
+
+import asyncio
+import hashlib
+import ipaddress
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+from metrics import record_cache, timed
+
+DEFAULT_USER_AGENT = "HackForSocialImpactBot/0.1 (+https://github.com/MaximeSwagel/Hack-for-social-impact)"
+
+
+class BlockedAddressError(httpx.RequestError):
+    """A request, or a redirect, to a host that resolves to an internal address."""
+
+
+def _is_internal(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    # Link-local covers the 169.254.169.254 cloud metadata endpoint
+    return (ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_multicast
+            or ip.is_reserved or ip.is_unspecified)
+
+
+async def check_public_host(host: str, port: Optional[int] = None) -> Optional[str]:
+    """Resolves host; returns why it may not be fetched, or None if every address it has is public."""
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port or 443)
+    except OSError:
+        return f"Could not resolve {host}"
+    if any(_is_internal(info[4][0]) for info in infos):
+        return f"Refusing to fetch {host}: it resolves to an internal address"
+    return None
+
+
+@dataclass
+class CachedPage:
+    url: str
+    content_hash: str
+    content_type: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+class PageCache:
+    """
+    Content-addressed page store shared by every scrape.
+
+    Bodies live in <directory>/objects/<first 2 hex chars>/<sha256>; <directory>/pages.sqlite3
+    maps URLs to a body and the validators needed for conditional requests.
+
+    Args:
+        directory: Folder for the page bodies and index
+        ttl_seconds: How long a fetched page is served without asking the server again
+    """
+
+    def __init__(self, directory: str = "page_cache", ttl_seconds: float = 3600):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, "pages.sqlite3"), check_same_thread=False)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                content_type TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL
+            );
+            """
+        )
+
+    @classmethod
+    def from_env(cls) -> "PageCache":
+        """
+        Builds the cache from environment variables.
+
+        PAGE_CACHE_DIR: folder for cached pages (default: page_cache)
+        PAGE_CACHE_TTL_SECONDS: time before a page is revalidated (default: 3600)
+        """
+        return cls(
+            directory=os.getenv("PAGE_CACHE_DIR", "page_cache"),
+            ttl_seconds=float(os.getenv("PAGE_CACHE_TTL_SECONDS", "3600")),
+        )
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.directory, "objects", content_hash[:2], content_hash)
+
+    def lookup(self, url: str) -> Optional[CachedPage]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, content_hash, content_type, etag, last_modified, fetched_at FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+        return CachedPage(*row) if row else None
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return time.time() - page.fetched_at < self.ttl_seconds
+
+    def read(self, content_hash: str) -> Optional[bytes]:
+        try:
+            with open(self._path(content_hash), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def store(self, url: str, body: bytes, content_type: str,
+              etag: Optional[str], last_modified: Optional[str]) -> str:
+        """Saves a page body (once per distinct content) and points url at it. Returns the hash."""
+        content_hash = hashlib.sha256(body).hexdigest()
+        path = self._path(content_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO pages (url, content_hash, content_type, etag, last_modified, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET content_hash = excluded.content_hash, "
+                "content_type = excluded.content_type, etag = excluded.etag, "
+                "last_modified = excluded.last_modified, fetched_at = excluded.fetched_at",
+                (url, content_hash, content_type, etag, last_modified, time.time()),
+            )
+        return content_hash
+
+    def touch(self, url: str) -> None:
+        """Marks a page as fresh again after the server confirmed it did not change."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    def delete(self, url: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+
+class _TextExtractor(HTMLParser):
+    """Collects the visible text and title of an HTML page."""
+
+    _SKIPPED = {"script", "style", "noscript", "template", "svg"}
+    _BLOCKS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "header", "footer"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts: List[str] = []
+        self.title = ""
+        self._skipping = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIPPED:
+            self._skipping += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in self._BLOCKS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIPPED and self._skipping:
+            self._skipping -= 1
+        elif tag == "title":
+            self._in_title = False
+        elif tag in self._BLOCKS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skipping:
+            self.parts.append(data)
+
+
+def extract_text(body: bytes, content_type: str) -> Tuple[str, str]:
+    """Returns (title, readable text) for an HTML or plain-text page; other types have no text."""
+    charset = re.search(r"charset=([\w-]+)", content_type)
+    try:
+        text = body.decode(charset.group(1) if charset else "utf-8", errors="replace")
+    except LookupError:
+        text = body.decode("utf-8", errors="replace")
+    if "html" in content_type:
+        parser = _TextExtractor()
+        parser.feed(text)
+        title, text = parser.title, "".join(parser.parts)
+    elif content_type.startswith("text/") or "json" in content_type or "xml" in content_type:
+        title = ""
+    else:
+        return "", ""
+    lines = (re.sub(r"[ \t\r\f\v]+", " ", line).strip() for line in text.split("\n"))
+    return title.strip(), "\n".join(line for line in lines if line)
+
+
+class PageFetcher:
+    """
+    Polite, cached, concurrent page fetcher.
+
+    Args:
+        cache: Page cache shared by every fetch
+        max_concurrency: Requests in flight at once across all hosts
+        domain_interval: Minimum seconds between requests to the same host
+        timeout: Seconds per request
+        max_bytes: Largest body kept; longer pages are truncated
+        user_agent: User-Agent sent with requests and matched against robots.txt
+        respect_robots: Skip URLs robots.txt disallows for user_agent
+        allow_internal: Also fetch hosts with loopback, private or link-local addresses
+    """
+
+    def __init__(self, cache: PageCache, max_concurrency: int = 8, domain_interval: float = 1.0,
+                 timeout: float = 20, max_bytes: int = 2_000_000,
+                 user_agent: str = DEFAULT_USER_AGENT, respect_robots: bool = True,
+                 allow_internal: bool = False):
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.domain_interval = domain_interval
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.user_agent = user_agent
+        self.respect_robots = respect_robots
+        self.allow_internal = allow_internal
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        # host -> (lock serializing request starts, time of the last request)
+        self._hosts: Dict[str, Tuple[asyncio.Lock, List[float]]] = {}
+        # host -> (parsed robots.txt or None if unavailable, time it was fetched)
+        self._robots: Dict[str, Tuple[Optional[RobotFileParser], float]] = {}
+
+    @classmethod
+    def from_env(cls, cache: PageCache) -> "PageFetcher":
+        """
+        Builds the fetcher from environment variables.
+
+        SCRAPE_MAX_CONCURRENCY: requests in flight at once (default: 8)
+        SCRAPE_DOMAIN_INTERVAL_SECONDS: minimum delay between requests to one host (default: 1)
+        SCRAPE_TIMEOUT_SECONDS: per-request timeout (default: 20)
+        SCRAPE_MAX_BYTES: largest page body kept (default: 2000000)
+        SCRAPE_USER_AGENT: User-Agent for requests and robots.txt rules
+        SCRAPE_RESPECT_ROBOTS: "false" to ignore robots.txt (default: true)
+        SCRAPE_ALLOW_INTERNAL: "true" to fetch internal addresses, e.g. a local test site (default: false)
+        """
+        return cls(
+            cache,
+            max_concurrency=int(os.getenv("SCRAPE_MAX_CONCURRENCY", "8")),
+            domain_interval=float(os.getenv("SCRAPE_DOMAIN_INTERVAL_SECONDS", "1")),
+            timeout=float(os.getenv("SCRAPE_TIMEOUT_SECONDS", "20")),
+            max_bytes=int(os.getenv("SCRAPE_MAX_BYTES", "2000000")),
+            user_agent=os.getenv("SCRAPE_USER_AGENT", DEFAULT_USER_AGENT),
+            respect_robots=os.getenv("SCRAPE_RESPECT_ROBOTS", "true").lower() == "true",
+            allow_internal=os.getenv("SCRAPE_ALLOW_INTERNAL", "false").lower() == "true",
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily so the client and semaphore bind to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers={"User-Agent": self.user_agent},
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+                # Runs for every request sent, redirects included
+                event_hooks={"request": [self._check_request]},
+            )
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _check_request(self, request: httpx.Request) -> None:
+        if not self.allow_internal:
+            reason = await check_public_host(request.url.host, request.url.port)
+            if reason is not None:
+                raise BlockedAddressError(reason, request=request)
+
+    async def _wait_turn(self, host: str, interval: float, claim: bool = True) -> None:
+        """
+        Waits until at least interval seconds have passed since the last request to host
+        and, with claim, records the caller's request as the last one.
+        """
+        lock, last = self._hosts.setdefault(host, (asyncio.Lock(), [0.0]))
+        async with lock:
+            while (delay := last[0] + interval - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+            if claim:
+                last[0] = time.monotonic()
+
+    async def _take_slot(self, host: str, interval: float) -> None:
+        """
+        Takes a fetch slot at host's turn, recording the request as sent. Host delays are
+        waited out without a slot, so a batch of pages on one host does not hold slots other
+        hosts could use; requests that queued for a slot meanwhile wait for their turn again.
+        """
+        _, last = self._hosts.setdefault(host, (asyncio.Lock(), [0.0]))
+        while True:
+            await self._wait_turn(host, interval, claim=False)
+            await self._slots.acquire()
+            # No await between the check and the claim, so no other request can slip in
+            if time.monotonic() >= last[0] + interval:
+                last[0] = time.monotonic()
+                return
+            self._slots.release()
+
+    async def _robots_for(self, scheme: str, host: str) -> Optional[RobotFileParser]:
+        entry = self._robots.get(host)
+        if entry is not None and time.time() - entry[1] < self.cache.ttl_seconds:
+            return entry[0]
+        parser: Optional[RobotFileParser] = None
+        try:
+            await self._wait_turn(host, self.domain_interval)
+            response = await self._get_client().get(f"{scheme}://{host}/robots.txt")
+            if response.status_code == 200:
+                parser = RobotFileParser()
+                parser.parse(response.text.splitlines())
+        except httpx.HTTPError:
+            pass  # No reachable robots.txt: nothing is disallowed
+        self._robots[host] = (parser, time.time())
+        return parser
+
+    def _page(self, url: str, body: bytes, content_type: str, content_hash: str,
+              cache: str, max_chars: int) -> Dict[str, Any]:
+        title, text = extract_text(body, content_type)
+        return {
+            "url": url,
+            "title": title,
+            "text": text[:max_chars],
+            "truncated": len(text) > max_chars,
+            "content_type": content_type,
+            "content_hash": content_hash,
+            "cache": cache,
+        }
+
+    async def fetch(self, url: str, max_chars: int = 20000) -> Dict[str, Any]:
+        """
+        Fetches one page, from the cache when possible.
+
+        Returns:
+            Dict with url, title, text (up to max_chars), truncated, content_type,
+            content_hash and cache ("hit", "revalidated" or "miss"); or url and error
+            if the page could not be fetched
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            return {"url": url, "error": "Only http(s) URLs can be scraped"}
+        if not self.allow_internal:
+            reason = await check_public_host(parts.hostname, parts.port)
+            if reason is not None:
+                return {"url": url, "error": reason}
+
+        cached = self.cache.lookup(url)
+        if cached is not None and self.cache.is_fresh(cached):
+            body = self.cache.read(cached.content_hash)
+            if body is not None:
+                record_cache("page", "hit")
+                return self._page(url, body, cached.content_type, cached.content_hash, "hit", max_chars)
+
+        interval = self.domain_interval
+        if self.respect_robots:
+            robots = await self._robots_for(parts.scheme, parts.netloc)
+            if robots is not None:
+                if not robots.can_fetch(self.user_agent, url):
+                    return {"url": url, "error": "Disallowed by robots.txt"}
+                interval = max(interval, float(robots.crawl_delay(self.user_agent) or 0))
+
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        client = self._get_client()
+        try:
+            with timed("page_fetch"):
+                await self._take_slot(parts.netloc, interval)
+                try:
+                    async with client.stream("GET", url, headers=headers) as response:
+                        buffer = bytearray()
+                        if response.status_code != 304:
+                            async for chunk in response.aiter_bytes():
+                                buffer += chunk
+                                if len(buffer) >= self.max_bytes:
+                                    break
+                        body = bytes(buffer[:self.max_bytes])
+                finally:
+                    self._slots.release()
+        except BlockedAddressError as e:
+            return {"url": url, "error": str(e)}
+        except httpx.HTTPError as e:
+            return {"url": url, "error": f"Request failed: {str(e) or type(e).__name__}"}
+
+        if response.status_code == 304 and cached is not None:
+            self.cache.touch(url)
+            body = self.cache.read(cached.content_hash)
+            if body is not None:
+                record_cache("page", "revalidated")
+                return self._page(url, body, cached.content_type, cached.content_hash, "revalidated", max_chars)
+            # The body file went missing: fetch it again without validators
+            self.cache.delete(url)
+            return await self.fetch(url, max_chars)
+        if response.status_code >= 400:
+            return {"url": url, "error": f"HTTP {response.status_code}"}
+
+        record_cache("page", "miss")
+        content_type = response.headers.get("content-type", "")
+        content_hash = self.cache.store(
+            url, body, content_type, response.headers.get("etag"), response.headers.get("last-modified")
+        )
+        return self._page(url, body, content_type, content_hash, "miss", max_chars)
+
+    async def fetch_many(self, urls: List[str], max_chars: int = 5000) -> List[Dict[str, Any]]:
+        """Fetches pages concurrently, one result per distinct URL in the order given."""
+        unique = list(dict.fromkeys(urls))
+        return await asyncio.gather(*(self.fetch(url, max_chars) for url in unique))
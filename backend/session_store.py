@@ -0,0 +1,228 @@
+"""
+Per-session conversation storage for the chat backend.
+
+Each client conversation is keyed by a session id. Sessions expire after a period of
+inactivity (TTL) and only the most recent messages are kept, so memory and the
+prompts built from the history stay bounded. The SQLite backend keeps conversations
+across server restarts.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+Message = Dict[str, str]
+
+
+class SessionStore:
+    """Interface shared by the session store backends."""
+
+    def __init__(self, ttl_seconds: float, max_messages: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+
+    def get_messages(self, session_id: str) -> List[Message]:
+        """Returns the message window for a session (empty if unknown or expired)."""
+        raise NotImplementedError
+
+    def append(self, session_id: str, message: Message) -> None:
+        """Adds a message to a session, trimming it to the last max_messages."""
+        raise NotImplementedError
+
+    def replace(self, session_id: str, messages: List[Message]) -> None:
+        """Swaps a session's messages, e.g. for a compacted history."""
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    def evict_expired(self) -> int:
+        """Drops sessions idle for longer than the TTL. Returns how many were removed."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Process-local store. Sessions are kept in LRU order so the least recently used
+    one is dropped once max_sessions is reached.
+    """
+
+    def __init__(self, ttl_seconds: float = 86400, max_messages: int = 20, max_sessions: int = 10000):
+        super().__init__(ttl_seconds, max_messages)
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, tuple[float, List[Message]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_messages(self, session_id: str) -> List[Message]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return []
+            updated_at, messages = entry
+            if time.time() - updated_at > self.ttl_seconds:
+                del self._sessions[session_id]
+                return []
+            return list(messages)
+
+    def append(self, session_id: str, message: Message) -> None:
+        with self._lock:
+            _, messages = self._sessions.pop(session_id, (0.0, []))
+            messages.append(message)
+            del messages[:-self.max_messages]
+            self._sessions[session_id] = (time.time(), messages)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def replace(self, session_id: str, messages: List[Message]) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._sessions[session_id] = (time.time(), list(messages[-self.max_messages:]))
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def evict_expired(self) -> int:
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        with self._lock:
+            # Entries are in last-used order, so stop at the first fresh one
+            while self._sessions:
+                session_id, (updated_at, _) = next(iter(self._sessions.items()))
+                if updated_at > cutoff:
+                    break
+                del self._sessions[session_id]
+                removed += 1
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """On-disk store so conversations survive a server restart."""
+
+    def __init__(self, path: str = "sessions.sqlite3", ttl_seconds: float = 86400,
+                 max_messages: int = 20, evict_interval: float = 60):
+        super().__init__(ttl_seconds, max_messages)
+        self.path = path
+        self.evict_interval = evict_interval
+        self._last_eviction = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id);
+            CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at);
+            """
+        )
+
+    def get_messages(self, session_id: str) -> List[Message]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None or time.time() - row[0] > self.ttl_seconds:
+                return []
+            rows = self._conn.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? ORDER BY id",
+                (session_id,),
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def append(self, session_id: str, message: Message) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, updated_at) VALUES (?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at",
+                (session_id, now),
+            )
+            self._conn.execute(
+                "INSERT INTO messages (session_id, role, content) VALUES (?, ?, ?)",
+                (session_id, message["role"], message.get("content") or ""),
+            )
+            self._conn.execute(
+                "DELETE FROM messages WHERE session_id = ? AND id NOT IN "
+                "(SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?)",
+                (session_id, session_id, self.max_messages),
+            )
+        if now - self._last_eviction > self.evict_interval:
+            self.evict_expired()
+
+    def replace(self, session_id: str, messages: List[Message]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, updated_at) VALUES (?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at",
+                (session_id, time.time()),
+            )
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._conn.executemany(
+                "INSERT INTO messages (session_id, role, content) VALUES (?, ?, ?)",
+                [(session_id, m["role"], m.get("content") or "") for m in messages[-self.max_messages:]],
+            )
+
+    def delete(self, session_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def evict_expired(self) -> int:
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock, self._conn:
+            self._last_eviction = time.time()
+            self._conn.execute(
+                "DELETE FROM messages WHERE session_id IN "
+                "(SELECT session_id FROM sessions WHERE updated_at <= ?)",
+                (cutoff,),
+            )
+            return self._conn.execute(
+                "DELETE FROM sessions WHERE updated_at <= ?", (cutoff,)
+            ).rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def create_session_store(backend: Optional[str] = None) -> SessionStore:
+    """
+    Builds the session store configured through environment variables.
+
+    SESSION_STORE: "memory" (default) or "sqlite"
+    SESSION_DB_PATH: SQLite file path (default: sessions.sqlite3)
+    SESSION_TTL_SECONDS: idle time before a session is dropped (default: 86400)
+    SESSION_MAX_MESSAGES: messages kept per session (default: 20)
+    """
+    backend = (backend or os.getenv("SESSION_STORE", "memory")).lower()
+    ttl_seconds = float(os.getenv("SESSION_TTL_SECONDS", "86400"))
+    max_messages = int(os.getenv("SESSION_MAX_MESSAGES", "20"))
+
+    if backend == "sqlite":
+        return SQLiteSessionStore(
+            path=os.getenv("SESSION_DB_PATH", "sessions.sqlite3"),
+            ttl_seconds=ttl_seconds,
+            max_messages=max_messages,
+        )
+    if backend == "memory":
+        return InMemorySessionStore(ttl_seconds=ttl_seconds, max_messages=max_messages)
+    raise ValueError(f"Unknown SESSION_STORE backend: {backend}")
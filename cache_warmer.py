@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Background warmer for the deep-research report cache.
+
+Keeps reports fresh for the searches people are most likely to make, so the first person
+asking about a common need does not wait for a cold multi-minute research run. Targets
+come from a matrix of cities x needs x demographics (cache_warm_matrix.json) and from the
+most requested entries already in the cache. Each cycle refreshes the stalest targets
+first, with a cap on concurrent runs and on runs per cycle, and staggers their start. Runs
+take "planning" slots of the research scheduler, so they queue behind people's searches.
+
+Runs inside the backend when CACHE_WARMER=true, alongside the deep-research server with
+`python start_api.py --warm`, or on its own:
+
+    python cache_warmer.py            # refresh every CACHE_WARM_INTERVAL_SECONDS
+    python cache_warmer.py --once     # one cycle, then exit
+    python cache_warmer.py --dry-run  # list targets by staleness without researching
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+import metrics
+from query_profile import QueryProfile, build_query, normalize_location
+from research_cache import ResearchCache
+from research_scheduler import ClassLimiter, create_research_scheduler
+
+load_dotenv()
+
+_KEY_PARAMS = re.compile(r"\|b(\d+)d(\d+)$")
+
+DEFAULT_MATRIX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache_warm_matrix.json")
+
+WARM_RUNS = metrics.counter("resource_cache_warm_runs_total", "Cache warmer research runs by result", ["result"])
+
+
+@dataclass
+class WarmTarget:
+    query: str
+    breadth: int
+    depth: int
+    source: str  # "matrix" or "popular"
+
+
+def load_matrix(path: str, breadth: int, depth: int) -> List[WarmTarget]:
+    """
+    Expands a warm-up matrix file into targets.
+
+    The file holds {"cities": [...], "needs": [[...], ...], "demographics": [[...], ...]}; each
+    entry of "needs"/"demographics" is one combination of category names from query_profile,
+    and [] in "demographics" means no specific group. Optional "breadth" and "depth" override
+    the given setting.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        matrix = json.load(f)
+    breadth = int(matrix.get("breadth", breadth))
+    depth = int(matrix.get("depth", depth))
+    targets = []
+    for city, needs, demographics in itertools.product(
+        matrix.get("cities", []), matrix.get("needs", []), matrix.get("demographics", [[]])
+    ):
+        profile = QueryProfile(
+            location=normalize_location(city),
+            needs=tuple(sorted(needs)),
+            demographics=tuple(sorted(demographics)),
+        )
+        targets.append(WarmTarget(build_query(profile), breadth, depth, "matrix"))
+    return targets
+
+
+def popular_targets(cache: ResearchCache, limit: int) -> List[WarmTarget]:
+    """The most requested cached searches, with the breadth and depth they were run at."""
+    targets = []
+    for key, query, _ in cache.popular(limit):
+        match = _KEY_PARAMS.search(key)
+        if match:
+            targets.append(WarmTarget(query, int(match.group(1)), int(match.group(2)), "popular"))
+    return targets
+
+
+class CacheWarmer:
+    """
+    Periodically refreshes stale or missing reports for the warm-up targets.
+
+    Args:
+        cache: The research cache to keep warm
+        matrix_path: Warm-up matrix file (see load_matrix)
+        top_queries: Number of most requested cached searches to keep warm as well
+        interval_seconds: Time between cycles
+        refresh_after_seconds: Age after which a report is refreshed; keep it below the cache TTL
+        max_concurrency: Research runs the warmer may have in flight at once
+        max_runs_per_cycle: Budget of research runs per cycle; the stalest targets go first
+            (default: see runs_per_cycle)
+        stagger_seconds: Delay between starting runs, to spread load on the research server
+        limiter: Research slot each run holds, e.g. a scheduler's "planning" limiter
+    """
+
+    def __init__(self, cache: ResearchCache, matrix_path: str = DEFAULT_MATRIX_PATH,
+                 top_queries: int = 20, interval_seconds: float = 900,
+                 refresh_after_seconds: float = 32400, max_concurrency: int = 1,
+                 max_runs_per_cycle: Optional[int] = None, stagger_seconds: float = 5,
+                 limiter: Optional[ClassLimiter] = None):
+        self.cache = cache
+        self.matrix_path = matrix_path
+        self.top_queries = top_queries
+        self.interval_seconds = interval_seconds
+        self.refresh_after_seconds = refresh_after_seconds
+        self.max_concurrency = max_concurrency
+        self.max_runs_per_cycle = max_runs_per_cycle
+        self.stagger_seconds = stagger_seconds
+        self.limiter = limiter
+
+    @classmethod
+    def from_env(cls, cache: ResearchCache, limiter: Optional[ClassLimiter] = None) -> "CacheWarmer":
+        """
+        Builds the warmer from environment variables; runs hold a slot of limiter.
+
+        CACHE_WARM_MATRIX: matrix file (default: cache_warm_matrix.json next to this module)
+        CACHE_WARM_TOP_QUERIES: most requested searches to keep warm (default: 20)
+        CACHE_WARM_INTERVAL_SECONDS: time between cycles (default: 900)
+        CACHE_WARM_REFRESH_AFTER_SECONDS: report age that triggers a refresh (default: 3/4 of the cache TTL)
+        CACHE_WARM_CONCURRENCY: concurrent research runs (default: 1)
+        CACHE_WARM_MAX_RUNS: research runs per cycle (default: enough to keep up, see runs_per_cycle)
+        CACHE_WARM_STAGGER_SECONDS: delay between starting runs (default: 5)
+        """
+        max_runs = os.getenv("CACHE_WARM_MAX_RUNS")
+        return cls(
+            cache,
+            matrix_path=os.getenv("CACHE_WARM_MATRIX", DEFAULT_MATRIX_PATH),
+            top_queries=int(os.getenv("CACHE_WARM_TOP_QUERIES", "20")),
+            interval_seconds=float(os.getenv("CACHE_WARM_INTERVAL_SECONDS", "900")),
+            refresh_after_seconds=float(os.getenv("CACHE_WARM_REFRESH_AFTER_SECONDS",
+                                                  str(cache.ttl_seconds * 0.75))),
+            max_concurrency=int(os.getenv("CACHE_WARM_CONCURRENCY", "1")),
+            max_runs_per_cycle=int(max_runs) if max_runs else None,
+            stagger_seconds=float(os.getenv("CACHE_WARM_STAGGER_SECONDS", "5")),
+            limiter=limiter,
+        )
+
+    def targets(self) -> List[WarmTarget]:
+        """
+        Matrix and popular targets, deduplicated by cache key.
+
+        Matrix targets are researched at the deep tier's setting (RESEARCH_DEEP_BREADTH/_DEPTH):
+        a progressive search with that report cached answers from it without running either
+        tier, and searches that leave breadth and depth to the controller reuse it too.
+        Multi-need searches are split the way a user's search would be (see
+        resource_finder.plan_research), so the reports warmed are the ones requests read.
+        """
+        from resource_finder import DEEP_TIER, plan_research, research_cache_key
+
+        unique: Dict[str, WarmTarget] = {}
+        matrix = load_matrix(self.matrix_path, DEEP_TIER.breadth, DEEP_TIER.depth)
+        for target in matrix + popular_targets(self.cache, self.top_queries):
+            plan, breadth = plan_research(target.query, target.breadth)
+            for query in plan.values():
+                unique.setdefault(research_cache_key(query, breadth, target.depth),
+                                  WarmTarget(query, breadth, target.depth, target.source))
+        return list(unique.values())
+
+    def runs_per_cycle(self, targets: int) -> int:
+        """
+        Research runs per cycle for a number of targets: max_runs_per_cycle if set, else twice
+        what refreshing each target once per refresh_after_seconds takes, so a cold cache fills
+        in half that time and refreshes never fall behind.
+        """
+        if self.max_runs_per_cycle is not None:
+            return self.max_runs_per_cycle
+        return max(1, math.ceil(2 * targets * self.interval_seconds / self.refresh_after_seconds))
+
+    def due(self, now: Optional[float] = None, targets: Optional[List[WarmTarget]] = None) -> List[tuple]:
+        """
+        Targets needing a refresh as (age in seconds or None if missing, target), stalest first.
+
+        Targets the resource index answers on its own are skipped until their records are
+        within a quarter of RESOURCE_DB_MAX_AGE_SECONDS of going stale.
+        """
+        from resource_finder import RESOURCE_DB_MAX_AGE_SECONDS, database_covers, research_cache_key
+
+        now = now or time.time()
+        due = []
+        for target in self.targets() if targets is None else targets:
+            if database_covers(target.query, RESOURCE_DB_MAX_AGE_SECONDS * 0.75):
+                continue
+            created = self.cache.created_at(research_cache_key(target.query, target.breadth, target.depth))
+            age = None if created is None else now - created
+            if age is None or age >= self.refresh_after_seconds:
+                due.append((age, target))
+        # Missing reports first, then the oldest
+        due.sort(key=lambda item: -1 if item[0] is None else -item[0])
+        due.sort(key=lambda item: item[0] is not None)
+        return due
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Runs one cycle and returns counts of refreshed, failed and deferred targets."""
+        from resource_finder import index_report, refresh_research_async
+
+        targets = self.targets()
+        due = self.due(targets=targets)
+        budget = self.runs_per_cycle(len(targets))
+        if budget * self.refresh_after_seconds < len(targets) * self.interval_seconds:
+            print(f"Cache warmer: {budget} runs per cycle cannot keep {len(targets)} targets fresh; "
+                  f"raise CACHE_WARM_MAX_RUNS or shrink the matrix")
+        batch, deferred = due[:budget], len(due) - budget
+        slots = asyncio.Semaphore(self.max_concurrency)
+        refreshed = failed = 0
+
+        async def refresh(delay: float, target: WarmTarget) -> None:
+            nonlocal refreshed, failed
+            await asyncio.sleep(delay)
+            async with slots:
+                try:
+                    report = await refresh_research_async(target.query, target.breadth, target.depth,
+                                                          limiter=self.limiter)
+                    index_report(target.query, report)
+                    refreshed += 1
+                    WARM_RUNS.inc(result="refreshed")
+                except Exception as e:
+                    print(f"Cache warmer: failed to refresh \"{target.query}\": {str(e)}")
+                    failed += 1
+                    WARM_RUNS.inc(result="failed")
+
+        await asyncio.gather(*(
+            refresh(i * self.stagger_seconds, target) for i, (_, target) in enumerate(batch)
+        ))
+        stats = {"due": len(due), "refreshed": refreshed, "failed": failed, "deferred": max(deferred, 0)}
+        print(f"Cache warmer cycle: {stats}")
+        return stats
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Cache warmer cycle failed: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Keep deep-research reports warm for common searches.")
+    parser.add_argument("--once", action="store_true", help="run a single cycle and exit")
+    parser.add_argument("--dry-run", action="store_true", help="list due targets without researching")
+    args = parser.parse_args()
+
+    from resource_finder import research_cache
+
+    # Its own process: the slots are shared with the backend when RESEARCH_SLOTS=sqlite
+    scheduler = create_research_scheduler(capacity=int(os.getenv("RESEARCH_MAX_CONCURRENCY", "2")))
+    warmer = CacheWarmer.from_env(research_cache, scheduler.limiter("planning"))
+    if args.dry_run:
+        for age, target in warmer.due():
+            state = "missing" if age is None else f"{age / 3600:.1f}h old"
+            print(f"[{target.source}] {state:>10}  b{target.breadth}d{target.depth}  {target.query}")
+        return
+    if args.once:
+        asyncio.run(warmer.run_once())
+        return
+    asyncio.run(warmer.run_forever())
+
+
+if __name__ == "__main__":
+    main()
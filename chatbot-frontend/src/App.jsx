@@ -6,15 +6,66 @@ function App() {
     const [userInput, setUserInput] = useState('');
     const [chatLog, setChatLog] = useState([]);
     const [loading, setLoading] = useState(false);
+    const [sessionId, setSessionId] = useState(null);
 
-    // Effect to load chat history from local storage when the app starts
+    // Effect to load chat history and the backend session id from local storage when the app starts
     useEffect(() => {
         const storedChatLog = localStorage.getItem('chatLog');
         if (storedChatLog) {
             setChatLog(JSON.parse(storedChatLog));
         }
+        setSessionId(localStorage.getItem('sessionId'));
     }, []);
 
+    // Shows a background research job's progress and replaces it with the report when done
+    const followResearchJob = (jobId) => {
+        const jobMessage = { type: 'bot', jobId, text: 'Searching for resources...' };
+        setChatLog(prev => [...prev, jobMessage]);
+
+        const updateJobMessage = (text, type = 'bot', final = true) => {
+            setChatLog(prev => {
+                const updated = prev.map(m => (m.jobId === jobId ? (final ? { type, text } : { ...m, type, text }) : m));
+                localStorage.setItem('chatLog', JSON.stringify(updated));
+                return updated;
+            });
+        };
+
+        const stageText = {
+            analyzing: 'Reviewing our conversation...',
+            query: 'Searching for resources...',
+            waiting: 'Waiting for a research slot...',
+            researching: 'Researching resources near you (this can take a few minutes)...',
+            over_budget: 'This is taking longer than usual, still searching...',
+        };
+        let hasResult = false;
+        const source = new EventSource(`http://localhost:8000/jobs/${jobId}/events`);
+        Object.keys(stageText).forEach(stage => {
+            source.addEventListener(stage, () => {
+                if (hasResult) return; // keep showing the quick results
+                setChatLog(prev => prev.map(m => (m.jobId === jobId ? { ...m, text: stageText[stage] } : m)));
+            });
+        });
+        // Quick results are shown right away and replaced when the deeper search finishes
+        source.addEventListener('result', (event) => {
+            const data = JSON.parse(event.data);
+            hasResult = true;
+            updateJobMessage(`${data.result.report}\n\n_Looking for more resources..._`, 'bot', false);
+        });
+        source.addEventListener('done', (event) => {
+            const data = JSON.parse(event.data);
+            if (data.status === 'succeeded') {
+                updateJobMessage(data.result.report);
+            } else {
+                updateJobMessage('Sorry, the resource search failed. Please try again.', 'error');
+            }
+            source.close();
+        });
+        source.onerror = () => {
+            updateJobMessage('Lost connection to the resource search. Please try again.', 'error');
+            source.close();
+        };
+    };
+
     const handleSubmit = async (event) => {
         event.preventDefault();
         if (!userInput.trim()) return; // Don't send empty messages
@@ -26,19 +77,55 @@ function App() {
         setLoading(true);
 
         try {
-            // The API call to our FastAPI backend
-            const response = await fetch('http://localhost:8000/chat', {
+            // The API call to our FastAPI backend; the answer streams in as server-sent events
+            const response = await fetch('http://localhost:8000/chat/stream', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ user_message: userInput }),
+                body: JSON.stringify({ user_message: userInput, session_id: sessionId }),
             });
 
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
 
-            const data = await response.json();
-            const botMessage = { type: 'bot', text: data.bot_response };
+            let botText = '';
+            let done = null;
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { value, done: streamEnded } = await reader.read();
+                if (streamEnded) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                const events = buffer.split('\n\n');
+                buffer = events.pop();
+                for (const raw of events) {
+                    const eventName = raw.match(/^event: (.*)$/m)?.[1];
+                    const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] ?? '{}');
+                    if (eventName === 'delta') {
+                        botText += data.content;
+                        setChatLog([...newChatLog, { type: 'bot', text: botText }]);
+                    } else if (eventName === 'done') {
+                        done = data;
+                    } else if (eventName === 'error') {
+                        // The session may have been created before the failure: keep using it
+                        if (data.session_id) {
+                            setSessionId(data.session_id);
+                            localStorage.setItem('sessionId', data.session_id);
+                        }
+                        throw new Error(data.detail);
+                    }
+                }
+            }
+            if (!done) {
+                throw new Error('Chat stream ended unexpectedly');
+            }
+
+            setSessionId(done.session_id);
+            localStorage.setItem('sessionId', done.session_id);
+            const botMessage = { type: 'bot', text: botText };
 
             // Update the chat log with the bot's response
             const finalChatLog = [...newChatLog, botMessage];
@@ -47,6 +134,11 @@ function App() {
             // Save the updated chat log to local storage for persistence
             localStorage.setItem('chatLog', JSON.stringify(finalChatLog));
 
+            // Long resource searches continue as a background job
+            if (done.job_id) {
+                followResearchJob(done.job_id);
+            }
+
         } catch (error) {
             console.error('Error fetching chat response:', error);
             const errorMessage = { type: 'error', text: 'Sorry, something went wrong. Please try again.' };
@@ -65,7 +157,7 @@ function App() {
                         {message.text}
                     </div>
                 ))}
-                {loading && <div className="message bot">Loading...</div>}
+                {loading && chatLog[chatLog.length - 1]?.type === 'user' && <div className="message bot">Loading...</div>}
             </div>
             <form onSubmit={handleSubmit} className="chat-form">
                 <input
@@ -0,0 +1,153 @@
+"""
+Token counting and history compaction for LLM prompts.
+
+Conversations only grow, so prompts built from the whole history get slower and more
+expensive every turn. ConversationContext fits a history into a token budget: it keeps the
+newest messages that fit and replaces the older ones with a single summary message holding
+the user's profile (location, needs, population groups, see query_profile) and short
+excerpts of what they said. Compacting a history that already starts with a summary folds
+the old summary into the new one, so the summary rolls forward as the conversation grows.
+
+Tokens are counted with tiktoken when it is installed, and estimated at four characters
+per token otherwise.
+"""
+
+import os
+from typing import Dict, List, Optional
+
+from query_profile import (
+    DEMOGRAPHIC_QUERY_TERMS, NEED_QUERY_TERMS, SUMMARY_PREFIX, describe_location, is_summary, summarize_profile,
+)
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except ImportError:
+    _ENCODING = None
+
+Message = Dict[str, str]
+
+# Role and framing tokens the chat format adds to every message
+MESSAGE_OVERHEAD_TOKENS = 4
+_EXCERPTS_HEADER = "Earlier user messages:"
+
+
+def count_tokens(text: str) -> int:
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return (len(text) + 3) // 4
+
+
+def message_tokens(message: Message) -> int:
+    return MESSAGE_OVERHEAD_TOKENS + count_tokens(message.get("content") or "")
+
+
+def messages_tokens(messages: List[Message]) -> int:
+    return sum(message_tokens(m) for m in messages)
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    if count_tokens(text) <= max_tokens:
+        return text
+    if _ENCODING is not None:
+        return _ENCODING.decode(_ENCODING.encode(text)[:max(max_tokens - 1, 0)]) + "…"
+    return text[:max(max_tokens * 4 - 1, 0)] + "…"
+
+
+class ConversationContext:
+    """
+    Fits conversation histories into a token budget.
+
+    Leading system prompts are always kept. Histories are expected to hold plain user and
+    assistant messages (no tool calls), as the session store does.
+
+    Args:
+        budget_tokens: Default budget for a compacted history, summary included
+        summary_tokens: Largest summary message
+        excerpt_tokens: Tokens kept from each summarized user message
+    """
+
+    def __init__(self, budget_tokens: int = 2000, summary_tokens: int = 300, excerpt_tokens: int = 40):
+        self.budget_tokens = budget_tokens
+        self.summary_tokens = summary_tokens
+        self.excerpt_tokens = excerpt_tokens
+
+    @classmethod
+    def from_env(cls, prefix: str, budget_tokens: int) -> "ConversationContext":
+        """Reads <PREFIX>_TOKENS for the budget (e.g. CHAT_HISTORY_TOKENS), with the given default."""
+        return cls(budget_tokens=int(os.getenv(f"{prefix}_TOKENS", str(budget_tokens))))
+
+    def compact(self, messages: List[Message], budget_tokens: Optional[int] = None,
+                max_messages: Optional[int] = None) -> List[Message]:
+        """
+        Returns the history fitted to the budget.
+
+        Histories within the budget (and max_messages, if given) are returned unchanged.
+        Otherwise the newest messages that fit are kept, the last one always (truncated if
+        it alone is over budget), and everything older is replaced by a summary message.
+        """
+        budget = budget_tokens if budget_tokens is not None else self.budget_tokens
+        pinned = []
+        for message in messages:
+            if message.get("role") != "system" or is_summary(message):
+                break
+            pinned.append(message)
+        history = messages[len(pinned):]
+        if messages_tokens(messages) <= budget and (max_messages is None or len(history) <= max_messages):
+            return list(messages)
+
+        # Small budgets give most of the room to the recent messages
+        summary_tokens = min(self.summary_tokens, budget // 3)
+        available = budget - messages_tokens(pinned) - summary_tokens - MESSAGE_OVERHEAD_TOKENS
+        kept: List[Message] = []
+        used = 0
+        for message in reversed(history):
+            cost = message_tokens(message)
+            if kept and (used + cost > available or (max_messages and len(kept) + 1 >= max_messages)):
+                break
+            if not kept and cost > available:
+                content = _truncate(message.get("content") or "", max(available - MESSAGE_OVERHEAD_TOKENS, 1))
+                message, cost = {**message, "content": content}, available
+            kept.append(message)
+            used += cost
+        kept.reverse()
+
+        dropped = history[:len(history) - len(kept)]
+        if not dropped:
+            return pinned + kept
+        return pinned + [self.summarize(dropped, summary_tokens)] + kept
+
+    def summarize(self, messages: List[Message], max_tokens: Optional[int] = None) -> Message:
+        """Builds the summary message for messages, folding in an earlier summary among them."""
+        profile = summarize_profile(messages)
+        facts = []
+        if profile.location:
+            facts.append(f"location: {describe_location(profile.location)}")
+        if profile.needs:
+            facts.append("needs: " + ", ".join(NEED_QUERY_TERMS[n] for n in profile.needs))
+        if profile.demographics:
+            groups = [DEMOGRAPHIC_QUERY_TERMS.get(d, "LGBTQ people") for d in profile.demographics]
+            facts.append("groups: " + ", ".join(groups))
+        header = f"{SUMMARY_PREFIX}. User profile: " + ("; ".join(facts) if facts else "unknown") + "."
+
+        excerpts = []
+        for message in messages:
+            content = message.get("content") or ""
+            if is_summary(message) and _EXCERPTS_HEADER in content:
+                excerpts += [line[2:] for line in content.split(_EXCERPTS_HEADER, 1)[1].splitlines()
+                             if line.startswith("- ")]
+            elif message.get("role") == "user" and content.strip():
+                excerpts.append(_truncate(" ".join(content.split()), self.excerpt_tokens))
+
+        # Keep the most recent excerpts that fit next to the profile
+        room = (max_tokens or self.summary_tokens) - count_tokens(header) - count_tokens(_EXCERPTS_HEADER) - 2
+        lines: List[str] = []
+        for excerpt in reversed(excerpts):
+            cost = count_tokens(excerpt) + 2
+            if cost > room:
+                break
+            lines.append(f"- {excerpt}")
+            room -= cost
+        lines.reverse()
+        content = header + ("\n" + _EXCERPTS_HEADER + "\n" + "\n".join(lines) if lines else "")
+        return {"role": "system", "content": content}
@@ -0,0 +1,209 @@
+"""
+Latency, token, cache and error metrics for the resource pipeline.
+
+Stages are timed with `timed("stage")`, which feeds a per-stage histogram, counts errors,
+and adds the duration to the current request's trace so the backend can log one structured
+timing line per request or job. `render()` returns every metric in the Prometheus text
+format for the backend's /metrics endpoint.
+"""
+
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; covers sub-millisecond cache lookups up to the 10 minute research timeout
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+                    for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> (bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(tuple(str(labels[name]) for name in self.labels))
+        return entry[2] if entry else 0
+
+    def totals(self) -> Dict[Tuple[str, ...], Tuple[int, float]]:
+        """(count, sum) for every label combination observed so far."""
+        with self._lock:
+            return {key: (count, total) for key, (_, total, count) in self._values.items()}
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {bucket_count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class Gauge:
+    """
+    Value read from a callback at scrape time, e.g. the number of live sessions.
+
+    With labels, the callback returns a dict mapping label values to readings.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], object], labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.read = read
+        self.labels = tuple(labels)
+
+    def samples(self) -> List[str]:
+        try:
+            if not self.labels:
+                return [f"{self.name} {_format_value(self.read())}"]
+            return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+                    for key, value in sorted(self.read().items())]
+        except Exception:
+            return []
+
+
+_registry: Dict[str, object] = {}
+
+
+def _register(metric):
+    # Re-registering a name returns the existing metric, so modules can be reloaded
+    return _registry.setdefault(metric.name, metric)
+
+
+def counter(name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+    return _register(Counter(name, help_text, labels))
+
+
+def histogram(name: str, help_text: str, labels: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram(name, help_text, labels, buckets))
+
+
+def gauge(name: str, help_text: str, read: Callable[[], object], labels: Sequence[str] = ()) -> Gauge:
+    """Registers (or replaces) a gauge read from a callback."""
+    _registry[name] = Gauge(name, help_text, read, labels)
+    return _registry[name]
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry.values():
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = histogram("resource_stage_seconds", "Duration of each pipeline stage", ["stage"])
+STAGE_ERRORS = counter("resource_stage_errors_total", "Pipeline stages that raised", ["stage"])
+LLM_TOKENS = counter("resource_llm_tokens_total", "OpenAI tokens used, by stage", ["stage", "kind"])
+CACHE_LOOKUPS = counter("resource_cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"])
+
+# Stage name -> seconds spent in it during the current request or job
+_trace: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("trace", default=None)
+
+
+def start_trace() -> Dict[str, float]:
+    """Starts collecting stage timings for the current request or task and returns the trace."""
+    trace: Dict[str, float] = {}
+    _trace.set(trace)
+    return trace
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Times a block as a pipeline stage; exceptions are counted and re-raised."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        trace = _trace.get()
+        if trace is not None:
+            trace[stage] = trace.get(stage, 0) + elapsed
+
+
+def record_usage(stage: str, usage) -> None:
+    """Adds an OpenAI response's token usage (may be None) to the token counters."""
+    if usage is None:
+        return
+    LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, stage=stage, kind="prompt")
+    LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, stage=stage, kind="completion")
+
+
+def record_cache(cache: str, result: str) -> None:
+    CACHE_LOOKUPS.inc(cache=cache, result=result)
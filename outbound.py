@@ -0,0 +1,324 @@
+"""
+Shared layer for calls to remote services (the deep-research API and OpenAI).
+
+Each service gets a retry policy and a circuit breaker. Transient failures (connection
+errors, timeouts, 429 and 5xx responses) are retried with jittered exponential backoff,
+honouring Retry-After. After `failure_threshold` consecutive failures the service's circuit
+opens and calls fail fast with CircuitOpenError instead of waiting on a dead server; after
+`reset_seconds` one probe call is let through, and its outcome closes or re-opens the
+circuit. Circuit states, retries and rejections are exported on /metrics.
+
+    report = DEEP_RESEARCH.call(post_report, query)
+    response = await OPENAI.acall(async_openai_client().chat.completions.create, model=..., messages=...)
+
+The OpenAI clients and the requests session are shared and created on first use; the
+libraries behind them (like httpx) are imported then too, keeping them off the backend's
+cold start.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import metrics
+
+if TYPE_CHECKING:
+    import openai
+    import requests
+
+RETRIES = metrics.counter("outbound_retries_total", "Outbound calls retried after a transient failure", ["service"])
+FAILURES = metrics.counter("outbound_failures_total", "Outbound calls that failed transiently", ["service"])
+REJECTED = metrics.counter("outbound_circuit_rejections_total", "Calls refused because a circuit was open", ["service"])
+
+# Circuit state values exported on /metrics
+_STATE_VALUES = {"closed": 0, "open": 1, "half_open": 2}
+
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling a service while its circuit is open."""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Jittered exponential backoff.
+
+    Args:
+        attempts: Tries in total, the first included
+        base_delay: Upper bound of the first backoff, in seconds; doubles on every retry
+        max_delay: Largest backoff, also the most a Retry-After header can make us wait
+    """
+
+    attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+
+    def delay(self, retry: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number `retry` (0-based), with full jitter."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Args:
+        failure_threshold: Consecutive failures that open the circuit
+        reset_seconds: Time the circuit stays open before a probe call is allowed
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._probing or time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def retry_in(self) -> float:
+        """Seconds until the next probe is allowed (0 when calls go through)."""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; at most one probe runs while half-open."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def record_cancelled(self) -> None:
+        """A call was cancelled; a cancelled probe counts as a failed one so the circuit can probe again."""
+        with self._lock:
+            if self._probing:
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+def _retry_after(headers) -> Optional[float]:
+    try:
+        return float(headers.get("retry-after")) if headers is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def http_transient(error: BaseException) -> Tuple[bool, Optional[float]]:
+    """Classifies httpx/requests errors: (transient?, Retry-After seconds if given)."""
+    import httpx
+
+    connection_errors = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+    status_errors = (httpx.HTTPStatusError,)
+    # Only the sync path uses requests: an error can't come from it unless it was imported
+    requests = sys.modules.get("requests")
+    if requests is not None:
+        connection_errors += (requests.exceptions.ConnectionError,)
+        status_errors += (requests.exceptions.HTTPError,)
+    if isinstance(error, connection_errors):
+        return True, None
+    response = getattr(error, "response", None)
+    if isinstance(error, status_errors) and response is not None:
+        return response.status_code in _RETRYABLE_STATUS, _retry_after(response.headers)
+    return False, None
+
+
+def openai_transient(error: BaseException) -> Tuple[bool, Optional[float]]:
+    """Classifies OpenAI SDK errors: (transient?, Retry-After seconds if given)."""
+    import openai
+
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        response = getattr(error, "response", None)
+        return True, _retry_after(response.headers) if response is not None else None
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in _RETRYABLE_STATUS, _retry_after(error.response.headers)
+    return False, None
+
+
+class OutboundService:
+    """
+    Retry policy and circuit breaker for one remote service.
+
+    Args:
+        name: Service label in metrics and error messages
+        classify: Returns (transient?, Retry-After) for an exception; only transient
+            failures are retried and count against the circuit
+        policy: Backoff between attempts
+        breaker: Circuit breaker shared by every call to the service
+    """
+
+    def __init__(self, name: str, classify: Callable[[BaseException], Tuple[bool, Optional[float]]],
+                 policy: Optional[RetryPolicy] = None, breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.classify = classify
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+
+    @classmethod
+    def from_env(cls, name: str, classify: Callable[[BaseException], Tuple[bool, Optional[float]]],
+                 attempts: int = 3) -> "OutboundService":
+        """
+        Builds the service from OUTBOUND_<NAME>_ATTEMPTS, _BASE_DELAY, _MAX_DELAY,
+        _FAILURE_THRESHOLD and _RESET_SECONDS (defaults: attempts, 0.5, 8, 5, 30).
+        """
+        prefix = f"OUTBOUND_{name.upper()}_"
+        return cls(
+            name,
+            classify,
+            RetryPolicy(
+                attempts=int(os.getenv(prefix + "ATTEMPTS", str(attempts))),
+                base_delay=float(os.getenv(prefix + "BASE_DELAY", "0.5")),
+                max_delay=float(os.getenv(prefix + "MAX_DELAY", "8")),
+            ),
+            CircuitBreaker(
+                failure_threshold=int(os.getenv(prefix + "FAILURE_THRESHOLD", "5")),
+                reset_seconds=float(os.getenv(prefix + "RESET_SECONDS", "30")),
+            ),
+        )
+
+    def _check_circuit(self) -> None:
+        if not self.breaker.allow():
+            REJECTED.inc(service=self.name)
+            raise CircuitOpenError(
+                f"{self.name} is unavailable after repeated failures; "
+                f"retrying in {self.breaker.retry_in():.0f}s"
+            )
+
+    def _should_retry(self, error: BaseException, attempt: int) -> Optional[float]:
+        """Records a failed attempt; returns the backoff before the next one, or None to give up."""
+        transient, retry_after = self.classify(error)
+        if not transient:
+            # The service answered; a bad request says nothing about its health
+            self.breaker.record_success()
+            return None
+        FAILURES.inc(service=self.name)
+        self.breaker.record_failure()
+        if attempt + 1 >= self.policy.attempts or self.breaker.state != "closed":
+            return None
+        RETRIES.inc(service=self.name)
+        return self.policy.delay(attempt, retry_after)
+
+    def call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        for attempt in range(self.policy.attempts):
+            self._check_circuit()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._should_retry(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled (a deadline or a client disconnect): says nothing about the service,
+                # but a probe must not be left half-open for good
+                self.breaker.record_cancelled()
+                raise
+            self.breaker.record_success()
+            return result
+
+    async def acall(self, fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        for attempt in range(self.policy.attempts):
+            self._check_circuit()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._should_retry(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled (a deadline or a client disconnect): says nothing about the service,
+                # but a probe must not be left half-open for good
+                self.breaker.record_cancelled()
+                raise
+            self.breaker.record_success()
+            return result
+
+
+DEEP_RESEARCH = OutboundService.from_env("deep_research", http_transient)
+OPENAI = OutboundService.from_env("openai", openai_transient)
+SERVICES: Dict[str, OutboundService] = {s.name: s for s in (DEEP_RESEARCH, OPENAI)}
+
+metrics.gauge(
+    "outbound_circuit_state", "Circuit state per service: 0 closed, 1 open, 2 half-open",
+    lambda: {(name, ): _STATE_VALUES[s.breaker.state] for name, s in SERVICES.items()}, ["service"],
+)
+
+_session: Optional["requests.Session"] = None
+_session_lock = threading.Lock()
+
+
+def http_session(pool_size: int = 20) -> "requests.Session":
+    """Shared keep-alive requests session for synchronous callers, created on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+_openai_clients: Dict[str, Any] = {}
+_openai_lock = threading.Lock()
+
+
+def _openai_client(kind: str) -> Any:
+    with _openai_lock:
+        if kind not in _openai_clients:
+            # The SDK is the slowest import of the backend, so it waits until a client is needed
+            import openai
+
+            client_class = openai.AsyncOpenAI if kind == "async" else openai.OpenAI
+            # Retries are left to OPENAI so they are counted and share its circuit breaker
+            _openai_clients[kind] = client_class(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+        return _openai_clients[kind]
+
+
+def openai_client() -> "openai.OpenAI":
+    """Shared synchronous OpenAI client (for scripts), created on first use."""
+    return _openai_client("sync")
+
+
+def async_openai_client() -> "openai.AsyncOpenAI":
+    """Shared AsyncOpenAI client for the backend, created on first use."""
+    return _openai_client("async")
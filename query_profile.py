@@ -0,0 +1,376 @@
+"""
+Normalization of resource search queries.
+
+Turns free-text queries such as "Search for emergency shelter and food assistance for
+LGBTQ youth in San Francisco" into a canonical (location, needs, demographics) profile,
+so near-identical queries map to the same key. The same vocabularies, plus a small city
+gazetteer, let clear-cut conversations be turned into a search query without an LLM call.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+# Canonical need category -> phrases that signal it
+NEED_CATEGORIES: Dict[str, List[str]] = {
+    "shelter": ["shelter", "housing", "place to sleep", "somewhere to sleep", "where to sleep",
+                "bed", "transitional", "drop-in", "navigation center", "safe parking",
+                "somewhere to stay", "place to stay", "where to stay"],
+    "food": ["food", "meal", "eat", "eaten", "hungry", "pantry", "pantries", "soup kitchen",
+             "groceries", "calfresh", "snap"],
+    "healthcare": ["healthcare", "health care", "medical", "clinic", "doctor", "hospital",
+                   "dental", "medication", "prescription"],
+    "mental_health": ["mental health", "counseling", "therapy", "therapist", "crisis",
+                      "depression", "anxiety", "suicidal"],
+    "substance_use": ["substance", "addiction", "detox", "rehab", "recovery", "sober",
+                      "drug", "alcohol"],
+    # Not a bare "work", as in "I work at a bar"
+    "employment": ["job", "employment", "job training", "career", "resume", "unemployed",
+                   "looking for work", "find work", "need work", "out of work"],
+    "legal": ["legal", "lawyer", "attorney", "eviction", "immigration", "court"],
+    "education": ["school", "education", "ged", "college", "tutoring"],
+    "hygiene": ["shower", "laundry", "hygiene", "restroom"],
+    "benefits": ["benefits", "cash assistance", "welfare", "medi-cal", "medicaid", "ssi",
+                 "general assistance"],
+    "childcare": ["childcare", "child care", "daycare"],
+    "transportation": ["transportation", "bus pass", "transit"],
+}
+
+# Canonical population group -> phrases that signal it
+DEMOGRAPHICS: Dict[str, List[str]] = {
+    "youth": ["youth", "young adult", "young person", "young people", "teen", "teenager", "minor", "tay"],
+    "lgbtq": ["lgbtq", "lgbtq+", "lgbt", "gay", "lesbian", "queer", "trans", "transgender",
+              "nonbinary", "non-binary", "bisexual"],
+    "veteran": ["veteran", "military"],
+    "family": ["family", "families", "kids", "children", "child", "parent", "mother", "father"],
+    "pregnant": ["pregnant", "pregnancy"],
+    "women": ["women", "woman"],
+    "disability": ["disability", "disabilities", "disabled", "wheelchair"],
+    # Not a bare "abuse", which also appears in "substance abuse"
+    "domestic_violence": ["domestic violence", "domestic abuse", "partner abuse", "abusive", "survivor"],
+    "senior": ["senior", "elderly", "older adult"],
+    "immigrant": ["immigrant", "undocumented", "refugee"],
+}
+
+# Common abbreviations -> canonical location name
+LOCATION_ALIASES: Dict[str, str] = {
+    "sf": "san francisco",
+    "san fran": "san francisco",
+    "la": "los angeles",
+    "nyc": "new york",
+    "new york city": "new york",
+    "dc": "washington",
+}
+
+# Gazetteer of cities recognized in conversations -> state
+CITY_STATES: Dict[str, str] = {
+    "san francisco": "California", "oakland": "California", "berkeley": "California",
+    "san jose": "California", "los angeles": "California", "san diego": "California",
+    "sacramento": "California", "fresno": "California", "long beach": "California",
+    "santa cruz": "California", "seattle": "Washington", "tacoma": "Washington",
+    "spokane": "Washington", "portland": "Oregon", "las vegas": "Nevada", "reno": "Nevada",
+    "phoenix": "Arizona", "tucson": "Arizona", "denver": "Colorado", "salt lake city": "Utah",
+    "albuquerque": "New Mexico", "dallas": "Texas", "houston": "Texas", "austin": "Texas",
+    "san antonio": "Texas", "fort worth": "Texas", "el paso": "Texas", "oklahoma city": "Oklahoma",
+    "kansas city": "Missouri", "st. louis": "Missouri", "minneapolis": "Minnesota",
+    "chicago": "Illinois", "milwaukee": "Wisconsin", "detroit": "Michigan", "columbus": "Ohio",
+    "cleveland": "Ohio", "cincinnati": "Ohio", "indianapolis": "Indiana", "louisville": "Kentucky",
+    "nashville": "Tennessee", "memphis": "Tennessee", "atlanta": "Georgia", "miami": "Florida",
+    "orlando": "Florida", "tampa": "Florida", "jacksonville": "Florida", "new orleans": "Louisiana",
+    "charlotte": "North Carolina", "raleigh": "North Carolina", "washington": "District of Columbia",
+    "baltimore": "Maryland", "philadelphia": "Pennsylvania", "pittsburgh": "Pennsylvania",
+    "new york": "New York", "boston": "Massachusetts", "honolulu": "Hawaii", "anchorage": "Alaska",
+}
+
+_LOCATION_PATTERN = re.compile(
+    r"\b(?:in|near|around)\s+(?:the\s+)?"
+    r"([A-Z][\w.'-]*(?:\s+[A-Z][\w.'-]*)*(?:,\s*[A-Z][A-Za-z]+)?)"
+)
+# A place written after a comma at the end of a query: "Emergency shelters for LGBTQ youth, San Jose"
+_TRAILING_PLACE = re.compile(r",\s*([A-Z][\w.'-]*(?:\s+[A-Z][\w.'-]*)*(?:,\s*[A-Z][A-Za-z]+)?)\s*[.!?]?\s*$")
+_LOCATION_SUFFIXES = re.compile(r"\s+(?:area|bay area|metro|region|city|county)$")
+_WORD = re.compile(r"[a-z0-9+]+")
+_STOPWORDS = {
+    "a", "an", "and", "for", "in", "of", "the", "to", "with", "near", "around", "search",
+    "find", "locate", "services", "resources", "programs", "assistance", "help", "support",
+}
+
+
+def _phrase_pattern(phrases: List[str]) -> re.Pattern:
+    # Whole-word match, allowing a plural "s"/"es"
+    alternatives = "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+    return re.compile(rf"(?<![\w-])(?:{alternatives})(?:e?s)?(?![\w-])")
+
+
+_NEED_PATTERNS = {name: _phrase_pattern(phrases) for name, phrases in NEED_CATEGORIES.items()}
+_DEMOGRAPHIC_PATTERNS = {name: _phrase_pattern(phrases) for name, phrases in DEMOGRAPHICS.items()}
+
+
+def match_categories(text: str, patterns: Dict[str, re.Pattern]) -> Tuple[str, ...]:
+    """Returns the sorted category names whose phrases occur in text."""
+    lowered = text.lower()
+    return tuple(sorted(name for name, pattern in patterns.items() if pattern.search(lowered)))
+
+
+def match_needs(text: str) -> Tuple[str, ...]:
+    """Need categories mentioned in text, e.g. ("food", "shelter")."""
+    return match_categories(text, _NEED_PATTERNS)
+
+
+def match_demographics(text: str) -> Tuple[str, ...]:
+    """Population groups mentioned in text, e.g. ("lgbtq", "youth")."""
+    return match_categories(text, _DEMOGRAPHIC_PATTERNS)
+
+
+def normalize_location(location: str) -> str:
+    """
+    Lowercases a place name, drops a trailing "county"/"area" and resolves common aliases
+    ("SF" -> "san francisco", "Los Angeles County" -> "los angeles").
+    """
+    location = re.sub(r"\s+", " ", location.strip().lower().rstrip("."))
+    city = location.split(",")[0].strip()
+    city = LOCATION_ALIASES.get(city, city)
+    city = _LOCATION_SUFFIXES.sub("", city)
+    return LOCATION_ALIASES.get(city, city)
+
+
+def extract_location(text: str) -> Optional[str]:
+    """
+    Finds the place a query is about: the one named after "in"/"near"/"around", else a known
+    city named anywhere, else a place after a comma at the end ("..., San Jose").
+    """
+    match = _LOCATION_PATTERN.search(text) or _CITY_ABBREVIATIONS.search(text) or _CITY_PATTERN.search(text.lower())
+    if not match:
+        match = _TRAILING_PLACE.search(text)
+        # "Need Food, Shelter" ends in a need, not a place
+        if not match or match_needs(match.group(1)) or match_demographics(match.group(1)):
+            return None
+    return normalize_location(match.group(1))
+
+
+@dataclass(frozen=True)
+class QueryProfile:
+    """Canonical description of what a resource search is looking for."""
+
+    location: Optional[str]
+    needs: Tuple[str, ...]
+    demographics: Tuple[str, ...]
+    # Fallback fingerprint for queries where no known category was recognized
+    terms: Tuple[str, ...] = ()
+    # Normalized query text when no location was recognized: such queries could be about any
+    # place, so they only share a key (and a research run) when worded alike
+    text: str = field(default="", repr=False)
+
+    def cache_key(self, breadth: int, depth: int) -> str:
+        return "|".join([
+            self.location or self.text,
+            ",".join(self.needs),
+            ",".join(self.demographics),
+            ",".join(self.terms),
+            f"b{breadth}d{depth}",
+        ])
+
+    @property
+    def query_class(self) -> str:
+        """The needs searched for, e.g. "food+shelter" ("general" when none is recognized)."""
+        return "+".join(self.needs) or "general"
+
+
+def parse_query(query: str) -> QueryProfile:
+    """
+    Normalizes a generated search query into a QueryProfile.
+
+    Example:
+        >>> parse_query("Search for emergency shelter and food assistance for LGBTQ youth in San Francisco")
+        QueryProfile(location='san francisco', needs=('food', 'shelter'), demographics=('lgbtq', 'youth'), terms=())
+    """
+    needs = match_needs(query)
+    demographics = match_demographics(query)
+    terms: Tuple[str, ...] = ()
+    if not needs:
+        terms = tuple(sorted({w for w in _WORD.findall(query.lower()) if w not in _STOPWORDS}))
+    location = extract_location(query)
+    return QueryProfile(
+        location=location,
+        needs=needs,
+        demographics=demographics,
+        terms=terms,
+        text="" if location else " ".join(_WORD.findall(query.lower())),
+    )
+
+
+# Wording used when building a query; each phrase maps back to its own category only
+NEED_QUERY_TERMS: Dict[str, str] = {
+    "shelter": "emergency shelter",
+    "food": "food assistance",
+    "healthcare": "healthcare",
+    "mental_health": "mental health services",
+    "substance_use": "substance use treatment",
+    "employment": "job training and employment services",
+    "legal": "legal aid",
+    "education": "education programs",
+    "hygiene": "showers and hygiene services",
+    "benefits": "public benefits enrollment",
+    "childcare": "childcare assistance",
+    "transportation": "transportation assistance",
+}
+DEMOGRAPHIC_QUERY_TERMS: Dict[str, str] = {
+    "youth": "youth",
+    "veteran": "veterans",
+    "family": "families",
+    "pregnant": "pregnant people",
+    "women": "women",
+    "disability": "people with disabilities",
+    "domestic_violence": "domestic violence survivors",
+    "senior": "seniors",
+    "immigrant": "immigrants",
+}
+
+# Normalized location -> (city as written, state), for writing queries
+_GAZETTEER = {normalize_location(city): (city, state) for city, state in CITY_STATES.items()}
+_CITY_PATTERN = re.compile(
+    r"(?<![\w-])(" + "|".join(re.escape(c) for c in sorted(CITY_STATES, key=len, reverse=True)) + r")(?![\w-])"
+)
+# Abbreviations only count in capitals, so "la" or "dc" inside ordinary words never match
+_CITY_ABBREVIATIONS = re.compile(r"\b(SF|San Fran|LA|NYC|DC)\b")
+# An explicit age ("I'm 19", "age 19", "19 years old", "19-year-old", "19 y/o"), not any
+# number of years ("homeless for 20 years")
+_AGE = re.compile(r"\b(?:i'?m|i am|aged?)\s+(\d{1,2})\b|\b(\d{1,2})(?:[\s-]*(?:years?|yrs?)[\s-]+old|\s*y/?o)\b",
+                  re.IGNORECASE)
+_NEGATION = re.compile(r"\b(?:don'?t|do not|doesn'?t|no longer|not|never|already have)\b")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+
+# Compacted histories open with a summary of the turns they replace (see conversation_context.py);
+# it is read along with the user's own messages
+SUMMARY_PREFIX = "Summary of the earlier conversation"
+
+
+def is_summary(message: Dict[str, str]) -> bool:
+    return message.get("role") == "system" and (message.get("content") or "").startswith(SUMMARY_PREFIX)
+
+
+def _user_text(messages: List[Dict[str, str]]) -> str:
+    return "\n".join(m.get("content") or "" for m in messages if m.get("role") == "user" or is_summary(m))
+
+
+def _conversation_cities(text: str) -> Set[str]:
+    found = _CITY_PATTERN.findall(text.lower()) + _CITY_ABBREVIATIONS.findall(text)
+    return {normalize_location(city) for city in found}
+
+
+def _age_groups(text: str) -> Set[str]:
+    groups = set()
+    for match in _AGE.finditer(text):
+        age = int(match.group(1) or match.group(2))
+        if 12 <= age <= 24:
+            groups.add("youth")
+        elif age >= 62:
+            groups.add("senior")
+    return groups
+
+
+def profile_conversation(messages: List[Dict[str, str]]) -> Optional[QueryProfile]:
+    """
+    Builds a QueryProfile from the user's own messages when they are unambiguous.
+
+    Requires exactly one known city and at least one need, with no negated need
+    ("I don't need food"). Demographics come from the vocabularies plus stated ages.
+
+    Returns:
+        The profile, or None when the conversation needs an LLM to interpret it
+    """
+    text = _user_text(messages)
+    cities = _conversation_cities(text)
+    if len(cities) != 1:
+        return None
+
+    for sentence in _SENTENCE_SPLIT.split(text.lower()):
+        if match_needs(sentence) and _NEGATION.search(sentence):
+            return None
+    needs = match_needs(text)
+    if not needs:
+        return None
+
+    demographics = tuple(sorted(set(match_demographics(text)) | _age_groups(text)))
+    return QueryProfile(location=cities.pop(), needs=needs, demographics=demographics)
+
+
+def summarize_profile(messages: List[Dict[str, str]]) -> QueryProfile:
+    """
+    Best-effort profile of everything the user has said, for conversation summaries.
+
+    Unlike profile_conversation it always answers: the location is the last city named,
+    needs are those mentioned outside negated sentences, and groups include stated ages.
+    """
+    text = _user_text(messages)
+    mentions = [(m.start(), m.group(1)) for m in _CITY_PATTERN.finditer(text.lower())]
+    mentions += [(m.start(), m.group(1)) for m in _CITY_ABBREVIATIONS.finditer(text)]
+    location = normalize_location(max(mentions)[1]) if mentions else None
+
+    needs: Set[str] = set()
+    for sentence in _SENTENCE_SPLIT.split(text.lower()):
+        if not _NEGATION.search(sentence):
+            needs.update(match_needs(sentence))
+    demographics = tuple(sorted(set(match_demographics(text)) | _age_groups(text)))
+    return QueryProfile(location=location, needs=tuple(sorted(needs)), demographics=demographics)
+
+
+# Phrases saying how soon help is needed; anything else is "normal"
+URGENCY_PHRASES: Dict[str, List[str]] = {
+    "urgent": ["tonight", "right now", "today", "immediately", "asap", "emergency", "nowhere to sleep",
+               "nowhere to go", "nowhere to stay", "on the street", "kicked out", "locked out", "in danger",
+               "unsafe", "not safe", "haven't eaten", "starving", "suicidal", "overdose"],
+    "planning": ["long-term", "long term", "next month", "next year", "in the future", "eventually",
+                 "plan ahead", "planning ahead", "waitlist", "waiting list", "down the road", "someday"],
+}
+_URGENCY_PATTERNS = {name: _phrase_pattern(phrases) for name, phrases in URGENCY_PHRASES.items()}
+
+
+def classify_urgency(messages: List[Dict[str, str]]) -> str:
+    """
+    How soon the user needs help, judged from their own messages.
+
+    Returns:
+        "urgent" (a bed tonight, nowhere to go), "planning" (next month, long-term) or
+        "normal"; urgent wording wins, and negated sentences ("I'm not in danger") are ignored
+    """
+    found: Set[str] = set()
+    for sentence in _SENTENCE_SPLIT.split(_user_text(messages).lower()):
+        if not _NEGATION.search(sentence):
+            found.update(match_categories(sentence, _URGENCY_PATTERNS))
+    for urgency in ("urgent", "planning"):
+        if urgency in found:
+            return urgency
+    return "normal"
+
+
+def build_query(profile: QueryProfile) -> str:
+    """
+    Writes a search query for a profile, in the style of the LLM-generated ones.
+
+    Example:
+        >>> build_query(QueryProfile("san francisco", ("food", "shelter"), ("lgbtq", "youth")))
+        'Search for emergency shelter and food assistance for LGBTQ youth in San Francisco, California'
+    """
+    # Lead with shelter, the most urgent need, then the rest alphabetically
+    needs = sorted(profile.needs, key=lambda n: (n != "shelter", n))
+    terms = [NEED_QUERY_TERMS[n] for n in needs]
+    query = "Search for " + (" and ".join(terms) if len(terms) <= 2 else ", ".join(terms[:-1]) + " and " + terms[-1])
+
+    groups = [DEMOGRAPHIC_QUERY_TERMS[d] for d in profile.demographics if d != "lgbtq"]
+    if "lgbtq" in profile.demographics:
+        # LGBTQ reads as a qualifier of the first group ("LGBTQ youth")
+        groups = ["LGBTQ " + groups[0]] + groups[1:] if groups else ["LGBTQ people"]
+    if groups:
+        query += " for " + " and ".join(groups)
+
+    if profile.location:
+        query += f" in {describe_location(profile.location)}"
+    return query
+
+
+def describe_location(location: str) -> str:
+    """Writes a normalized location out for people and search engines ("san francisco" -> "San Francisco, California")."""
+    city, state = _GAZETTEER.get(location, (location, None))
+    return f"{city.title()}, {state}" if state else city.title()
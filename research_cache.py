@@ -0,0 +1,152 @@
+"""
+Persistent cache for deep-research reports.
+
+Reports are stored in SQLite keyed by the normalized query profile (see query_profile.py),
+expire after a configurable TTL, and the least recently used entries are evicted once
+the cache is full. Expired reports are kept for a while longer so they can be served
+stale when the deep-research API is down.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+
+class ResearchCache:
+    """
+    SQLite-backed report cache with TTL expiry and LRU eviction.
+
+    Args:
+        path: SQLite database file, or ":memory:" for a process-local cache
+        ttl_seconds: How long a report stays fresh
+        max_entries: Number of reports kept before the least recently used is evicted
+        stale_seconds: How long past its TTL an expired report can still be served by get_stale
+    """
+
+    def __init__(self, path: str = "research_cache.sqlite3", ttl_seconds: float = 43200,
+                 max_entries: int = 1000, stale_seconds: float = 604800):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS research_cache (
+                key TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                report TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_research_cache_accessed ON research_cache (last_accessed);
+            """
+        )
+
+    @classmethod
+    def from_env(cls) -> "ResearchCache":
+        """
+        Builds the cache from environment variables.
+
+        RESEARCH_CACHE_PATH: SQLite file (default: research_cache.sqlite3, ":memory:" to skip disk)
+        RESEARCH_CACHE_TTL_SECONDS: report freshness window (default: 43200)
+        RESEARCH_CACHE_MAX_ENTRIES: reports kept before LRU eviction (default: 1000)
+        RESEARCH_CACHE_STALE_SECONDS: how long expired reports stay available as a fallback (default: 604800)
+        """
+        return cls(
+            path=os.getenv("RESEARCH_CACHE_PATH", "research_cache.sqlite3"),
+            ttl_seconds=float(os.getenv("RESEARCH_CACHE_TTL_SECONDS", "43200")),
+            max_entries=int(os.getenv("RESEARCH_CACHE_MAX_ENTRIES", "1000")),
+            stale_seconds=float(os.getenv("RESEARCH_CACHE_STALE_SECONDS", "604800")),
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached report for key, or None if missing or expired."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT report, created_at FROM research_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None and now - row[1] > self.ttl_seconds + self.stale_seconds:
+                    self._conn.execute("DELETE FROM research_cache WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE research_cache SET last_accessed = ?, hit_count = hit_count + 1 WHERE key = ?",
+                (now, key),
+            )
+            self.hits += 1
+            return row[0]
+
+    def get_stale(self, key: str) -> Optional[str]:
+        """
+        Returns the report for key even if expired, as long as it is within stale_seconds
+        of its TTL. Used as a fallback when fresh research fails; does not count as a hit.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT report, created_at FROM research_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds + self.stale_seconds:
+            return None
+        return row[0]
+
+    def put(self, key: str, query: str, report: str) -> None:
+        """Stores a report, evicting the least recently used entries beyond max_entries."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO research_cache (key, query, report, created_at, last_accessed) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET query = excluded.query, report = excluded.report, "
+                "created_at = excluded.created_at, last_accessed = excluded.last_accessed",
+                (key, query, report, now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM research_cache WHERE key IN ("
+                "SELECT key FROM research_cache ORDER BY last_accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def created_at(self, key: str) -> Optional[float]:
+        """When the report for key was stored, or None if there is none. Does not count as a hit."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at FROM research_cache WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def contains(self, key: str) -> bool:
+        """Whether a fresh report is cached for key. Does not count as a hit or a miss."""
+        created = self.created_at(key)
+        return created is not None and time.time() - created <= self.ttl_seconds
+
+    def popular(self, limit: int) -> List[Tuple[str, str, int]]:
+        """The most requested entries as (key, query, hit_count), most hits first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT key, query, hit_count FROM research_cache WHERE hit_count > 0 "
+                "ORDER BY hit_count DESC, last_accessed DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM research_cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM research_cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM research_cache").fetchone()[0]
@@ -0,0 +1,267 @@
+"""
+Adaptive breadth/depth for deep research.
+
+Callers that do not fix breadth and depth ask a ResearchController which setting to use.
+It learns, per query class (the needs a search asks about, e.g. "food" or "shelter"), how
+long each setting's research runs take and how many distinct resources they find, and
+picks the cheapest setting within `tolerance` of the best result count whose expected
+run time, plus the expected wait for a research slot, meets `target_seconds`. A class
+tries the next costlier setting while more breadth and depth keep finding more resources.
+
+Under load it downgrades on its own: the expected queue wait shrinks the budget, runs
+slower than estimated (a busy deep-research server) inflate every estimate, and while
+the server's circuit is open or the queue alone exceeds the target the cheapest setting
+is used.
+
+    controller = ResearchController.from_env()
+    decision = controller.choose(query_class, wait_seconds=queue_wait)
+    ...
+    controller.observe(query_class, decision.setting, seconds, resources_found)
+
+report() returns the estimates and recent decisions (served on the backend's
+/research/settings); decisions, run times and result counts are also exported on /metrics.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import metrics
+
+DEFAULT_SETTINGS = "1x1,2x1,1x2,2x2,3x2,4x2"
+
+DECISIONS = metrics.counter(
+    "research_setting_decisions_total", "Breadth/depth chosen by the research controller, by reason",
+    ["breadth", "depth", "reason"],
+)
+RUN_SECONDS = metrics.histogram(
+    "research_run_seconds", "Deep-research run time by breadth and depth", ["breadth", "depth"]
+)
+RESOURCES_FOUND = metrics.histogram(
+    "research_resources_found", "Distinct resources in a deep-research report by breadth and depth",
+    ["breadth", "depth"], buckets=(0, 1, 2, 4, 8, 12, 16, 24, 32),
+)
+
+
+@dataclass(frozen=True, order=True)
+class Setting:
+    """A deep-research breadth and depth, written "2x1"."""
+
+    breadth: int
+    depth: int
+
+    @classmethod
+    def parse(cls, text: str) -> "Setting":
+        breadth, depth = text.lower().split("x")
+        return cls(int(breadth), int(depth))
+
+    @property
+    def cost(self) -> int:
+        """Relative amount of research; run time grows with both breadth and depth."""
+        return self.breadth * self.depth
+
+    def within(self, limit: "Setting") -> bool:
+        return self.breadth <= limit.breadth and self.depth <= limit.depth
+
+    def __str__(self) -> str:
+        return f"{self.breadth}x{self.depth}"
+
+
+@dataclass(frozen=True)
+class Estimate:
+    """Expected run time and distinct resources; samples is 0 when extrapolated from other settings."""
+
+    seconds: float
+    resources: Optional[float]
+    samples: int
+
+
+@dataclass(frozen=True)
+class Decision:
+    query_class: str
+    setting: Setting
+    # "default", "best", "explore", "fit", "over_target" or "saturated"
+    reason: str
+    budget_seconds: float
+    wait_seconds: float
+    estimate: Estimate
+    at: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "setting": str(self.setting), "estimate": asdict(self.estimate)}
+
+
+class _Stats:
+    """Exponentially weighted run time and result count of one class at one setting."""
+
+    def __init__(self):
+        self.samples = 0
+        self.seconds = 0.0
+        self.resources = 0.0
+
+    def add(self, seconds: float, resources: int, alpha: float) -> None:
+        weight = 1.0 if self.samples == 0 else alpha
+        self.seconds += weight * (seconds - self.seconds)
+        self.resources += weight * (resources - self.resources)
+        self.samples += 1
+
+
+class ResearchController:
+    """
+    Chooses deep-research breadth and depth from observed latency and result counts.
+
+    Args:
+        settings: Candidate settings (default: RESEARCH_SETTINGS, "1x1,2x1,1x2,2x2,3x2,4x2")
+        target_seconds: Latency objective for a search, queue wait included
+        default: Setting for a class with no observations yet, if it meets the target
+        tolerance: Fraction of the best result count a cheaper setting may give up
+        alpha: Weight of the newest run in the moving averages
+        prior_seconds: Assumed run time per unit of breadth x depth before anything is observed
+        history: Recent decisions kept for report()
+    """
+
+    def __init__(self, settings: Sequence[Setting] = (), target_seconds: float = 120,
+                 default: Setting = Setting(1, 2), tolerance: float = 0.1, alpha: float = 0.3,
+                 prior_seconds: float = 30, history: int = 100):
+        self.settings = sorted(settings or [Setting.parse(s) for s in DEFAULT_SETTINGS.split(",")],
+                               key=lambda s: (s.cost, s.depth))
+        self.target_seconds = target_seconds
+        self.default = default
+        self.tolerance = tolerance
+        self.alpha = alpha
+        self.prior_seconds = prior_seconds
+        # Observed run time relative to the estimate, averaged over recent runs of every class
+        self.slowdown = 1.0
+        self._stats: Dict[Tuple[str, Setting], _Stats] = {}
+        self._decisions: Deque[Decision] = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ResearchController":
+        """
+        Reads RESEARCH_SETTINGS (comma-separated "BREADTHxDEPTH"), RESEARCH_TARGET_SECONDS (default: 120),
+        RESEARCH_DEFAULT_SETTING (default: 1x2), RESEARCH_QUALITY_TOLERANCE (default: 0.1) and
+        RESEARCH_PRIOR_SECONDS (default: 30).
+        """
+        return cls(
+            settings=[Setting.parse(s) for s in os.getenv("RESEARCH_SETTINGS", DEFAULT_SETTINGS).split(",")],
+            target_seconds=float(os.getenv("RESEARCH_TARGET_SECONDS", "120")),
+            default=Setting.parse(os.getenv("RESEARCH_DEFAULT_SETTING", "1x2")),
+            tolerance=float(os.getenv("RESEARCH_QUALITY_TOLERANCE", "0.1")),
+            prior_seconds=float(os.getenv("RESEARCH_PRIOR_SECONDS", "30")),
+        )
+
+    def _seconds_per_unit(self, query_class: Optional[str]) -> Optional[float]:
+        rates = [stats.seconds / setting.cost for (cls, setting), stats in self._stats.items()
+                 if query_class is None or cls == query_class]
+        return sum(rates) / len(rates) if rates else None
+
+    def estimate(self, query_class: str, setting: Setting) -> Estimate:
+        """
+        Run time and result count expected for a class at a setting, before any slowdown.
+
+        Settings a class has not run yet are extrapolated from its other settings (run time
+        per unit of breadth x depth), then from other classes, then from prior_seconds; their
+        result count is unknown (None).
+        """
+        stats = self._stats.get((query_class, setting))
+        if stats is not None:
+            return Estimate(stats.seconds, stats.resources, stats.samples)
+        rate = self._seconds_per_unit(query_class) or self._seconds_per_unit(None) or self.prior_seconds
+        return Estimate(rate * setting.cost, None, 0)
+
+    def mean_seconds(self) -> float:
+        """Typical run time across classes and settings, used to estimate queue waits."""
+        runs = list(self._stats.values())
+        if not runs:
+            return self.prior_seconds * self.default.cost
+        return sum(s.seconds for s in runs) / len(runs)
+
+    def choose(self, query_class: str, wait_seconds: float = 0, saturated: bool = False,
+               limit: Optional[Setting] = None, target_seconds: Optional[float] = None) -> Decision:
+        """
+        Picks the setting for a search of query_class.
+
+        Args:
+            wait_seconds: Expected wait for a research slot under the current load
+            saturated: Whether the deep-research server is refusing work (e.g. its circuit is open)
+            limit: Largest breadth and depth allowed, e.g. a research tier's own setting. It is a
+                candidate too, and the one used for a class nothing is known about yet
+            target_seconds: Latency to fit within (default: the controller's target_seconds)
+        """
+        target_seconds = target_seconds or self.target_seconds
+        with self._lock:
+            candidates = [s for s in self.settings if limit is None or s.within(limit)]
+            if limit is not None and limit not in candidates:
+                candidates = sorted([*candidates, limit], key=lambda s: (s.cost, s.depth))
+            estimates = {s: self.estimate(query_class, s) for s in candidates}
+            slowdown = max(1.0, self.slowdown)
+            budget = target_seconds - wait_seconds
+            fitting = [s for s in candidates if estimates[s].seconds * slowdown <= budget]
+            saturated = saturated or wait_seconds >= target_seconds
+            setting, reason = self._pick(query_class, candidates, fitting, estimates, saturated, limit or self.default)
+            decision = Decision(query_class, setting, reason, budget, wait_seconds, estimates[setting], time.time())
+            self._decisions.append(decision)
+        DECISIONS.inc(breadth=setting.breadth, depth=setting.depth, reason=reason)
+        return decision
+
+    def _pick(self, query_class: str, candidates: List[Setting], fitting: List[Setting],
+              estimates: Dict[Setting, Estimate], saturated: bool, default: Setting) -> Tuple[Setting, str]:
+        cheapest = min(candidates, key=lambda s: (estimates[s].seconds, s.cost))
+        if saturated:
+            return cheapest, "saturated"
+        if not fitting:
+            return cheapest, "over_target"
+        known = [s for s in fitting if estimates[s].samples]
+        if not known:
+            if default in fitting and not any(cls == query_class for cls, _ in self._stats):
+                return default, "default"
+            # Nothing measured within the budget: the most research that still fits
+            return fitting[-1], "fit"
+        most = max(estimates[s].resources for s in known)
+        best = min((s for s in known if estimates[s].resources >= most * (1 - self.tolerance)),
+                   key=lambda s: (estimates[s].seconds, s.cost))
+        # Keep climbing while the costliest setting tried is still the one finding the most
+        tried = max(known, key=lambda s: (s.cost, s.depth))
+        if estimates[tried].resources >= most:
+            untried = [s for s in fitting if not estimates[s].samples and s.cost > tried.cost]
+            if untried:
+                return untried[0], "explore"
+        return best, "best"
+
+    def observe(self, query_class: str, setting: Setting, seconds: float, resources: int) -> None:
+        """Records a finished research run: its run time (queue wait excluded) and distinct resources found."""
+        with self._lock:
+            expected = self.estimate(query_class, setting).seconds
+            if expected > 0:
+                # Bounded, so one run far off an extrapolated estimate does not swing every decision
+                ratio = min(max(seconds / expected, 0.25), 4.0)
+                self.slowdown += self.alpha * (ratio - self.slowdown)
+            self._stats.setdefault((query_class, setting), _Stats()).add(seconds, resources, self.alpha)
+        RUN_SECONDS.observe(seconds, breadth=setting.breadth, depth=setting.depth)
+        RESOURCES_FOUND.observe(resources, breadth=setting.breadth, depth=setting.depth)
+
+    def report(self) -> Dict[str, Any]:
+        """Estimates per class and setting, with resources per minute, and the recent decisions."""
+        with self._lock:
+            classes: Dict[str, List[Dict[str, Any]]] = {}
+            for query_class in sorted({cls for cls, _ in self._stats}):
+                rows = classes[query_class] = []
+                for setting in self.settings:
+                    estimate = self.estimate(query_class, setting)
+                    rows.append({
+                        "setting": str(setting),
+                        **asdict(estimate),
+                        "resources_per_minute": (round(estimate.resources / estimate.seconds * 60, 2)
+                                                 if estimate.resources is not None and estimate.seconds else None),
+                    })
+            return {
+                "target_seconds": self.target_seconds,
+                "slowdown": round(self.slowdown, 3),
+                "settings": [str(s) for s in self.settings],
+                "classes": classes,
+                "decisions": [d.to_dict() for d in reversed(self._decisions)],
+            }
@@ -0,0 +1,389 @@
+"""
+Urgency-aware scheduling of deep-research runs.
+
+Replaces a first-come, first-served semaphore in front of deep research. Queued runs start
+in urgency order: "urgent" (someone needs a bed tonight), then "normal", then "planning"
+(long-term questions). Each class has its own concurrency limit, so planning work never
+holds every slot, and `reserved` slots are only given to urgent work. A queued run counts
+as one class more urgent for every `aging_seconds` it has waited, so planning queries
+still get through a steady stream of urgent ones.
+
+    scheduler = ResearchScheduler.from_env(capacity=2)
+    async with scheduler.limiter("urgent"):
+        report = await call_deep_research_async(query)
+
+A scheduler (or one of its class limiters) can be passed wherever resource_finder takes a
+`limiter`. Queue waits per class are exported on /metrics as research_queue_wait_seconds.
+
+SharedResearchScheduler keeps the slots and the queue in a SQLite file instead, so several
+processes (the backend's uvicorn workers) share one capacity and one urgency order; see
+create_research_scheduler.
+"""
+
+import asyncio
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set, Union
+
+import metrics
+
+# Most urgent first
+URGENCIES = ("urgent", "normal", "planning")
+
+QUEUE_WAIT = metrics.histogram(
+    "research_queue_wait_seconds", "Time deep-research runs waited for a slot, by urgency", ["urgency"]
+)
+
+
+class ClassLimiter:
+    """
+    Async context manager holding one research slot of an urgency class for its block.
+
+    One limiter may hold several slots at once (e.g. a fanned-out search); escalate()
+    moves all of them, and any still queued, to a more urgent class.
+    """
+
+    def __init__(self, scheduler: "ResearchScheduler", urgency: str):
+        if urgency not in URGENCIES:
+            raise ValueError(f"Unknown urgency: {urgency}")
+        self.scheduler = scheduler
+        self.urgency = urgency
+        self.held = 0
+
+    async def __aenter__(self) -> "ClassLimiter":
+        await self.scheduler.acquire(self)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.scheduler.arelease(self)
+
+    def escalate(self, urgency: str) -> None:
+        """Raises this limiter to urgency if that is more urgent than its current class."""
+        if URGENCIES.index(urgency) >= URGENCIES.index(self.urgency):
+            return
+        self.scheduler._escalate(self, urgency)
+
+
+class _Waiter:
+    def __init__(self, limiter: ClassLimiter, seq: int):
+        self.limiter = limiter
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class ResearchScheduler:
+    """
+    Priority queue of deep-research runs sharing `capacity` slots within one event loop.
+
+    Args:
+        capacity: Research runs allowed at once across all classes
+        limits: Most runs at once per class (default: capacity for urgent and normal work,
+            half of it, at least one, for planning)
+        reserved: Slots kept free for urgent work; other classes never take the last ones
+        aging_seconds: Wait after which a queued run is ranked one class more urgent (0 disables)
+    """
+
+    def __init__(self, capacity: int = 2, limits: Optional[Dict[str, int]] = None,
+                 reserved: int = 0, aging_seconds: float = 30):
+        if not 0 <= reserved < capacity:
+            raise ValueError("reserved must leave at least one slot for non-urgent work")
+        self.capacity = capacity
+        self.limits = {"urgent": capacity, "normal": capacity, "planning": max(1, capacity // 2), **(limits or {})}
+        self.reserved = reserved
+        self.aging_seconds = aging_seconds
+        self._running: Dict[str, int] = dict.fromkeys(URGENCIES, 0)
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    @classmethod
+    def from_env(cls, capacity: int = 2, **kwargs) -> "ResearchScheduler":
+        """
+        Builds a scheduler from RESEARCH_LIMIT_URGENT, _NORMAL and _PLANNING (per-class limits),
+        RESEARCH_URGENT_RESERVED (default: a quarter of capacity, at least one when there are two
+        or more slots) and RESEARCH_AGING_SECONDS (default: 30). Other keyword arguments are
+        passed to the constructor.
+        """
+        limits = {u: int(os.environ[f"RESEARCH_LIMIT_{u.upper()}"])
+                  for u in URGENCIES if os.getenv(f"RESEARCH_LIMIT_{u.upper()}")}
+        return cls(
+            capacity=capacity,
+            limits=limits,
+            reserved=int(os.getenv("RESEARCH_URGENT_RESERVED", str(max(1, capacity // 4) if capacity > 1 else 0))),
+            aging_seconds=float(os.getenv("RESEARCH_AGING_SECONDS", "30")),
+            **kwargs,
+        )
+
+    def limiter(self, urgency: str) -> ClassLimiter:
+        """A limiter whose runs are scheduled as urgency ("urgent", "normal" or "planning")."""
+        return ClassLimiter(self, urgency)
+
+    def running(self, urgency: Optional[str] = None) -> int:
+        return self._running[urgency] if urgency else sum(self._running.values())
+
+    def queued(self, urgency: Optional[str] = None) -> int:
+        return sum(1 for w in self._waiters if urgency is None or w.limiter.urgency == urgency)
+
+    async def acquire(self, limiter: ClassLimiter) -> None:
+        """Waits until a slot is free for the limiter's class and takes it."""
+        waiter = _Waiter(limiter, next(self._seq))
+        self._waiters.append(waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.cancelled():
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            else:
+                # Granted just as the caller gave up; hand the slot on
+                self.release(limiter)
+            raise
+
+    def release(self, limiter: ClassLimiter) -> None:
+        limiter.held -= 1
+        self._running[limiter.urgency] -= 1
+        self._dispatch()
+
+    async def arelease(self, limiter: ClassLimiter) -> None:
+        """release() for async callers."""
+        self.release(limiter)
+
+    def _escalate(self, limiter: ClassLimiter, urgency: str) -> None:
+        self._running[limiter.urgency] -= limiter.held
+        self._running[urgency] += limiter.held
+        limiter.urgency = urgency
+        self._dispatch()
+
+    def _rank(self, urgency: str, waited: float) -> int:
+        rank = URGENCIES.index(urgency)
+        if self.aging_seconds > 0:
+            rank -= int(waited / self.aging_seconds)
+        return max(rank, 0)
+
+    def _can_start(self, urgency: str, running: Dict[str, int]) -> bool:
+        free = self.capacity - sum(running.values())
+        if free <= 0 or running[urgency] >= self.limits[urgency]:
+            return False
+        return urgency == "urgent" or free > self.reserved
+
+    def _dispatch(self) -> None:
+        """Starts queued runs, best rank (then longest wait) first, while slots allow."""
+        now = time.monotonic()
+        # Waiters whose caller was cancelled but has not run its cleanup yet
+        self._waiters = [w for w in self._waiters if not w.future.cancelled()]
+        while self._waiters:
+            ordered = sorted(self._waiters,
+                             key=lambda w: (self._rank(w.limiter.urgency, now - w.enqueued_at), w.seq))
+            waiter = next((w for w in ordered if self._can_start(w.limiter.urgency, self._running)), None)
+            if waiter is None:
+                return
+            self._waiters.remove(waiter)
+            limiter = waiter.limiter
+            limiter.held += 1
+            self._running[limiter.urgency] += 1
+            QUEUE_WAIT.observe(now - waiter.enqueued_at, urgency=limiter.urgency)
+            waiter.future.set_result(None)
+
+
+class SharedResearchScheduler(ResearchScheduler):
+    """
+    ResearchScheduler whose slots and queue are kept in a SQLite file.
+
+    Every process using the same file shares `capacity` and the per-class limits, and queued
+    runs start in the same urgency order across processes. A queued run checks the file after
+    poll_seconds, backing off to max_poll_seconds while it stays queued, and right away when a
+    run of this process finishes; rows left behind by a process that exited are dropped.
+    Transactions run in a worker thread, so the event loop never waits on the file's lock.
+    running() and queued() count the runs of all processes.
+
+    Args:
+        path: SQLite file shared by the processes
+        poll_seconds: First wait between checks for a free slot while queued
+        max_poll_seconds: Longest wait between checks
+        (other arguments as for ResearchScheduler)
+    """
+
+    def __init__(self, path: str = "research_slots.sqlite3", capacity: int = 2,
+                 limits: Optional[Dict[str, int]] = None, reserved: int = 0,
+                 aging_seconds: float = 30, poll_seconds: float = 0.1, max_poll_seconds: float = 1.0):
+        super().__init__(capacity, limits, reserved, aging_seconds)
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self.max_poll_seconds = max_poll_seconds
+        # Futures of this process's queued runs, resolved when one of its runs releases a slot
+        self._wakers: Set[asyncio.Future] = set()
+        # Row ids of the runs each limiter of this process has started or queued
+        self._held: Dict[ClassLimiter, List[int]] = {}
+        self._queued: Dict[ClassLimiter, Set[int]] = {}
+        self._lock = threading.Lock()
+        # Autocommit, so _transaction() can take the write lock with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS research_runs (
+                id INTEGER PRIMARY KEY,
+                pid INTEGER NOT NULL,
+                urgency TEXT NOT NULL,
+                enqueued_at REAL NOT NULL,
+                started_at REAL
+            );
+            """
+        )
+        # Left by an earlier process with the same pid
+        self._conn.execute("DELETE FROM research_runs WHERE pid = ?", (os.getpid(),))
+        # Counts for running()/queued() read a WAL snapshot without waiting for writers
+        self._read_lock = threading.Lock()
+        self._read_conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn()
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def _drop_exited(self) -> None:
+        for (pid,) in self._conn.execute("SELECT DISTINCT pid FROM research_runs").fetchall():
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                self._conn.execute("DELETE FROM research_runs WHERE pid = ?", (pid,))
+            except PermissionError:
+                pass  # Alive, owned by another user
+
+    def _try_start(self, row_id: int) -> bool:
+        """Starts the queued run row_id if it is among those the shared queue would start now."""
+        def attempt() -> bool:
+            self._drop_exited()
+            rows = self._conn.execute("SELECT id, urgency, enqueued_at, started_at FROM research_runs").fetchall()
+            running = dict.fromkeys(URGENCIES, 0)
+            for _, urgency, _, started_at in rows:
+                if started_at is not None:
+                    running[urgency] += 1
+            now = time.time()
+            queued = sorted((r for r in rows if r[3] is None),
+                            key=lambda r: (self._rank(r[1], now - r[2]), r[2], r[0]))
+            # Hand out free slots in queue order; runs of other processes start on their next check
+            for queued_id, urgency, _, _ in queued:
+                if not self._can_start(urgency, running):
+                    continue
+                if queued_id == row_id:
+                    self._conn.execute("UPDATE research_runs SET started_at = ? WHERE id = ?", (now, row_id))
+                    return True
+                running[urgency] += 1
+            return False
+
+        return self._transaction(attempt)
+
+    def _delete(self, row_id: int) -> None:
+        self._transaction(lambda: self._conn.execute("DELETE FROM research_runs WHERE id = ?", (row_id,)))
+
+    async def acquire(self, limiter: ClassLimiter) -> None:
+        """Queues a run in the shared file and waits until it may start."""
+        enqueued_at = time.time()
+        row_id = await asyncio.to_thread(self._transaction, lambda: self._conn.execute(
+            "INSERT INTO research_runs (pid, urgency, enqueued_at) VALUES (?, ?, ?)",
+            (os.getpid(), limiter.urgency, enqueued_at),
+        ).lastrowid)
+        queued = self._queued.setdefault(limiter, set())
+        queued.add(row_id)
+        delay = self.poll_seconds
+        try:
+            while not await asyncio.to_thread(self._try_start, row_id):
+                waker = asyncio.get_running_loop().create_future()
+                self._wakers.add(waker)
+                try:
+                    await asyncio.wait_for(waker, delay)
+                    delay = self.poll_seconds
+                except asyncio.TimeoutError:
+                    delay = min(delay * 2, self.max_poll_seconds)
+                finally:
+                    self._wakers.discard(waker)
+        except BaseException:
+            # The thread finishes the delete even if this task is cancelled again meanwhile
+            await asyncio.to_thread(self._delete, row_id)
+            raise
+        finally:
+            queued.discard(row_id)
+        limiter.held += 1
+        self._held.setdefault(limiter, []).append(row_id)
+        QUEUE_WAIT.observe(time.time() - enqueued_at, urgency=limiter.urgency)
+
+    def _forget(self, limiter: ClassLimiter) -> int:
+        limiter.held -= 1
+        row_id = self._held[limiter].pop()
+        if not self._held[limiter]:
+            del self._held[limiter]
+        return row_id
+
+    def release(self, limiter: ClassLimiter) -> None:
+        self._delete(self._forget(limiter))
+
+    async def arelease(self, limiter: ClassLimiter) -> None:
+        await asyncio.to_thread(self._delete, self._forget(limiter))
+        # Queued runs of this process check for the freed slot now rather than at their next poll
+        for waker in self._wakers:
+            if not waker.done():
+                waker.set_result(None)
+
+    def _escalate(self, limiter: ClassLimiter, urgency: str) -> None:
+        limiter.urgency = urgency
+        ids = [*self._held.get(limiter, ()), *self._queued.get(limiter, ())]
+        if not ids:
+            return
+
+        def update() -> None:
+            self._transaction(lambda: self._conn.execute(
+                f"UPDATE research_runs SET urgency = ? WHERE id IN ({', '.join('?' * len(ids))})", (urgency, *ids)
+            ))
+
+        try:
+            asyncio.get_running_loop().run_in_executor(None, update)
+        except RuntimeError:
+            update()  # Not called from the event loop
+
+    def running(self, urgency: Optional[str] = None) -> int:
+        return self._count("started_at IS NOT NULL", urgency)
+
+    def queued(self, urgency: Optional[str] = None) -> int:
+        return self._count("started_at IS NULL", urgency)
+
+    def _count(self, condition: str, urgency: Optional[str]) -> int:
+        with self._read_lock:
+            if urgency is None:
+                return self._read_conn.execute(f"SELECT COUNT(*) FROM research_runs WHERE {condition}").fetchone()[0]
+            return self._read_conn.execute(
+                f"SELECT COUNT(*) FROM research_runs WHERE {condition} AND urgency = ?", (urgency,)
+            ).fetchone()[0]
+
+
+def create_research_scheduler(capacity: int = 2, backend: Optional[str] = None) -> ResearchScheduler:
+    """
+    Builds the research scheduler configured through environment variables.
+
+    RESEARCH_SLOTS: "memory" (default, slots per process) or "sqlite" (slots shared by every
+        process using the file; use it when running several workers)
+    RESEARCH_SLOTS_DB_PATH: SQLite file path (default: research_slots.sqlite3)
+    """
+    backend = (backend or os.getenv("RESEARCH_SLOTS", "memory")).lower()
+    if backend == "sqlite":
+        return SharedResearchScheduler.from_env(
+            capacity, path=os.getenv("RESEARCH_SLOTS_DB_PATH", "research_slots.sqlite3")
+        )
+    if backend == "memory":
+        return ResearchScheduler.from_env(capacity)
+    raise ValueError(f"Unknown RESEARCH_SLOTS backend: {backend}")
+
+
+# What resource_finder accepts as a `limiter`
+Limiter = Union[asyncio.Semaphore, ResearchScheduler, ClassLimiter]
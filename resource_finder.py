@@ -6,34 +6,148 @@ based on conversation history. It uses an intermediate LLM call to optimize the
 then leverages the deep-research tool to find comprehensive, up-to-date resources.
 """
 
+import asyncio
+import concurrent.futures
+import glob
+import hashlib
+import itertools
 import os
 import json
-from typing import List, Dict
-import requests
-from openai import OpenAI
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, List, Dict, Optional, Set, Tuple
 from dotenv import load_dotenv
+import metrics
+from conversation_context import ConversationContext
+from metrics import record_cache, record_usage, timed
+from outbound import DEEP_RESEARCH, OPENAI, async_openai_client, http_session, openai_client
+from query_profile import (
+    NEED_QUERY_TERMS, QueryProfile, build_query, classify_urgency, match_demographics, match_needs, parse_query,
+    profile_conversation,
+)
+from research_cache import ResearchCache
+from research_controller import ResearchController, Setting
+from research_scheduler import URGENCIES, ClassLimiter, Limiter, ResearchScheduler
+from resource_index import (
+    ResourceIndex, ResourceRecord, dedupe_records, learnings_to_markdown, parse_report, parse_serp_results,
+    records_to_markdown,
+)
+
+if TYPE_CHECKING:
+    import httpx
 
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
 # Deep-research API configuration
 DEEP_RESEARCH_API_URL = os.getenv("DEEP_RESEARCH_API_URL", "http://localhost:3051")
+DEEP_RESEARCH_TIMEOUT = 600  # 10 minute timeout for research
+DEEP_RESEARCH_MAX_CONNECTIONS = int(os.getenv("DEEP_RESEARCH_MAX_CONNECTIONS", "20"))
+# "report": the API writes the report with an LLM (/api/generate-report, the slowest research
+# step); "learnings": it returns raw learnings and sources (/api/research), rendered here
+DEEP_RESEARCH_MODE = os.getenv("DEEP_RESEARCH_MODE", "report").lower()
 
+# Pooled async HTTP client for the deep-research API, created on first use
+_http_client: Optional["httpx.AsyncClient"] = None
 
-def extract_search_query_from_conversation(conversation_history: List[Dict[str, str]]) -> str:
+# Cache of deep-research reports keyed by the normalized query
+research_cache = ResearchCache.from_env()
+
+# Concurrent requests for the same normalized query/breadth/depth share one in-flight run
+RESEARCH_COALESCING = os.getenv("RESEARCH_COALESCING", "true").lower() == "true"
+_in_flight: Dict[str, asyncio.Task] = {}
+# Limiter each in-flight run was started with, raised when a more urgent caller joins it
+_in_flight_limiters: Dict[str, Any] = {}
+_in_flight_sync: Dict[str, concurrent.futures.Future] = {}
+_in_flight_lock = threading.Lock()
+COALESCED_CALLS = metrics.counter(
+    "resource_research_coalesced_total", "Deep-research calls that joined an identical in-flight run"
+)
+metrics.gauge("resource_research_in_flight", "Distinct deep-research runs in progress",
+              lambda: len(_in_flight) + len(_in_flight_sync))
+
+# Structured resource records parsed out of research reports
+resource_index = ResourceIndex(os.getenv("RESOURCE_INDEX_PATH", "resource_index.sqlite3"))
+RESOURCE_TOP_K = int(os.getenv("RESOURCE_TOP_K", "8"))
+
+# Pre-fetched SERP snapshots answering common queries without deep research (see serpertest/ingest_snapshots.py)
+SERP_FAST_PATH = os.getenv("SERP_FAST_PATH", "true").lower() == "true"
+SERP_SNAPSHOT_DIR = os.getenv(
+    "SERP_SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "serpertest", "snapshots")
+)
+SERP_MIN_MATCHES = int(os.getenv("SERP_MIN_MATCHES", "3"))
+
+# Searches whose city and needs the resource index already covers with recently verified
+# records are answered from it without research (see ResourceIndex.lookup)
+RESOURCE_DB_FAST_PATH = os.getenv("RESOURCE_DB_FAST_PATH", "true").lower() == "true"
+RESOURCE_DB_MIN_MATCHES = int(os.getenv("RESOURCE_DB_MIN_MATCHES", "3"))
+RESOURCE_DB_MAX_AGE_SECONDS = float(os.getenv("RESOURCE_DB_MAX_AGE_SECONDS", "604800"))
+
+# Searches naming several needs run one narrower research per need, concurrently, so each
+# need gets its own cache entry that other conversations can reuse (see plan_research)
+RESEARCH_FANOUT = os.getenv("RESEARCH_FANOUT", "true").lower() == "true"
+RESEARCH_FANOUT_CONCURRENCY = int(os.getenv("RESEARCH_FANOUT_CONCURRENCY", "3"))
+
+# Query extractions (LLM calls) running at once for a batch of conversations
+BATCH_EXTRACTION_CONCURRENCY = int(os.getenv("BATCH_EXTRACTION_CONCURRENCY", "8"))
+
+# Breadth/depth for searches that leave them unset, learned per query class from the run
+# time and resources found of past research (see research_controller.py, RESEARCH_TARGET_SECONDS)
+research_controller = ResearchController.from_env()
+metrics.gauge("research_slowdown", "Recent deep-research run time relative to the controller's estimates",
+              lambda: research_controller.slowdown)
+
+
+@dataclass(frozen=True)
+class ResearchTier:
     """
-    Analyzes conversation history and generates an optimized search query for resource discovery.
+    One level of progressive research.
 
     Args:
-        conversation_history: List of message dicts with 'role' and 'content' keys
-
-    Returns:
-        Optimized search query string for resource discovery
+        name: Label reported in progress events and results ("quick", "deep")
+        breadth: Number of parallel searches
+        depth: Research depth/iterations
+        budget_seconds: Expected latency; past it an "over_budget" event is emitted and the
+            best results found so far are published
+        deadline_seconds: Hard limit on the research request, which is cancelled when it passes
     """
-    system_prompt = """You are an expert at analyzing conversations with homeless individuals to identify their needs and circumstances.
+
+    name: str
+    breadth: int
+    depth: int
+    budget_seconds: float
+    deadline_seconds: float
+
+    @classmethod
+    def from_env(cls, name: str, breadth: int, depth: int, budget_seconds: float,
+                 deadline_seconds: float) -> "ResearchTier":
+        """Reads RESEARCH_<NAME>_BREADTH/_DEPTH/_BUDGET_SECONDS/_DEADLINE_SECONDS, with the given defaults."""
+        prefix = f"RESEARCH_{name.upper()}_"
+        return cls(
+            name=name,
+            breadth=int(os.getenv(prefix + "BREADTH", str(breadth))),
+            depth=int(os.getenv(prefix + "DEPTH", str(depth))),
+            budget_seconds=float(os.getenv(prefix + "BUDGET_SECONDS", str(budget_seconds))),
+            deadline_seconds=float(os.getenv(prefix + "DEADLINE_SECONDS", str(deadline_seconds))),
+        )
+
+
+# Progressive research: a shallow run answers first (TIMING_ANALYSIS.md: breadth 2 / depth 1
+# takes 30-60s), then a deeper run replaces its results
+QUICK_TIER = ResearchTier.from_env("quick", breadth=2, depth=1, budget_seconds=60, deadline_seconds=120)
+DEEP_TIER = ResearchTier.from_env("deep", breadth=4, depth=2, budget_seconds=300, deadline_seconds=DEEP_RESEARCH_TIMEOUT)
+
+# Receives (stage, details) as a research request progresses, e.g. ("query", {"query": ...})
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
+
+def _notify(on_progress: Optional[ProgressCallback], stage: str, **details: Any) -> None:
+    if on_progress is not None:
+        on_progress(stage, details)
+
+QUERY_EXTRACTION_PROMPT = """You are an expert at analyzing conversations with homeless individuals to identify their needs and circumstances.
 
 Your task is to analyze the conversation history and extract key information to create a focused search query for finding relevant resources.
 
@@ -52,25 +166,147 @@ Format your search query to be specific and actionable. For example:
 
 Return ONLY the search query, nothing else."""
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Conversation history:\n{json.dumps(conversation_history, indent=2)}\n\nGenerate the search query:"}
-            ],
-            temperature=0.3,
-            max_tokens=200
-        )
 
-        search_query = response.choices[0].message.content.strip()
-        return search_query
+# Query extraction sees the most recent messages within a token budget; older ones are
+# folded into a summary that keeps the user's location, needs and groups
+QUERY_WINDOW_MESSAGES = int(os.getenv("QUERY_WINDOW_MESSAGES", "10"))
+query_context = ConversationContext.from_env("QUERY_HISTORY", budget_tokens=1000)
+# Build the query from clear-cut conversations without calling the LLM
+LOCAL_QUERY_EXTRACTION = os.getenv("LOCAL_QUERY_EXTRACTION", "true").lower() == "true"
+QUERY_MEMO_SIZE = int(os.getenv("QUERY_MEMO_SIZE", "1024"))
 
-    except Exception as e:
-        raise Exception(f"Failed to extract search query: {str(e)}")
+# LLM-generated queries keyed by a hash of the message window they were generated from
+_query_memo: "OrderedDict[str, str]" = OrderedDict()
+
+
+def _query_window(conversation_history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    messages = [{"role": m.get("role", ""), "content": m.get("content") or ""} for m in conversation_history]
+    return query_context.compact(messages, max_messages=QUERY_WINDOW_MESSAGES)
+
+
+def _window_key(window: List[Dict[str, str]]) -> str:
+    normalized = [[m["role"], " ".join(m["content"].lower().split())] for m in window]
+    return hashlib.sha256(json.dumps(normalized).encode()).hexdigest()
+
+
+def _local_or_memoized_query(window: List[Dict[str, str]], key: str) -> Optional[str]:
+    """Returns a query without an LLM call when the rules are confident or the window was seen before."""
+    if LOCAL_QUERY_EXTRACTION:
+        profile = profile_conversation(window)
+        if profile is not None:
+            print("Built search query from the conversation without the LLM")
+            record_cache("query", "local")
+            return build_query(profile)
+    memoized = _query_memo.get(key)
+    if memoized is not None:
+        _query_memo.move_to_end(key)
+        print("Using memoized search query")
+    record_cache("query", "hit" if memoized is not None else "miss")
+    return memoized
+
+
+def _memoize_query(key: str, query: str) -> None:
+    _query_memo[key] = query
+    _query_memo.move_to_end(key)
+    while len(_query_memo) > QUERY_MEMO_SIZE:
+        _query_memo.popitem(last=False)
+
+
+def _query_extraction_messages(window: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": QUERY_EXTRACTION_PROMPT},
+        {"role": "user", "content": f"Conversation history:\n{json.dumps(window, separators=(',', ':'), ensure_ascii=False)}\n\nGenerate the search query:"}
+    ]
+
+
+def extract_search_query_from_conversation(conversation_history: List[Dict[str, str]]) -> str:
+    """
+    Analyzes conversation history and generates an optimized search query for resource discovery.
+
+    Only the last QUERY_WINDOW_MESSAGES messages are considered. When the user's messages
+    plainly name one known city and their needs, the query is built locally; otherwise
+    gpt-4o-mini writes it, and the answer is memoized for the same message window.
+
+    Args:
+        conversation_history: List of message dicts with 'role' and 'content' keys
+
+    Returns:
+        Optimized search query string for resource discovery
+    """
+    with timed("query_extraction"):
+        window = _query_window(conversation_history)
+        key = _window_key(window)
+        search_query = _local_or_memoized_query(window, key)
+        if search_query is not None:
+            return search_query
+
+        try:
+            response = OPENAI.call(
+                openai_client().chat.completions.create,
+                model="gpt-4o-mini",
+                messages=_query_extraction_messages(window),
+                temperature=0.3,
+                max_tokens=200
+            )
+
+            record_usage("query_extraction", response.usage)
+            search_query = response.choices[0].message.content.strip()
+            _memoize_query(key, search_query)
+            return search_query
+
+        except Exception as e:
+            raise Exception(f"Failed to extract search query: {str(e)}")
+
+
+async def extract_search_query_from_conversation_async(conversation_history: List[Dict[str, str]]) -> str:
+    """
+    Async variant of extract_search_query_from_conversation for use inside the event loop.
+
+    Args:
+        conversation_history: List of message dicts with 'role' and 'content' keys
+
+    Returns:
+        Optimized search query string for resource discovery
+    """
+    with timed("query_extraction"):
+        window = _query_window(conversation_history)
+        key = _window_key(window)
+        search_query = _local_or_memoized_query(window, key)
+        if search_query is not None:
+            return search_query
+
+        try:
+            response = await OPENAI.acall(
+                async_openai_client().chat.completions.create,
+                model="gpt-4o-mini",
+                messages=_query_extraction_messages(window),
+                temperature=0.3,
+                max_tokens=200
+            )
+
+            record_usage("query_extraction", response.usage)
+            search_query = response.choices[0].message.content.strip()
+            _memoize_query(key, search_query)
+            return search_query
+
+        except Exception as e:
+            raise Exception(f"Failed to extract search query: {str(e)}")
+
+
+def _research_endpoint() -> str:
+    return "/api/research" if DEEP_RESEARCH_MODE == "learnings" else "/api/generate-report"
+
+
+def _report_from_result(query: str, result: Dict[str, Any]) -> str:
+    """The report in a deep-research response: the API's own, or one rendered from its learnings."""
+    if "reportMarkdown" in result:
+        return result["reportMarkdown"] or ""
+    with timed("report_render"):
+        return learnings_to_markdown(result.get("learnings") or [], result.get("visitedUrls") or [], query)
 
 
-def call_deep_research(query: str, breadth: int = 1, depth: int = 2) -> str:
+def call_deep_research(query: str, breadth: int = 1, depth: int = 2,
+                       timeout: float = DEEP_RESEARCH_TIMEOUT) -> str:
     """
     Calls the deep-research API to generate a comprehensive resource report.
 
@@ -78,41 +314,428 @@ def call_deep_research(query: str, breadth: int = 1, depth: int = 2) -> str:
         query: Search query for resource discovery
         breadth: Number of parallel searches (default: 4)
         depth: Research depth/iterations (default: 2)
+        timeout: Seconds to wait for the API (default: 600)
 
     Returns:
-        Markdown formatted report with resources
+        Markdown formatted report with resources (rendered locally in DEEP_RESEARCH_MODE=learnings)
     """
-    try:
-        response = requests.post(
-            f"{DEEP_RESEARCH_API_URL}/api/generate-report",
+    # Only scripts research synchronously; the backend never needs requests
+    import requests
+
+    def post() -> requests.Response:
+        response = http_session().post(
+            f"{DEEP_RESEARCH_API_URL}{_research_endpoint()}",
             json={
                 "query": query,
                 "breadth": breadth,
                 "depth": depth
             },
             headers={"Content-Type": "application/json"},
-            timeout=600  # 10 minute timeout for research
+            timeout=timeout
+        )
+        response.raise_for_status()
+        return response
+
+    with timed("deep_research"):
+        try:
+            result = DEEP_RESEARCH.call(post).json()
+
+            return _report_from_result(query, result)
+
+        except requests.exceptions.ConnectionError:
+            raise Exception(
+                "Could not connect to deep-research API. "
+                "Make sure the server is running: cd deep-research && npm run api"
+            )
+        except requests.exceptions.Timeout:
+            raise Exception("Deep-research request timed out. The query may be too complex.")
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Deep-research API error: {str(e)}")
+
+
+def _get_http_client() -> "httpx.AsyncClient":
+    """Returns the shared keep-alive client for the deep-research API, creating it on first use."""
+    import httpx
+
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            base_url=DEEP_RESEARCH_API_URL,
+            headers={"Content-Type": "application/json"},
+            timeout=DEEP_RESEARCH_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=DEEP_RESEARCH_MAX_CONNECTIONS,
+                max_keepalive_connections=DEEP_RESEARCH_MAX_CONNECTIONS,
+            ),
         )
+    return _http_client
+
+
+async def warm_up(timeout: float = 10) -> Dict[str, str]:
+    """
+    Does the setup a cold process would otherwise do on its first search, concurrently.
+
+    Creates the shared OpenAI client and connects it by listing models (which also checks the
+    API key), connects the pooled deep-research client (any HTTP response will do) and loads
+    the SERP snapshots.
+
+    Returns:
+        Check name -> "ok", or the error it failed with
+    """
+    # The clients are created (and their libraries imported) in threads so the event loop
+    # keeps serving meanwhile
+    async def openai() -> None:
+        client = await asyncio.to_thread(async_openai_client)
+        await client.models.list(timeout=timeout)
 
+    async def deep_research() -> None:
+        client = await asyncio.to_thread(_get_http_client)
+        await client.get("/", timeout=timeout)
+
+    async def serp_snapshots() -> None:
+        if SERP_FAST_PATH:
+            await asyncio.to_thread(serp_index.load)
+
+    checks = {"openai": openai, "deep_research": deep_research, "serp_snapshots": serp_snapshots}
+    with timed("warm_up"):
+        outcomes = await asyncio.gather(*(asyncio.wait_for(check(), timeout) for check in checks.values()),
+                                        return_exceptions=True)
+    return {name: "ok" if outcome is None else f"{type(outcome).__name__}: {outcome}".rstrip(": ")
+            for name, outcome in zip(checks, outcomes)}
+
+
+async def aclose_http_client() -> None:
+    """Closes the pooled deep-research client. Call on application shutdown."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def call_deep_research_async(query: str, breadth: int = 1, depth: int = 2,
+                                   timeout: float = DEEP_RESEARCH_TIMEOUT) -> str:
+    """
+    Async variant of call_deep_research using a pooled httpx client.
+
+    Args:
+        query: Search query for resource discovery
+        breadth: Number of parallel searches (default: 1)
+        depth: Research depth/iterations (default: 2)
+        timeout: Hard deadline in seconds; the request is cancelled once it passes
+
+    Returns:
+        Markdown formatted report with resources (rendered locally in DEEP_RESEARCH_MODE=learnings)
+    """
+    # Imported on first use, like the client itself (see _get_http_client)
+    import httpx
+
+    async def post() -> httpx.Response:
+        response = await _get_http_client().post(
+            _research_endpoint(),
+            json={
+                "query": query,
+                "breadth": breadth,
+                "depth": depth
+            },
+            timeout=timeout,
+        )
         response.raise_for_status()
-        result = response.json()
+        return response
+
+    with timed("deep_research"):
+        try:
+            # Retries happen inside the deadline, never past it
+            response = await asyncio.wait_for(DEEP_RESEARCH.acall(post), timeout)
+            result = response.json()
+
+            return _report_from_result(query, result)
+
+        except httpx.ConnectError:
+            raise Exception(
+                "Could not connect to deep-research API. "
+                "Make sure the server is running: cd deep-research && npm run api"
+            )
+        except (httpx.TimeoutException, asyncio.TimeoutError):
+            raise Exception(f"Deep-research request exceeded its {timeout:g}s deadline and was cancelled.")
+        except httpx.HTTPError as e:
+            raise Exception(f"Deep-research API error: {str(e)}")
+
+
+def research_cache_key(query: str, breadth: int, depth: int) -> str:
+    """
+    Builds the cache key for a research request from the normalized query.
+
+    Queries that name the same location, needs and demographics share a key, e.g.
+    "Search for emergency shelter and food assistance for LGBTQ youth in San Francisco"
+    and "Find food and emergency shelters for LGBTQ youth in SF".
+    """
+    return parse_query(query).cache_key(breadth, depth)
+
+
+def call_deep_research_cached(query: str, breadth: Optional[int] = None, depth: Optional[int] = None,
+                              timeout: float = DEEP_RESEARCH_TIMEOUT) -> str:
+    """
+    call_deep_research with the report cache in front of it.
+
+    Returns a cached report for an equivalent query when one is still fresh; otherwise
+    runs the research and caches non-empty reports. Breadth and depth left unset are
+    chosen by choose_research_setting.
+    """
+    breadth, depth = _resolve_setting(query, breadth, depth)
+    key = research_cache_key(query, breadth, depth)
+    cached = research_cache.get(key)
+    record_cache("research", "hit" if cached is not None else "miss")
+    if cached is not None:
+        print(f"Using cached report for: {key}")
+        return cached
+
+    if not RESEARCH_COALESCING:
+        return _research_and_cache(query, breadth, depth, key, timeout)
+
+    with _in_flight_lock:
+        future = _in_flight_sync.get(key)
+        leader = future is None
+        if leader:
+            future = _in_flight_sync[key] = concurrent.futures.Future()
+    if not leader:
+        print(f"Joining in-flight research for: {key}")
+        COALESCED_CALLS.inc()
+        return future.result()
+
+    try:
+        report = _research_and_cache(query, breadth, depth, key, timeout)
+        future.set_result(report)
+        return report
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight_sync[key]
+
+
+def _serve_stale(key: str, error: Exception, on_progress: Optional[ProgressCallback] = None) -> Optional[str]:
+    """Expired report for key to fall back on when research failed, if one is still kept."""
+    stale = research_cache.get_stale(key)
+    if stale is not None:
+        print(f"Deep research failed ({error}); serving stale report for: {key}")
+        record_cache("research", "stale")
+        _notify(on_progress, "stale", key=key)
+    return stale
+
+
+def _research_and_cache(query: str, breadth: int, depth: int, key: str, timeout: float) -> str:
+    try:
+        start = time.monotonic()
+        report = call_deep_research(query, breadth=breadth, depth=depth, timeout=timeout)
+        _observe_research(query, breadth, depth, time.monotonic() - start, report)
+    except Exception as e:
+        stale = _serve_stale(key, e)
+        if stale is None:
+            raise
+        return stale
+    if report:
+        research_cache.put(key, query, report)
+    return report
+
+
+def limiter_for(limiter: Optional[Limiter], urgency: str) -> Optional[Limiter]:
+    """The limiter to research with at an urgency: a ResearchScheduler's class limiter, else limiter itself."""
+    return limiter.limiter(urgency) if isinstance(limiter, ResearchScheduler) else limiter
+
+
+def expected_research_wait(limiter: Optional[Limiter]) -> float:
+    """
+    Rough seconds a new research run would wait for a slot of limiter.
+
+    Counts the runs holding or queued for a slot ahead of it (for a ResearchScheduler, those of
+    its urgency or more urgent), spread over the slots, at the controller's typical run time.
+    """
+    run_seconds = research_controller.mean_seconds() * max(1.0, research_controller.slowdown)
+    if isinstance(limiter, asyncio.Semaphore):
+        return run_seconds if limiter.locked() else 0.0
+    if isinstance(limiter, ResearchScheduler):
+        limiter = limiter.limiter("normal")
+    if not isinstance(limiter, ClassLimiter):
+        return 0.0
+    scheduler = limiter.scheduler
+    ahead = scheduler.running() + sum(scheduler.queued(u) for u in URGENCIES[:URGENCIES.index(limiter.urgency) + 1])
+    if limiter.urgency != "urgent":
+        # Runs just started have not reached the queue yet
+        ahead = max(ahead, len(_in_flight))
+    return max(0, ahead + 1 - scheduler.capacity) / scheduler.capacity * run_seconds
+
+
+def choose_research_setting(query: str, limiter: Optional[Limiter] = None,
+                            on_progress: Optional[ProgressCallback] = None,
+                            tier: Optional[ResearchTier] = None) -> Setting:
+    """
+    Breadth and depth to research query at, for callers that leave them unset.
+
+    A report cached or in flight at any of the controller's settings is reused, the most
+    thorough first. Otherwise research_controller picks from what past runs of the query's
+    class took and found, the expected wait for a slot of limiter, and whether the
+    deep-research circuit is open. While it is open, a setting with an expired report to fall
+    back on is preferred. For a progressive research tier, the tier's breadth and depth are the
+    most it is researched at, and its budget_seconds the latency to fit within.
+    """
+    limit = Setting(tier.breadth, tier.depth) if tier is not None else None
+    settings = [s for s in research_controller.settings if limit is None or s.within(limit)]
+    if limit is not None and limit not in settings:
+        settings.append(limit)
+    keys = [(s, research_cache_key(query, s.breadth, s.depth))
+            for s in sorted(settings, key=lambda s: (s.cost, s.depth), reverse=True)]
+    for setting, key in keys:
+        # Existence checks only: probing settings nobody asked for must not count as cache hits
+        if key in _in_flight or research_cache.contains(key):
+            return setting
+    saturated = DEEP_RESEARCH.breaker.state != "closed"
+    if saturated:
+        for setting, key in keys:
+            if research_cache.get_stale(key) is not None:
+                return setting
+    decision = research_controller.choose(
+        parse_query(query).query_class,
+        wait_seconds=expected_research_wait(limiter),
+        saturated=saturated,
+        limit=limit,
+        target_seconds=tier.budget_seconds if tier is not None else None,
+    )
+    print(f"Research setting {decision.setting} for {decision.query_class} ({decision.reason})")
+    _notify(on_progress, "setting", breadth=decision.setting.breadth, depth=decision.setting.depth,
+            reason=decision.reason, wait_seconds=round(decision.wait_seconds, 1))
+    return decision.setting
+
+
+def _resolve_setting(query: str, breadth: Optional[int], depth: Optional[int],
+                     limiter: Optional[Limiter] = None,
+                     on_progress: Optional[ProgressCallback] = None) -> Tuple[int, int]:
+    if breadth is not None and depth is not None:
+        return breadth, depth
+    setting = choose_research_setting(query, limiter, on_progress)
+    return (setting.breadth if breadth is None else breadth), (setting.depth if depth is None else depth)
+
+
+def _observe_research(query: str, breadth: int, depth: int, seconds: float, report: str) -> None:
+    resources = len({r.key() for r in parse_report(report)})
+    research_controller.observe(parse_query(query).query_class, Setting(breadth, depth), seconds, resources)
+
+
+async def call_deep_research_cached_async(query: str, breadth: Optional[int] = None, depth: Optional[int] = None,
+                                          on_progress: Optional[ProgressCallback] = None,
+                                          limiter: Optional[Limiter] = None,
+                                          timeout: float = DEEP_RESEARCH_TIMEOUT) -> str:
+    """
+    Async variant of call_deep_research_cached.
 
-        return result.get("reportMarkdown", "")
+    Concurrent calls for the same cache key share one research run (the first caller's
+    limiter and timeout apply); the run continues and caches its report even if every
+    caller stops waiting. Breadth and depth left unset are chosen by choose_research_setting.
+
+    Args:
+        on_progress: Optional callback receiving "setting", "cache_hit", "coalesced", "waiting",
+            "researching" and "stale" stages
+        limiter: Optional semaphore or ResearchScheduler (scheduled as "normal") bounding concurrent
+            deep-research runs; cache hits never wait on it
+        timeout: Hard deadline for the research request itself, not counting the wait for a slot
+    """
+    breadth, depth = _resolve_setting(query, breadth, depth, limiter_for(limiter, "normal"), on_progress)
+    key = research_cache_key(query, breadth, depth)
+    cached = research_cache.get(key)
+    record_cache("research", "hit" if cached is not None else "miss")
+    if cached is not None:
+        print(f"Using cached report for: {key}")
+        _notify(on_progress, "cache_hit", key=key)
+        return cached
+
+    return await _single_flight(query, breadth, depth, key, on_progress, limiter, timeout)
+
+
+async def refresh_research_async(query: str, breadth: int = 1, depth: int = 2,
+                                 limiter: Optional[Limiter] = None,
+                                 timeout: float = DEEP_RESEARCH_TIMEOUT) -> str:
+    """
+    Re-runs research for a query even if its report is still cached, and caches the result.
+
+    Joins an identical run already in flight instead of starting another. Used by the cache warmer.
+    """
+    key = research_cache_key(query, breadth, depth)
+    return await _single_flight(query, breadth, depth, key, None, limiter, timeout, refresh=True)
 
-    except requests.exceptions.ConnectionError:
-        raise Exception(
-            "Could not connect to deep-research API. "
-            "Make sure the server is running: cd deep-research && npm run api"
+
+async def _single_flight(query: str, breadth: int, depth: int, key: str,
+                         on_progress: Optional[ProgressCallback],
+                         limiter: Optional[Limiter], timeout: float,
+                         refresh: bool = False) -> str:
+    limiter = limiter_for(limiter, "normal")
+    if not RESEARCH_COALESCING:
+        return await _research_and_cache_async(query, breadth, depth, key, on_progress, limiter, timeout, refresh)
+
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.create_task(
+            _research_and_cache_async(query, breadth, depth, key, on_progress, limiter, timeout, refresh)
         )
-    except requests.exceptions.Timeout:
-        raise Exception("Deep-research request timed out. The query may be too complex.")
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Deep-research API error: {str(e)}")
+        _in_flight[key] = task
+        _in_flight_limiters[key] = limiter
+        task.add_done_callback(lambda t: _finish_in_flight(key, t))
+    else:
+        print(f"Joining in-flight research for: {key}")
+        COALESCED_CALLS.inc()
+        _notify(on_progress, "coalesced", key=key)
+        # An urgent caller must not wait in the queue behind the planning run it joined
+        running = _in_flight_limiters.get(key)
+        if isinstance(running, ClassLimiter) and isinstance(limiter, ClassLimiter):
+            running.escalate(limiter.urgency)
+    # Shielded so one caller being cancelled (e.g. its job or tier giving up) does not cancel the others
+    return await asyncio.shield(task)
+
+
+def _finish_in_flight(key: str, task: asyncio.Task) -> None:
+    if _in_flight.get(key) is task:
+        del _in_flight[key]
+        _in_flight_limiters.pop(key, None)
+    # Retrieve the exception so a failed run nobody awaited is not reported as unhandled
+    if not task.cancelled():
+        task.exception()
+
+
+async def _research_and_cache_async(query: str, breadth: int, depth: int, key: str,
+                                    on_progress: Optional[ProgressCallback],
+                                    limiter: Optional[Limiter], timeout: float,
+                                    refresh: bool = False) -> str:
+    try:
+        if limiter is None:
+            _notify(on_progress, "researching", breadth=breadth, depth=depth)
+            start = time.monotonic()
+            report = await call_deep_research_async(query, breadth=breadth, depth=depth, timeout=timeout)
+            _observe_research(query, breadth, depth, time.monotonic() - start, report)
+        else:
+            _notify(on_progress, "waiting")
+            async with limiter:
+                # A run that held the slot may have just cached this report
+                cached = None if refresh else research_cache.get(key)
+                if cached is not None:
+                    _notify(on_progress, "cache_hit", key=key)
+                    return cached
+                _notify(on_progress, "researching", breadth=breadth, depth=depth)
+                start = time.monotonic()
+                report = await call_deep_research_async(query, breadth=breadth, depth=depth, timeout=timeout)
+                _observe_research(query, breadth, depth, time.monotonic() - start, report)
+    except Exception as e:
+        # Refreshes (the cache warmer) report the failure rather than re-serving the old report
+        stale = None if refresh else _serve_stale(key, e, on_progress)
+        if stale is None:
+            raise
+        return stale
+    if report:
+        research_cache.put(key, query, report)
+    return report
 
 
 def list_eligible_resources(conversation_history: List[Dict[str, str]],
-                           breadth: int = 1,
-                           depth: int = 2) -> str:
+                           breadth: Optional[int] = None,
+                           depth: Optional[int] = None) -> str:
     """
     Main function to discover and list eligible resources for homeless individuals.
 
@@ -124,8 +747,9 @@ def list_eligible_resources(conversation_history: List[Dict[str, str]],
         conversation_history: List of conversation messages, each with:
             - 'role': 'user' or 'assistant'
             - 'content': message text
-        breadth: Number of parallel search queries to execute (default: 4, recommended: 3-10)
-        depth: Research depth for follow-up exploration (default: 2, recommended: 1-5)
+        breadth: Number of parallel search queries to execute (default: chosen per query by
+            research_controller to meet RESEARCH_TARGET_SECONDS)
+        depth: Research depth for follow-up exploration (default: chosen the same way)
 
     Returns:
         Markdown formatted report containing:
@@ -157,12 +781,533 @@ def list_eligible_resources(conversation_history: List[Dict[str, str]],
     print(f"Generated search query: {search_query}")
 
     # Step 2: Call deep-research to find resources
-    print(f"Searching for resources (breadth={breadth}, depth={depth})...")
-    resource_report = call_deep_research(search_query, breadth=breadth, depth=depth)
+    print(f"Searching for resources (breadth={breadth or 'auto'}, depth={depth or 'auto'})...")
+    resource_report = call_deep_research_cached(search_query, breadth=breadth, depth=depth)
 
     return resource_report
 
 
+async def list_eligible_resources_async(conversation_history: List[Dict[str, str]],
+                                        breadth: Optional[int] = None,
+                                        depth: Optional[int] = None,
+                                        on_progress: Optional[ProgressCallback] = None,
+                                        limiter: Optional[Limiter] = None) -> str:
+    """
+    Async variant of list_eligible_resources.
+
+    Awaits the query-extraction LLM call and the deep-research request instead of blocking,
+    so a multi-minute research run does not stall other requests sharing the event loop.
+    See list_eligible_resources for the arguments and return value, and
+    call_deep_research_cached_async for on_progress and limiter.
+    """
+    # Validate input
+    if not conversation_history or len(conversation_history) == 0:
+        raise ValueError("conversation_history cannot be empty")
+
+    # Step 1: Extract optimized search query from conversation
+    print("Analyzing conversation to identify needs...")
+    _notify(on_progress, "analyzing")
+    search_query = await extract_search_query_from_conversation_async(conversation_history)
+    print(f"Generated search query: {search_query}")
+    _notify(on_progress, "query", query=search_query)
+
+    # Step 2: Call deep-research to find resources
+    print(f"Searching for resources (breadth={breadth or 'auto'}, depth={depth or 'auto'})...")
+    resource_report = await call_deep_research_cached_async(
+        search_query, breadth=breadth, depth=depth, on_progress=on_progress, limiter=limiter
+    )
+
+    return resource_report
+
+
+
+class SerpSnapshotIndex:
+    """
+    In-memory index of the SERP snapshots in a directory, grouped by city.
+
+    Each record is tagged with the need categories and population groups its text mentions;
+    map-pack listings also inherit the categories of the search that found them. Snapshot
+    files are re-read when they change, so a refresh by the ingestion CLI is picked up
+    without a restart.
+
+    Args:
+        directory: Folder of snapshot JSON files
+        min_matches: Records required for every requested need before the index answers
+        reload_interval: Seconds between checks for changed snapshot files
+        resource_index: Optional ResourceIndex fed with the records (and coordinates) on each
+            reload, verified as of the snapshot's fetched_at
+    """
+
+    def __init__(self, directory: str, min_matches: int = 3, reload_interval: float = 30,
+                 resource_index: Optional[ResourceIndex] = None):
+        self.directory = directory
+        self.min_matches = min_matches
+        self.reload_interval = reload_interval
+        self.resource_index = resource_index
+        self._by_city: Dict[str, List[Tuple[ResourceRecord, Set[str], Set[str]]]] = {}
+        self._signature: Optional[Tuple] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        paths = sorted(glob.glob(os.path.join(self.directory, "*.json")))
+        signature = tuple((path, os.path.getmtime(path)) for path in paths)
+        if signature == self._signature:
+            return
+
+        by_city: Dict[str, Dict[str, Tuple[ResourceRecord, Set[str], Set[str]]]] = {}
+        for path in paths:
+            with open(path) as f:
+                snapshot = json.load(f)
+            search = snapshot.get("search_parameters", {}).get("q", "")
+            records = parse_serp_results(snapshot)
+            if self.resource_index is not None:
+                # Verified when the snapshot was fetched, not each time it is loaded, so old
+                # snapshots age out of the resource database's coverage
+                fetched_at = snapshot.get("fetched_at") or os.path.getmtime(path)
+                self.resource_index.add([r for r in records if r.address], needs=match_needs(search),
+                                        demographics=match_demographics(search), verified_at=fetched_at)
+                self.resource_index.add([r for r in records if not r.address], verified_at=fetched_at)
+            for record in records:
+                text = f"{record.name} {record.services} {record.eligibility}"
+                needs = set(match_needs(text))
+                demographics = set(match_demographics(text))
+                # Map-pack listings (the only records with an address) are what Google
+                # considers answers to the search itself
+                if record.address:
+                    needs |= set(match_needs(search))
+                    demographics |= set(match_demographics(search))
+                entries = by_city.setdefault(record.location, {})
+                if record.key() in entries:
+                    known, known_needs, known_demographics = entries[record.key()]
+                    known.merge(record)
+                    known_needs |= needs
+                    known_demographics |= demographics
+                else:
+                    entries[record.key()] = (record, needs, demographics)
+
+        self._by_city = {city: list(entries.values()) for city, entries in by_city.items()}
+        self._signature = signature
+        print(f"Loaded SERP snapshots for {len(self._by_city)} cities from {len(paths)} files")
+
+    def load(self) -> None:
+        """Reads the snapshot files now instead of on the first search."""
+        with self._lock:
+            self._maybe_reload()
+
+    def resolve(self, query: str, k: int = 8) -> Optional[List[ResourceRecord]]:
+        """
+        Answers a search query from the snapshots.
+
+        Only records for the requested groups, or for no group in particular, count: a youth
+        shelter does not answer a search for veterans.
+
+        Returns:
+            Up to k records ranked by how many requested needs and groups they cover, or None
+            when the city has no snapshot or a requested need has fewer than min_matches records
+        """
+        with self._lock:
+            self._maybe_reload()
+        profile = parse_query(query)
+        entries = self._by_city.get(profile.location or "")
+        if not entries or not profile.needs:
+            return None
+
+        wanted_demographics = set(profile.demographics)
+        if wanted_demographics:
+            entries = [(record, needs, demographics) for record, needs, demographics in entries
+                       if not demographics or demographics & wanted_demographics]
+        wanted_needs = set(profile.needs)
+        for need in wanted_needs:
+            if sum(1 for _, needs, _ in entries if need in needs) < self.min_matches:
+                return None
+
+        scored = [
+            (2 * len(needs & wanted_needs) + len(demographics & wanted_demographics), i, record)
+            for i, (record, needs, demographics) in enumerate(entries)
+            if needs & wanted_needs
+        ]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [record for _, _, record in scored[:k]]
+
+
+serp_index = SerpSnapshotIndex(SERP_SNAPSHOT_DIR, min_matches=SERP_MIN_MATCHES, resource_index=resource_index)
+
+
+def index_report(query: str, report: str) -> int:
+    """Parses a research report into resource records and adds them to the index. Returns how many."""
+    # Records are tagged with the needs their own text names (a shelter report also lists meal
+    # programs), and with the groups the search was for
+    return resource_index.add(parse_report(report, source=query), demographics=parse_query(query).demographics)
+
+
+def database_covers(search_query: str, max_age: Optional[float] = None) -> bool:
+    """
+    Whether the resource index can answer a search without research (see RESOURCE_DB_*).
+
+    max_age overrides RESOURCE_DB_MAX_AGE_SECONDS, e.g. to refresh records before they expire.
+    """
+    return RESOURCE_DB_FAST_PATH and resource_index.covers(
+        search_query, RESOURCE_DB_MIN_MATCHES, RESOURCE_DB_MAX_AGE_SECONDS if max_age is None else max_age
+    )
+
+
+async def find_eligible_resources_async(conversation_history: List[Dict[str, str]],
+                                        breadth: Optional[int] = None,
+                                        depth: Optional[int] = None,
+                                        top_k: int = RESOURCE_TOP_K,
+                                        on_progress: Optional[ProgressCallback] = None,
+                                        limiter: Optional[Limiter] = None,
+                                        urgency: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Structured variant of list_eligible_resources_async for chatbot tools.
+
+    Runs the same research, then indexes the resources found in the report and returns the
+    top_k best matches as compact records, so the model reads a few hundred tokens of JSON
+    instead of the whole report. Queries the SERP snapshots or the resource index cover
+    well are answered from them directly, skipping deep research. With a ResearchScheduler
+    as limiter, the research is queued at urgency (default: classify_urgency of the conversation).
+
+    Returns:
+        Dict with:
+        - 'query': the generated search query
+        - 'resources': list of records (name, address, services, eligibility, phone, url)
+        - 'report': the full markdown report, for display
+        - 'source': "serp" or "database" for answers that skipped research, "research" otherwise
+    """
+    if not conversation_history or len(conversation_history) == 0:
+        raise ValueError("conversation_history cannot be empty")
+
+    _notify(on_progress, "analyzing")
+    search_query = await extract_search_query_from_conversation_async(conversation_history)
+    urgency = urgency or classify_urgency(conversation_history)
+    print(f"Generated search query: {search_query}")
+    _notify(on_progress, "query", query=search_query, urgency=urgency)
+
+    answer = _serp_answer(search_query, top_k, on_progress) or _database_answer(search_query, top_k, on_progress)
+    if answer is not None:
+        return answer
+
+    return await _research_resources(search_query, breadth, depth, top_k, on_progress, limiter_for(limiter, urgency))
+
+
+def _serp_answer(search_query: str, top_k: int, on_progress: Optional[ProgressCallback]) -> Optional[Dict[str, Any]]:
+    if not SERP_FAST_PATH:
+        return None
+    records = serp_index.resolve(search_query, k=top_k)
+    record_cache("serp", "hit" if records else "miss")
+    if not records:
+        return None
+    _notify(on_progress, "fast_path", matched=len(records))
+    return {
+        "query": search_query,
+        "resources": [r.to_compact() for r in records],
+        "report": records_to_markdown(records),
+        "source": "serp",
+    }
+
+
+def _database_answer(search_query: str, top_k: int,
+                     on_progress: Optional[ProgressCallback]) -> Optional[Dict[str, Any]]:
+    if not RESOURCE_DB_FAST_PATH:
+        return None
+    with timed("resource_db"):
+        records = resource_index.lookup(
+            search_query, k=top_k, min_matches=RESOURCE_DB_MIN_MATCHES, max_age=RESOURCE_DB_MAX_AGE_SECONDS
+        )
+    record_cache("resource_db", "hit" if records else "miss")
+    if not records:
+        return None
+    _notify(on_progress, "database", matched=len(records))
+    return {
+        "query": search_query,
+        "resources": [r.to_compact() for r in records],
+        "report": records_to_markdown(records),
+        "source": "database",
+    }
+
+
+def plan_research(search_query: str, breadth: Optional[int]) -> Tuple[Dict[str, str], Optional[int]]:
+    """
+    Splits a search naming several needs into one sub-query per need.
+
+    Each sub-query keeps the location and population groups of the original, e.g.
+    "Search for emergency shelter and food assistance for LGBTQ youth in San Francisco" becomes
+    "Search for emergency shelter for LGBTQ youth in San Francisco, California" and
+    "Search for food assistance for LGBTQ youth in San Francisco, California".
+
+    Returns:
+        (need -> sub-query, breadth per sub-query); a single entry keyed "" holding the
+        original query and breadth when there is nothing to split. An unset breadth stays
+        unset, so each sub-query's setting is chosen for its own need.
+    """
+    profile = parse_query(search_query)
+    if not RESEARCH_FANOUT or len(profile.needs) < 2:
+        return {"": search_query}, breadth
+    plan = {
+        need: build_query(QueryProfile(profile.location, (need,), profile.demographics))
+        for need in profile.needs
+    }
+    # Half the breadth per need, whatever the number of needs, so the same need is cached
+    # under the same key for every multi-need search at this breadth
+    return plan, None if breadth is None else max(1, breadth // 2)
+
+
+def research_cached(search_query: str, breadth: int, depth: int) -> bool:
+    """Whether every report a search needs (one per planned sub-query) is already cached."""
+    plan, sub_breadth = plan_research(search_query, breadth)
+    return all(research_cache.contains(research_cache_key(q, sub_breadth, depth)) for q in plan.values())
+
+
+async def _research_resources(search_query: str, breadth: Optional[int], depth: Optional[int], top_k: int,
+                              on_progress: Optional[ProgressCallback],
+                              limiter: Optional[Limiter],
+                              timeout: float = DEEP_RESEARCH_TIMEOUT) -> Dict[str, Any]:
+    plan, sub_breadth = plan_research(search_query, breadth)
+    if len(plan) > 1:
+        return await _research_fanout(search_query, plan, sub_breadth, depth, top_k, on_progress, limiter, timeout)
+
+    report = await call_deep_research_cached_async(
+        search_query, breadth=breadth, depth=depth, on_progress=on_progress, limiter=limiter, timeout=timeout
+    )
+    with timed("resource_index"):
+        indexed = index_report(search_query, report)
+        resources = [r.to_compact() for r in resource_index.search(search_query, k=top_k)]
+    _notify(on_progress, "resources", indexed=indexed, matched=len(resources))
+
+    return {"query": search_query, "resources": resources, "report": report, "source": "research"}
+
+
+async def _research_fanout(search_query: str, plan: Dict[str, str], breadth: Optional[int], depth: Optional[int],
+                           top_k: int,
+                           on_progress: Optional[ProgressCallback],
+                           limiter: Optional[Limiter], timeout: float) -> Dict[str, Any]:
+    """Researches each need's sub-query concurrently and merges the results without duplicates."""
+    print(f"Splitting search into {len(plan)} sub-queries (breadth={breadth or 'auto'}, depth={depth or 'auto'})")
+    _notify(on_progress, "fanout", queries=list(plan.values()), breadth=breadth, depth=depth)
+    workers = asyncio.Semaphore(RESEARCH_FANOUT_CONCURRENCY)
+
+    async def research(sub_query: str) -> str:
+        async with workers:
+            return await call_deep_research_cached_async(
+                sub_query, breadth=breadth, depth=depth, on_progress=on_progress, limiter=limiter, timeout=timeout
+            )
+
+    outcomes = await asyncio.gather(*(research(q) for q in plan.values()), return_exceptions=True)
+    reports = {}
+    for (need, sub_query), outcome in zip(plan.items(), outcomes):
+        if isinstance(outcome, BaseException):
+            print(f"Research for \"{sub_query}\" failed: {str(outcome)}")
+            _notify(on_progress, "subquery_failed", query=sub_query, error=str(outcome))
+        else:
+            reports[need] = (sub_query, outcome)
+    if not reports:
+        raise next(o for o in outcomes if isinstance(o, BaseException))
+
+    with timed("resource_index"):
+        parsed = {need: parse_report(report, source=q) for need, (q, report) in reports.items()}
+        indexed = sum(resource_index.add(records, demographics=parse_query(reports[need][0]).demographics)
+                      for need, records in parsed.items())
+        # Take records from each need in turn so every need is represented in the top_k
+        matches = dedupe_records(resource_index.search(q, k=top_k) for q, _ in reports.values())
+        records = [r for r in itertools.chain(*itertools.zip_longest(*matches)) if r is not None][:top_k]
+        sections = dedupe_records(parsed.values())
+    _notify(on_progress, "resources", indexed=indexed, matched=len(records))
+
+    parts = []
+    for need, section in zip(parsed, sections):
+        if not parsed[need]:
+            body = reports[need][1]  # Nothing parseable; show the report as written
+        else:
+            body = records_to_markdown(section) or "Same resources as listed above."
+        parts.append(f"## {NEED_QUERY_TERMS[need].capitalize()}\n\n{body}")
+    report = "\n\n".join(parts)
+    return {"query": search_query, "resources": [r.to_compact() for r in records], "report": report, "source": "research"}
+
+
+async def _run_tier(search_query: str, tier: ResearchTier, setting: Setting, top_k: int,
+                    on_progress: Optional[ProgressCallback],
+                    limiter: Optional[Limiter],
+                    on_over_budget: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """
+    Runs one research tier at setting, calling on_over_budget if it is still running after its budget.
+    """
+    _notify(on_progress, "tier", tier=tier.name, breadth=setting.breadth, depth=setting.depth)
+    task = asyncio.create_task(_research_resources(
+        search_query, setting.breadth, setting.depth, top_k, on_progress, limiter, timeout=tier.deadline_seconds
+    ))
+    try:
+        done, _ = await asyncio.wait({task}, timeout=tier.budget_seconds)
+        if not done:
+            print(f"{tier.name} research is over its {tier.budget_seconds:g}s budget")
+            _notify(on_progress, "over_budget", tier=tier.name, budget_seconds=tier.budget_seconds)
+            if on_over_budget is not None:
+                on_over_budget()
+        result = await task
+    finally:
+        task.cancel()
+    return {**result, "tier": tier.name}
+
+
+async def find_eligible_resources_progressive(conversation_history: List[Dict[str, str]],
+                                              top_k: int = RESOURCE_TOP_K,
+                                              on_progress: Optional[ProgressCallback] = None,
+                                              limiter: Optional[Limiter] = None,
+                                              quick: ResearchTier = QUICK_TIER,
+                                              deep: ResearchTier = DEEP_TIER,
+                                              urgency: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Tiered variant of find_eligible_resources_async: answers fast, then improves the answer.
+
+    A SERP snapshot, a covered resource-index lookup or a cached deep report is used as-is.
+    Otherwise the quick tier runs first and its results are published as a "result" progress
+    event (details: tier, result), then the deep tier runs and its results are returned. If the quick tier is over budget, records
+    already indexed for the query are published in the meantime. A tier that misses its
+    deadline is cancelled; if the deep tier fails, the quick results are returned instead.
+
+    urgency (default: classify_urgency of the conversation) shapes the plan when limiter is a
+    ResearchScheduler: urgent searches publish indexed records straight away and queue the
+    quick tier as urgent and the deep upgrade as normal; planning searches skip the quick
+    tier and queue the deep tier as planning, taking only spare capacity.
+
+    Returns:
+        Same dict as find_eligible_resources_async, plus 'tier': "serp", "database", "quick",
+        "deep" or "index" for the tier that produced it.
+    """
+    if not conversation_history or len(conversation_history) == 0:
+        raise ValueError("conversation_history cannot be empty")
+
+    _notify(on_progress, "analyzing")
+    search_query = await extract_search_query_from_conversation_async(conversation_history)
+    urgency = urgency or classify_urgency(conversation_history)
+    print(f"Generated search query: {search_query}")
+    _notify(on_progress, "query", query=search_query, urgency=urgency)
+
+    answer = _serp_answer(search_query, top_k, on_progress)
+    if answer is not None:
+        return {**answer, "tier": "serp"}
+    answer = _database_answer(search_query, top_k, on_progress)
+    if answer is not None:
+        return {**answer, "tier": "database"}
+    # The deeper run is an upgrade, not what an urgent answer waits on
+    deep_limiter = limiter_for(limiter, "normal" if urgency == "urgent" else urgency)
+
+    def setting_for(tier: ResearchTier, tier_limiter: Optional[Limiter]) -> Setting:
+        # The tier's breadth and depth are the most it researches at: a slow or busy research
+        # server gets a lighter run instead of one that misses the tier's budget
+        return choose_research_setting(search_query, tier_limiter, on_progress, tier=tier)
+
+    # Nothing to upgrade when the deep report is already cached
+    if research_cached(search_query, deep.breadth, deep.depth):
+        return await _run_tier(search_query, deep, Setting(deep.breadth, deep.depth), top_k, on_progress,
+                               deep_limiter)
+    if urgency == "planning" and isinstance(limiter, ResearchScheduler):
+        return await _run_tier(search_query, deep, setting_for(deep, deep_limiter), top_k, on_progress,
+                               deep_limiter)
+
+    best: Optional[Dict[str, Any]] = None
+
+    def publish(result: Dict[str, Any]) -> None:
+        nonlocal best
+        best = result
+        _notify(on_progress, "result", tier=result["tier"], result=result)
+
+    def publish_indexed() -> None:
+        if best is None:
+            records = resource_index.search(search_query, k=top_k)
+            if records:
+                publish({
+                    "query": search_query,
+                    "resources": [r.to_compact() for r in records],
+                    "report": records_to_markdown(records),
+                    "source": "index",
+                    "tier": "index",
+                })
+
+    if urgency == "urgent":
+        # Whatever is already known beats waiting for research
+        publish_indexed()
+    quick_limiter = limiter_for(limiter, urgency)
+    quick_setting = setting_for(quick, quick_limiter)
+    try:
+        publish(await _run_tier(search_query, quick, quick_setting, top_k, on_progress, quick_limiter,
+                                on_over_budget=publish_indexed))
+    except Exception as e:
+        print(f"Quick research failed: {str(e)}")
+        _notify(on_progress, "tier_failed", tier=quick.name, error=str(e))
+
+    deep_setting = setting_for(deep, deep_limiter)
+    if best is not None and best["tier"] == quick.name and deep_setting.within(quick_setting):
+        # No deeper run fits the deep tier's budget: the quick results are the answer
+        return best
+    try:
+        return await _run_tier(search_query, deep, deep_setting, top_k, on_progress, deep_limiter)
+    except Exception as e:
+        if best is None:
+            raise
+        print(f"Deep research failed, keeping {best['tier']} results: {str(e)}")
+        _notify(on_progress, "tier_failed", tier=deep.name, error=str(e))
+        return best
+
+
+async def find_eligible_resources_batch(conversations: List[List[Dict[str, str]]],
+                                        breadth: Optional[int] = None,
+                                        depth: Optional[int] = None,
+                                        top_k: int = RESOURCE_TOP_K,
+                                        limiter: Optional[Limiter] = None) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Resource searches for many conversations at once, e.g. a caseworker's intake batch.
+
+    Search queries are extracted concurrently (at most BATCH_EXTRACTION_CONCURRENCY LLM calls
+    at a time). Conversations whose queries normalize to the same research key form a group
+    that is answered once, as by find_eligible_resources_async; a group is researched at the
+    urgency of its most urgent member. Groups start as soon as their first query is known.
+
+    Yields:
+        (index of the conversation, its result dict or the exception its search raised), in
+        the order the searches finish; members of a group share one result, whose 'query'
+        is the first member's
+    """
+    extraction_slots = asyncio.Semaphore(BATCH_EXTRACTION_CONCURRENCY)
+    # Research key -> (task answering the group, the limiter it researches with)
+    groups: Dict[str, Tuple[asyncio.Task, Optional[Limiter]]] = {}
+
+    async def answer(search_query: str, group_limiter: Optional[Limiter]) -> Dict[str, Any]:
+        found = _serp_answer(search_query, top_k, None) or _database_answer(search_query, top_k, None)
+        if found is not None:
+            return found
+        return await _research_resources(search_query, breadth, depth, top_k, None, group_limiter)
+
+    async def search(index: int, conversation: List[Dict[str, str]]) -> Tuple[int, Any]:
+        try:
+            if not conversation:
+                raise ValueError("conversation_history cannot be empty")
+            async with extraction_slots:
+                search_query = await extract_search_query_from_conversation_async(conversation)
+            urgency = classify_urgency(conversation)
+            key = research_cache_key(search_query, breadth, depth)
+            if key not in groups:
+                group_limiter = limiter_for(limiter, urgency)
+                groups[key] = (asyncio.create_task(answer(search_query, group_limiter)), group_limiter)
+            task, group_limiter = groups[key]
+            if isinstance(group_limiter, ClassLimiter):
+                group_limiter.escalate(urgency)
+            # Shielded so a member being cancelled does not cancel the group's search
+            return index, await asyncio.shield(task)
+        except Exception as e:
+            print(f"Batch search {index} failed: {str(e)}")
+            return index, e
+
+    print(f"Searching resources for a batch of {len(conversations)} conversations")
+    for finished in asyncio.as_completed([search(i, c) for i, c in enumerate(conversations)]):
+        yield await finished
+    print(f"Batch of {len(conversations)} conversations answered with {len(groups)} searches")
+
+
 if __name__ == "__main__":
     # Example usage for testing
     example_conversation = [
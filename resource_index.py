@@ -0,0 +1,807 @@
+"""
+Structured resource records extracted from deep-research reports.
+
+The deep-research API returns long markdown prose. parse_report pulls individual resources
+(name, address, services, eligibility, phone, URL) out of it (parse_learnings does the same
+for the API's raw learnings, which learnings_to_markdown renders without an LLM), and ResourceIndex stores them
+deduplicated in a SQLite full-text index so the chatbot can be handed only the few records
+that match a query instead of the whole report. The index persists between searches: it
+remembers which records were seen recently for each city and need, so covered searches are
+answered from it without research, and records with coordinates (from SERP map listings)
+can be looked up by distance.
+"""
+
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import metrics
+from query_profile import (
+    DEMOGRAPHICS, NEED_CATEGORIES, NEED_QUERY_TERMS, QueryProfile, match_demographics, match_needs, normalize_location,
+    parse_query,
+)
+
+RECORD_CHANGES = metrics.counter(
+    "resource_index_records_total", "Records written to the resource index by outcome", ["change"]
+)
+
+
+@dataclass
+class ResourceRecord:
+    name: str
+    address: str = ""
+    services: str = ""
+    eligibility: str = ""
+    phone: str = ""
+    url: str = ""
+    source: str = ""  # query or snapshot the record was found through
+    location: str = ""  # normalized city the record was found for
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+    def key(self) -> str:
+        """Deduplication key: the organization name without punctuation or case."""
+        return re.sub(r"[^a-z0-9]+", "", self.name.lower())
+
+    def merge(self, other: "ResourceRecord") -> None:
+        """Fills fields that are empty here from another record for the same resource."""
+        for field_name, value in asdict(other).items():
+            if value and not getattr(self, field_name):
+                setattr(self, field_name, value)
+
+    def to_compact(self) -> Dict[str, str]:
+        """The record as a dict without empty fields or bookkeeping, for LLM prompts."""
+        record = asdict(self)
+        for bookkeeping in ("source", "location", "latitude", "longitude"):
+            record.pop(bookkeeping)
+        return {k: v for k, v in record.items() if v}
+
+
+_HEADING = re.compile(r"^(#{2,6})\s+(.*)$")
+_BOLD_ITEM = re.compile(r"^(?:[-*+]|\d+[.)])\s+\*\*(.+?)\*\*\s*(.*)$")
+_FIELD = re.compile(r"^\s*(?:[-*+]\s+)?\*\*([^*]+?):?\*\*:?\s*(.*)$")
+_LINK = re.compile(r"\[([^\]]*)\]\((https?://[^)\s]+)\)")
+_URL = re.compile(r"https?://[^\s)\]>,]+")
+_PHONE = re.compile(r"(?:\+?1[-.\s]?)?\(?\d{3}\)?[-.\s]\d{3}[-.\s]\d{4}")
+_STREET = (
+    r"\b\d{1,5}\s+(?:[A-Z0-9][\w.'-]*\s+){1,4}"
+    r"(?:St|Street|Ave|Avenue|Blvd|Boulevard|Rd|Road|Way|Dr|Drive|Pl|Place|Ln|Lane|Ct|Court|Ter|Terrace)\b\.?"
+)
+_ADDRESS = re.compile(_STREET + r"(?:,\s*[A-Z][\w\s]+?)?(?:,\s*[A-Z]{2}\s*\d{5})?")
+# In running text, only capitalized words after the street are taken as the city
+_INLINE_ADDRESS = re.compile(_STREET + r"(?:,\s*[A-Z][a-z]+(?:[\s-][A-Z][a-z]+)*)?")
+_NUMBERING = re.compile(r"^(?:[-*+]|\d+[.)])\s*")
+_DESCRIPTION_SPLIT = re.compile(r"^\s*(?:[–—:-]\s*)+")
+
+# Report sections that describe the report itself rather than resources
+_SKIPPED_SECTIONS = re.compile(
+    r"^(introduction|overview|summary|conclusion|sources|references|recommended plan.*|next steps|notes)$",
+    re.IGNORECASE,
+)
+
+_FIELD_ALIASES = {
+    "services": "services", "service": "services", "programs": "services", "offers": "services",
+    "what they offer": "services", "description": "services",
+    "eligibility": "eligibility", "eligible": "eligibility", "who can use it": "eligibility",
+    "requirements": "eligibility", "who": "eligibility",
+    "address": "address", "location": "address",
+    "phone": "phone", "contact": "phone", "hotline": "phone", "call": "phone",
+    "website": "url", "url": "url", "link": "url", "web": "url",
+}
+
+
+def _clean_name(text: str) -> str:
+    text = _LINK.sub(r"\1", text)
+    return _NUMBERING.sub("", text.replace("**", "").strip()).strip(" .:")
+
+
+def _block_to_record(name: str, inline: str, lines: List[str], source: str,
+                     location: str) -> Optional[ResourceRecord]:
+    record = ResourceRecord(name=_clean_name(name), source=source, location=location)
+    if not record.name or len(record.name) > 120:
+        return None
+    # Text following a bold name on the same line, e.g. "**Name** – what they do"
+    inline = _DESCRIPTION_SPLIT.sub("", _LINK.sub(r"\1", inline))
+    description: List[str] = [inline] if inline else []
+
+    for line in lines:
+        match = _FIELD.match(line)
+        field_name = _FIELD_ALIASES.get(match.group(1).strip().lower()) if match else None
+        if field_name is None:
+            description.append(line.strip(" -*+"))
+            continue
+        value = match.group(2).strip()
+        if field_name == "url":
+            links = _LINK.findall(value)
+            urls = _URL.findall(value)
+            value = links[0][1] if links else (urls[0] if urls else "")
+        elif field_name == "phone":
+            phone = _PHONE.search(value)
+            value = phone.group(0) if phone else value
+        if value and not getattr(record, field_name):
+            setattr(record, field_name, _LINK.sub(r"\1", value))
+
+    # Fall back to contact details mentioned anywhere in the block
+    text = " ".join([name, inline] + lines)
+    if not record.url:
+        links = _LINK.findall(text)
+        urls = _URL.findall(text)
+        record.url = links[0][1] if links else (urls[0].rstrip(".") if urls else "")
+    if not record.phone:
+        phone = _PHONE.search(text)
+        record.phone = phone.group(0) if phone else ""
+    if not record.address:
+        address = _ADDRESS.search(text)
+        record.address = address.group(0).strip() if address else ""
+    if not record.services:
+        record.services = " ".join(description).strip()[:300]
+
+    # A heading without any contact or service detail is a section title, not a resource
+    if not (record.url or record.phone or record.address or record.eligibility):
+        return None
+    return record
+
+
+def parse_report(markdown: str, source: str = "", location: str = "") -> List[ResourceRecord]:
+    """
+    Extracts resource records from a deep-research markdown report.
+
+    Resources are recognized as headings or bold list items followed by details such as
+    "**Address:** ..." or "**Phone:** ...". Records with the same name are merged.
+
+    Args:
+        markdown: Report text
+        source: Query the report was generated for
+        location: Normalized city the report covers (defaults to the one in source)
+
+    Returns:
+        Deduplicated records in the order they first appear
+    """
+    if not location and source:
+        location = parse_query(source).location or ""
+
+    blocks: List[tuple] = []
+    current: Optional[List] = None
+    skipping = False
+    for raw in markdown.splitlines():
+        line = raw.rstrip()
+        heading = _HEADING.match(line)
+        if heading:
+            title = heading.group(2).strip()
+            skipping = bool(_SKIPPED_SECTIONS.match(_clean_name(title)))
+            current = None if skipping else [title, "", []]
+            if current:
+                blocks.append(current)
+            continue
+        if skipping or not line.strip():
+            continue
+        item = _BOLD_ITEM.match(line.lstrip()) if not raw.startswith((" ", "\t")) else None
+        if item and not item.group(1).rstrip().endswith(":") and not item.group(2).startswith(":"):
+            current = [item.group(1), item.group(2), []]
+            blocks.append(current)
+        elif current is not None:
+            current[2].append(line)
+
+    records: Dict[str, ResourceRecord] = {}
+    for name, inline, lines in blocks:
+        record = _block_to_record(name, inline, lines, source, location)
+        if record is None:
+            continue
+        existing = records.get(record.key()) or next(
+            (r for r in records.values()
+             if record.url and record.address and r.url == record.url and r.address == record.address),
+            None,
+        )
+        if existing:
+            existing.merge(record)
+        else:
+            records[record.key()] = record
+    return list(records.values())
+
+
+# A learning that opens with an organization's name: "Name: ...", "Name – ..." or "Name offers ..."
+_LEARNING_NAME = re.compile(
+    r"^(?P<name>[^:;–—]{2,100}?)(?:\s*[:–—]\s+|\s+-\s+|\s+(?=(?:runs|offers|provides|serves|operates|has|helps)\b))"
+)
+_NAME_WORD = re.compile(r"^(?:[A-Z0-9(][\w.'()&/+-]*|of|for|and|the|at|in|de|la|&)$")
+_ELIGIBILITY = re.compile(
+    r"\b(?:ages?\s+\d{1,2}\s*[-–]\s*\d{1,2}|\d{1,2}\s+and\s+under|open to [^,;.]+|low-income [^,;.]+)",
+    re.IGNORECASE,
+)
+_DANGLING = re.compile(r"[\s;,]*(?:call|phone|at|is)?[\s;,.]*$", re.IGNORECASE)
+
+
+def _domain_stem(url: str) -> str:
+    host = re.sub(r"^https?://(?:www\.)?", "", url).split("/")[0]
+    return re.sub(r"[^a-z0-9]+", "", host.rsplit(".", 1)[0].lower())
+
+
+def _learning_to_record(learning: str, urls: List[str], source: str, location: str) -> Optional[ResourceRecord]:
+    match = _LEARNING_NAME.match(learning.strip())
+    if not match or not all(_NAME_WORD.match(w) for w in match.group("name").split()):
+        return None
+    record = ResourceRecord(name=match.group("name").strip(), source=source, location=location)
+    rest = learning.strip()[match.end():]
+    phone = _PHONE.search(learning)
+    address = _INLINE_ADDRESS.search(learning)
+    eligibility = _ELIGIBILITY.search(rest)
+    links = _URL.findall(learning)
+    record.phone = phone.group(0) if phone else ""
+    record.address = address.group(0).strip() if address else ""
+    record.eligibility = eligibility.group(0) if eligibility else ""
+    services = _DANGLING.sub("", _PHONE.sub("", rest))
+    record.services = (services[:1].upper() + services[1:])[:300]
+    if links:
+        record.url = links[0].rstrip(".")
+    else:
+        # A visited page on a site named like the organization, e.g. glide.org for "GLIDE Daily Free Meals"
+        first_word = re.sub(r"[^a-z0-9]+", "", record.name.split()[0].lower())
+        record.url = next((
+            url for url in urls
+            if len(_domain_stem(url)) >= 4 and (_domain_stem(url) in record.key()
+                                                or (len(first_word) >= 5 and _domain_stem(url).startswith(first_word)))
+        ), "")
+    # Same bar as parse_report: a resource someone can reach or check eligibility for
+    if not (record.url or record.phone or record.address or record.eligibility):
+        return None
+    return record
+
+
+def parse_learnings(learnings: Iterable[str], urls: Iterable[str] = (), source: str = "",
+                    location: str = "") -> Tuple[List[ResourceRecord], List[str]]:
+    """
+    Extracts resource records from the deep-research API's raw learnings.
+
+    A learning becomes a record when it opens with an organization's name and gives a way
+    to reach it; its website is an URL in the text or a visited page on a matching domain.
+
+    Args:
+        learnings: Learning sentences, as returned by the API's /api/research
+        urls: Pages the research visited
+        source: Query the learnings were researched for
+        location: Normalized city they cover (defaults to the one in source)
+
+    Returns:
+        (records merged by name, in order, learnings that did not describe a resource)
+    """
+    if not location and source:
+        location = parse_query(source).location or ""
+    urls = list(urls)
+    records: Dict[str, ResourceRecord] = {}
+    notes = []
+    for learning in learnings:
+        record = _learning_to_record(learning, urls, source, location)
+        if record is None:
+            notes.append(learning.strip())
+        elif record.key() in records:
+            records[record.key()].merge(record)
+        else:
+            records[record.key()] = record
+    return list(records.values()), notes
+
+
+def learnings_to_markdown(learnings: Iterable[str], urls: Iterable[str], query: str) -> str:
+    """
+    Renders raw learnings as a resource report, in place of the API's LLM-written one.
+
+    Records are grouped under one section per need (the query's needs first, shelter
+    leading) and ranked within it by how many of the query's needs and population groups
+    they mention. Other learnings follow as notes, then the visited sources. The result
+    parses back into the same records with parse_report.
+    """
+    urls = list(urls)
+    records, notes = parse_learnings(learnings, urls, source=query)
+    if not records and not notes:
+        return ""
+    profile = parse_query(query)
+    wanted_needs = sorted(profile.needs, key=lambda n: (n != "shelter", n))
+
+    def text(record: ResourceRecord) -> str:
+        return f"{record.name} {record.services} {record.eligibility}"
+
+    def score(record: ResourceRecord) -> int:
+        return (2 * len(set(match_needs(text(record))) & set(profile.needs))
+                + len(set(match_demographics(text(record))) & set(profile.demographics)))
+
+    sections: Dict[str, List[ResourceRecord]] = {}
+    for record in sorted(records, key=score, reverse=True):
+        needs = match_needs(text(record))
+        need = next((n for n in wanted_needs if n in needs), needs[0] if needs else "")
+        sections.setdefault(need, []).append(record)
+    order = wanted_needs + sorted(n for n in sections if n and n not in wanted_needs) + [""]
+
+    title = re.sub(r"^(?:search for|find|locate)\s+", "", query.strip(), flags=re.IGNORECASE)
+    parts = [f"# {title[:1].upper()}{title[1:]}"]
+    for need in order:
+        if sections.get(need):
+            heading = NEED_QUERY_TERMS[need].capitalize() if need else "Other resources"
+            parts.append(f"## {heading}\n\n{records_to_markdown(sections[need])}")
+    if notes:
+        parts.append("## Notes\n\n" + "\n".join(f"- {note}" for note in notes))
+    if urls:
+        parts.append("## Sources\n\n" + "\n".join(f"- {url}" for url in urls))
+    return "\n\n".join(parts)
+
+
+def _organic_name(result: Dict) -> str:
+    source = result.get("source", "")
+    # Prefer the site name unless it is just a domain, then fall back to the page title
+    if source and "." not in source:
+        return source
+    return re.split(r"\s+[|–—-]\s+", result.get("title", ""), maxsplit=1)[0].strip()
+
+
+def parse_serp_results(results: Dict) -> List[ResourceRecord]:
+    """
+    Converts a SerpAPI Google result (as saved by serpertest/) into resource records.
+
+    Uses the map pack ("local_results.places") and the organic results. Records with the
+    same name are merged, so a shelter listed in both keeps its address and website.
+    """
+    params = results.get("search_parameters", {})
+    query = params.get("q", "")
+    requested = params.get("location_requested", "")
+    location = normalize_location(requested) if requested else ""
+    city = requested.split(",")[0].strip()
+    source = f"serp:{query}"
+
+    found: List[ResourceRecord] = []
+    for place in results.get("local_results", {}).get("places", []):
+        address = place.get("address", "")
+        gps = place.get("gps_coordinates") or {}
+        found.append(ResourceRecord(
+            name=place.get("title", ""),
+            address=f"{address}, {city}" if address and city and city not in address else address,
+            services=" - ".join(x for x in [place.get("type", ""), place.get("description", "").strip('"')] if x),
+            phone=place.get("phone", ""),
+            url=place.get("links", {}).get("website", ""),
+            source=source,
+            location=location,
+            latitude=gps.get("latitude"),
+            longitude=gps.get("longitude"),
+        ))
+    for result in results.get("organic_results", []):
+        snippet = result.get("snippet", "")
+        phone = _PHONE.search(snippet)
+        found.append(ResourceRecord(
+            name=_organic_name(result),
+            services=snippet,
+            phone=phone.group(0) if phone else "",
+            url=result.get("link", ""),
+            source=source,
+            location=location,
+        ))
+
+    records: Dict[str, ResourceRecord] = {}
+    for record in found:
+        if not record.name:
+            continue
+        if record.key() in records:
+            records[record.key()].merge(record)
+        else:
+            records[record.key()] = record
+    return list(records.values())
+
+
+def records_to_markdown(records: Iterable[ResourceRecord]) -> str:
+    """Renders records as a short markdown list for display to the user."""
+    lines = []
+    for record in records:
+        lines.append(f"### {record.name}")
+        for label, value in [("Services", record.services), ("Eligibility", record.eligibility),
+                             ("Address", record.address), ("Phone", record.phone), ("Website", record.url)]:
+            if value:
+                lines.append(f"- **{label}:** {value}")
+        lines.append("")
+    return "\n".join(lines).strip()
+
+
+def _identities(record: ResourceRecord) -> List[str]:
+    """Name, website and address keys under which a record counts as the same resource."""
+    keys = [f"name:{record.key()}"] if record.key() else []
+    if record.url:
+        url = re.sub(r"^https?://(www\.)?", "", record.url.lower()).rstrip("/")
+        keys.append(f"url:{url}")
+    if record.address:
+        keys.append("address:" + re.sub(r"[^a-z0-9]+", "", record.address.lower()))
+    return keys
+
+
+def dedupe_records(groups: Iterable[Iterable[ResourceRecord]]) -> List[List[ResourceRecord]]:
+    """
+    Removes resources already listed in an earlier group (or earlier in the same group).
+
+    Records match on name, website or address; a dropped duplicate fills empty fields of the
+    record that was kept. Returns the groups in order with only first occurrences left.
+    """
+    seen: Dict[str, ResourceRecord] = {}
+    deduped = []
+    for group in groups:
+        kept = []
+        for record in group:
+            identities = _identities(record)
+            known = next((seen[i] for i in identities if i in seen), None)
+            if known is not None:
+                known.merge(record)
+                continue
+            for identity in identities:
+                seen[identity] = record
+            kept.append(record)
+        deduped.append(kept)
+    return deduped
+
+
+def records_to_json(records: Iterable[ResourceRecord]) -> str:
+    """Compact JSON for the records, suitable for a tool message."""
+    return json.dumps([r.to_compact() for r in records], separators=(",", ":"), ensure_ascii=False)
+
+
+def _search_terms(profile: QueryProfile) -> List[str]:
+    terms = set(profile.terms)
+    for need in profile.needs:
+        terms.update(NEED_CATEGORIES[need])
+    for group in profile.demographics:
+        terms.update(DEMOGRAPHICS[group])
+    words = set()
+    for term in terms:
+        words.update(re.findall(r"[a-z0-9]+", term.lower()))
+    return sorted(w for w in words if len(w) > 2)
+
+
+def _content_hash(record: ResourceRecord) -> str:
+    """Digest of what a record says about a resource, to tell changed records from re-found ones."""
+    content = asdict(record)
+    content.pop("source")
+    return hashlib.sha1(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+def _tags(record: ResourceRecord, needs: Sequence[str] = (), demographics: Sequence[str] = ()) -> List[str]:
+    text = f"{record.name} {record.services} {record.eligibility}"
+    return ([f"need:{n}" for n in set(match_needs(text)) | set(needs)]
+            + [f"group:{d}" for d in set(match_demographics(text)) | set(demographics)])
+
+
+def _serves_groups(demographics: Sequence[str], general: bool = True) -> Tuple[str, List[str]]:
+    """
+    SQL condition on resources r (and its parameters): r serves one of the groups, or with general,
+    no group in particular.
+    """
+    if not demographics:
+        return "1 = 1", []
+    tagged = (f"EXISTS (SELECT 1 FROM resource_tags g WHERE g.resource_id = r.id "
+              f"AND g.tag IN ({', '.join('?' * len(demographics))}))")
+    if general:
+        tagged = ("(NOT EXISTS (SELECT 1 FROM resource_tags g WHERE g.resource_id = r.id AND g.tag LIKE 'group:%') "
+                  f"OR {tagged})")
+    return tagged, [f"group:{d}" for d in demographics]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points, in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * 6371.0088 * math.asin(math.sqrt(a))
+
+
+class ResourceIndex:
+    """
+    SQLite database of deduplicated resource records with full-text and spatial search.
+
+    Each record carries need and population-group tags (from its text, plus the needs of
+    the search that found it when that search was about one need) and a hash of its
+    content. Adding a record that is already stored only marks it as verified when its
+    content is unchanged; changed records are rewritten. A search is "covered" once enough
+    records for each of its needs in its city, serving its population groups or no group in
+    particular, were verified recently, and lookup() then answers it without new research. Records with GPS coordinates are kept in an R*Tree for
+    nearest() lookups.
+
+    Args:
+        path: SQLite database file, or ":memory:" for a process-local index
+    """
+
+    _COLUMNS = ("name", "address", "services", "eligibility", "phone", "url", "source", "location",
+                "latitude", "longitude")
+    # Columns added after the first release, created on older database files
+    _MIGRATIONS = {
+        "latitude": "REAL",
+        "longitude": "REAL",
+        "content_hash": "TEXT NOT NULL DEFAULT ''",
+        "verified_at": "REAL NOT NULL DEFAULT 0",
+    }
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS resources (
+                id INTEGER PRIMARY KEY,
+                key TEXT NOT NULL,
+                location TEXT NOT NULL,
+                name TEXT NOT NULL,
+                address TEXT NOT NULL,
+                services TEXT NOT NULL,
+                eligibility TEXT NOT NULL,
+                phone TEXT NOT NULL,
+                url TEXT NOT NULL,
+                source TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                UNIQUE (key, location)
+            );
+            CREATE TABLE IF NOT EXISTS resource_tags (
+                resource_id INTEGER NOT NULL,
+                tag TEXT NOT NULL,
+                PRIMARY KEY (resource_id, tag)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_resource_tags_tag ON resource_tags (tag, resource_id);
+            """
+        )
+        with self._conn:
+            # Workers starting together on a new file would otherwise race to add the same columns
+            self._conn.execute("BEGIN IMMEDIATE")
+            existing = {row[1] for row in self._conn.execute("PRAGMA table_info(resources)")}
+            for column, definition in self._MIGRATIONS.items():
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE resources ADD COLUMN {column} {definition}")
+            if "verified_at" not in existing:
+                self._conn.execute("UPDATE resources SET verified_at = updated_at")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_resources_location ON resources (location, verified_at)"
+            )
+        try:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS resources_fts USING fts5("
+                "name, services, eligibility, content='resources', content_rowid='id')"
+            )
+            self.full_text = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: fall back to scoring term matches in Python
+            self.full_text = False
+        try:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS resources_geo USING rtree("
+                "id, min_lat, max_lat, min_lon, max_lon)"
+            )
+            self.spatial = True
+        except sqlite3.OperationalError:
+            # SQLite built without R*Tree: nearest() scans the coordinates instead
+            self.spatial = False
+
+    def add(self, records: Iterable[ResourceRecord], needs: Sequence[str] = (),
+            demographics: Sequence[str] = (), verified_at: Optional[float] = None) -> int:
+        """
+        Inserts or updates records, merging with stored ones of the same name and city.
+
+        Args:
+            records: Records to store
+            needs: Need categories every record serves, e.g. those of a search whose results
+                are listings for it; leave empty when records only mention the search's need
+            demographics: Population groups every record serves
+            verified_at: When the records were fetched (default: now); a stored record's
+                verification time never moves back
+
+        Returns:
+            The number of records added, changed or re-verified
+        """
+        count = 0
+        now = time.time() if verified_at is None else verified_at
+        with self._lock, self._conn:
+            # Take the write lock before reading, so another process sharing the file cannot
+            # insert or replace the same record between our read and our write
+            self._conn.execute("BEGIN IMMEDIATE")
+            for record in records:
+                row = self._conn.execute(
+                    f"SELECT id, content_hash, {', '.join(self._COLUMNS)} FROM resources "
+                    f"WHERE key = ? AND location = ?",
+                    (record.key(), record.location),
+                ).fetchone()
+                if row is None:
+                    resource_id = self._insert(record, now)
+                    change = "new"
+                else:
+                    resource_id, stored_hash = row[0], row[1]
+                    stored = ResourceRecord(**dict(zip(self._COLUMNS, row[2:])))
+                    record = ResourceRecord(**asdict(record))
+                    record.merge(stored)
+                    if _content_hash(record) == stored_hash:
+                        self._conn.execute(
+                            "UPDATE resources SET verified_at = MAX(verified_at, ?) WHERE id = ?", (now, resource_id)
+                        )
+                        change = "unchanged"
+                    else:
+                        self._update(resource_id, record, now)
+                        change = "changed"
+                RECORD_CHANGES.inc(change=change)
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO resource_tags (resource_id, tag) VALUES (?, ?)",
+                    [(resource_id, tag) for tag in _tags(record, needs, demographics)],
+                )
+                count += 1
+        return count
+
+    def _insert(self, record: ResourceRecord, now: float) -> int:
+        values = asdict(record)
+        cursor = self._conn.execute(
+            f"INSERT INTO resources (key, updated_at, verified_at, content_hash, {', '.join(self._COLUMNS)}) "
+            f"VALUES (?, ?, ?, ?, {', '.join('?' for _ in self._COLUMNS)})",
+            (record.key(), now, now, _content_hash(record), *(values[c] for c in self._COLUMNS)),
+        )
+        self._index(cursor.lastrowid, record)
+        return cursor.lastrowid
+
+    def _update(self, resource_id: int, record: ResourceRecord, now: float) -> None:
+        self._unindex(resource_id)
+        values = asdict(record)
+        self._conn.execute(
+            f"UPDATE resources SET updated_at = ?, verified_at = MAX(verified_at, ?), content_hash = ?, "
+            f"{', '.join(f'{c} = ?' for c in self._COLUMNS)} WHERE id = ?",
+            (now, now, _content_hash(record), *(values[c] for c in self._COLUMNS), resource_id),
+        )
+        self._index(resource_id, record)
+
+    def _index(self, resource_id: int, record: ResourceRecord) -> None:
+        if self.full_text:
+            self._conn.execute(
+                "INSERT INTO resources_fts (rowid, name, services, eligibility) VALUES (?, ?, ?, ?)",
+                (resource_id, record.name, record.services, record.eligibility),
+            )
+        if self.spatial and record.latitude is not None and record.longitude is not None:
+            self._conn.execute(
+                "INSERT INTO resources_geo (id, min_lat, max_lat, min_lon, max_lon) VALUES (?, ?, ?, ?, ?)",
+                (resource_id, record.latitude, record.latitude, record.longitude, record.longitude),
+            )
+
+    def _unindex(self, resource_id: int) -> None:
+        if self.full_text:
+            row = self._conn.execute(
+                "SELECT name, services, eligibility FROM resources WHERE id = ?", (resource_id,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT INTO resources_fts (resources_fts, rowid, name, services, eligibility) "
+                "VALUES ('delete', ?, ?, ?, ?)",
+                (resource_id, *row),
+            )
+        if self.spatial:
+            self._conn.execute("DELETE FROM resources_geo WHERE id = ?", (resource_id,))
+
+    def search(self, query: str, k: int = 8, location: Optional[str] = None) -> List[ResourceRecord]:
+        """
+        Returns up to k records matching a search query, best matches first.
+
+        Args:
+            query: Search query, e.g. the one generated from the conversation
+            k: Number of records to return
+            location: Normalized city to restrict to (defaults to the one named in the query);
+                without one, only records with no city match, never another city's
+        """
+        profile = parse_query(query)
+        location = location if location is not None else profile.location
+        terms = _search_terms(profile)
+        columns = ", ".join(f"r.{c}" for c in self._COLUMNS)
+        where, params = "r.location = ?", [location or ""]
+
+        with self._lock:
+            if self.full_text and terms:
+                rows = self._conn.execute(
+                    f"SELECT {columns} FROM resources_fts f JOIN resources r ON r.id = f.rowid "
+                    f"WHERE resources_fts MATCH ? AND {where} ORDER BY bm25(resources_fts) LIMIT ?",
+                    [" OR ".join(f'"{t}"*' for t in terms), *params, k],
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    f"SELECT {columns} FROM resources r WHERE {where}", params
+                ).fetchall()
+                text = lambda row: " ".join(row[:4]).lower()
+                rows = sorted(rows, key=lambda row: -sum(t in text(row) for t in terms))[:k]
+        return [ResourceRecord(**dict(zip(self._COLUMNS, row))) for row in rows]
+
+    def coverage(self, location: str, max_age: float, demographics: Sequence[str] = ()) -> Dict[str, int]:
+        """
+        Records per need in a city verified within the last max_age seconds.
+
+        With demographics, only records tagged with one of those groups count: a general listing
+        says nothing about whether a city has anything for them.
+        """
+        serves, group_params = _serves_groups(demographics, general=False)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT t.tag, COUNT(*) FROM resources r JOIN resource_tags t ON t.resource_id = r.id "
+                f"WHERE r.location = ? AND r.verified_at >= ? AND t.tag LIKE 'need:%' AND {serves} GROUP BY t.tag",
+                (location, time.time() - max_age, *group_params),
+            ).fetchall()
+        return {tag[len("need:"):]: count for tag, count in rows}
+
+    def covers(self, query: str, min_matches: int = 3, max_age: float = 604800) -> bool:
+        """
+        Whether every need of a query has min_matches recently verified records in its city
+        that serve the query's population groups.
+        """
+        profile = parse_query(query)
+        if not profile.location or not profile.needs:
+            return False
+        counts = self.coverage(profile.location, max_age, profile.demographics)
+        return all(counts.get(need, 0) >= min_matches for need in profile.needs)
+
+    def lookup(self, query: str, k: int = 8, min_matches: int = 3,
+               max_age: float = 604800) -> Optional[List[ResourceRecord]]:
+        """
+        Answers a search query from stored records alone.
+
+        Returns:
+            Up to k recently verified records ranked by how many requested needs and groups
+            they serve, or None when the query is not covered (see covers()). Records for
+            other population groups only are left out; general ones may fill the remaining places.
+        """
+        if not self.covers(query, min_matches, max_age):
+            return None
+        profile = parse_query(query)
+        wanted = [f"need:{n}" for n in profile.needs] + [f"group:{d}" for d in profile.demographics]
+        needs_wanted = [f"need:{n}" for n in profile.needs]
+        serves, group_params = _serves_groups(profile.demographics)
+        columns = ", ".join(f"r.{c}" for c in self._COLUMNS)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {columns} FROM resources r JOIN resource_tags t ON t.resource_id = r.id "
+                f"WHERE r.location = ? AND r.verified_at >= ? AND t.tag IN ({', '.join('?' * len(wanted))}) "
+                f"AND {serves} GROUP BY r.id "
+                f"HAVING SUM(t.tag IN ({', '.join('?' * len(needs_wanted))})) > 0 "
+                f"ORDER BY SUM(CASE WHEN t.tag LIKE 'need:%' THEN 2 ELSE 1 END) DESC, r.verified_at DESC, r.id "
+                f"LIMIT ?",
+                (profile.location, time.time() - max_age, *wanted, *group_params, *needs_wanted, k),
+            ).fetchall()
+        return [ResourceRecord(**dict(zip(self._COLUMNS, row))) for row in rows]
+
+    def nearest(self, latitude: float, longitude: float, k: int = 8, radius_km: float = 5,
+                need: Optional[str] = None) -> List[Tuple[ResourceRecord, float]]:
+        """
+        Returns up to k records with coordinates within radius_km of a point, nearest first.
+
+        Args:
+            latitude: Latitude of the point, in degrees
+            longitude: Longitude of the point, in degrees
+            k: Number of records to return
+            radius_km: Search radius
+            need: Optional need category (see query_profile.NEED_CATEGORIES) the records must serve
+
+        Returns:
+            (record, distance in km) pairs
+        """
+        lat_delta = radius_km / 111.32
+        lon_delta = radius_km / max(111.32 * math.cos(math.radians(latitude)), 1e-6)
+        box = (latitude - lat_delta, latitude + lat_delta, longitude - lon_delta, longitude + lon_delta)
+        columns = ", ".join(f"r.{c}" for c in self._COLUMNS)
+        if self.spatial:
+            sql = (f"SELECT {columns} FROM resources_geo g JOIN resources r ON r.id = g.id "
+                   f"WHERE g.max_lat >= ? AND g.min_lat <= ? AND g.max_lon >= ? AND g.min_lon <= ?")
+        else:
+            sql = (f"SELECT {columns} FROM resources r "
+                   f"WHERE r.latitude >= ? AND r.latitude <= ? AND r.longitude >= ? AND r.longitude <= ?")
+        params: List[Any] = list(box)
+        if need:
+            sql += " AND EXISTS (SELECT 1 FROM resource_tags t WHERE t.resource_id = r.id AND t.tag = ?)"
+            params.append(f"need:{need}")
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        found = []
+        for row in rows:
+            record = ResourceRecord(**dict(zip(self._COLUMNS, row)))
+            distance = haversine_km(latitude, longitude, record.latitude, record.longitude)
+            if distance <= radius_km:
+                found.append((record, distance))
+        found.sort(key=lambda item: item[1])
+        return found[:k]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM resources").fetchone()[0]
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Manage the SERP snapshots used by the resource_finder fast path.
+
+Snapshots are trimmed SerpAPI Google results (search parameters, map-pack places and
+organic results) saved per city and query in serpertest/snapshots/ (or SERP_SNAPSHOT_DIR).
+The backend reloads them automatically when files change.
+
+Usage:
+    python serpertest/ingest_snapshots.py import serpertest/research_results.json
+    python serpertest/ingest_snapshots.py fetch --location "San Francisco, California, United States" \\
+        --query "Youth Homeless Shelters near me"
+    python serpertest/ingest_snapshots.py refresh --max-age-hours 24
+    python serpertest/ingest_snapshots.py list
+
+fetch and refresh call SerpAPI and need SERPAPI_API_KEY in the environment or .env.
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SNAPSHOT_DIR = os.getenv(
+    "SERP_SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots")
+)
+
+# Fields of a SerpAPI result that the fast path reads
+KEPT_FIELDS = ("search_parameters", "local_results", "organic_results")
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def snapshot_path(location: str, query: str) -> str:
+    return os.path.join(SNAPSHOT_DIR, f"{_slug(location.split(',')[0])}__{_slug(query)}.json")
+
+
+def save_snapshot(results: dict, fetched_at: float) -> str:
+    """Trims a SerpAPI result to the fields the fast path uses and writes it. Returns the path."""
+    params = results.get("search_parameters", {})
+    if not params.get("q") or not params.get("location_requested"):
+        raise ValueError("SerpAPI result has no search_parameters.q / location_requested")
+    snapshot = {key: results[key] for key in KEPT_FIELDS if key in results}
+    snapshot["fetched_at"] = fetched_at
+
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    path = snapshot_path(params["location_requested"], params["q"])
+    with open(path, "w") as f:
+        json.dump(snapshot, f, indent=2)
+    return path
+
+
+def fetch(location: str, query: str) -> str:
+    from serpapi import GoogleSearch
+
+    api_key = os.getenv("SERPAPI_API_KEY")
+    if not api_key:
+        raise SystemExit("Error: SERPAPI_API_KEY is not set")
+    results = GoogleSearch({
+        "q": query,
+        "location": location,
+        "hl": "en",
+        "gl": "us",
+        "google_domain": "google.com",
+        "api_key": api_key,
+    }).get_dict()
+    if "error" in results:
+        raise SystemExit(f"SerpAPI error: {results['error']}")
+    return save_snapshot(results, time.time())
+
+
+def load_snapshots() -> list:
+    snapshots = []
+    for path in sorted(glob.glob(os.path.join(SNAPSHOT_DIR, "*.json"))):
+        with open(path) as f:
+            snapshots.append((path, json.load(f)))
+    return snapshots
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage SERP snapshots for the resource_finder fast path.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_cmd = commands.add_parser("import", help="Import saved SerpAPI result files")
+    import_cmd.add_argument("files", nargs="+")
+
+    fetch_cmd = commands.add_parser("fetch", help="Fetch a new snapshot from SerpAPI")
+    fetch_cmd.add_argument("--location", required=True, help='e.g. "San Francisco, California, United States"')
+    fetch_cmd.add_argument("--query", required=True, help='e.g. "Youth Homeless Shelters near me"')
+
+    refresh_cmd = commands.add_parser("refresh", help="Re-fetch snapshots older than a given age")
+    refresh_cmd.add_argument("--max-age-hours", type=float, default=24)
+
+    commands.add_parser("list", help="List snapshots and their age")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        for file in args.files:
+            with open(file) as f:
+                results = json.load(f)
+            created = results.get("search_metadata", {}).get("created_at")
+            fetched_at = (time.mktime(time.strptime(created, "%Y-%m-%d %H:%M:%S UTC")) - time.timezone
+                          if created else os.path.getmtime(file))
+            print(f"Imported {file} -> {save_snapshot(results, fetched_at)}")
+
+    elif args.command == "fetch":
+        print(f"Saved {fetch(args.location, args.query)}")
+
+    elif args.command == "refresh":
+        cutoff = time.time() - args.max_age_hours * 3600
+        for path, snapshot in load_snapshots():
+            if snapshot.get("fetched_at", 0) >= cutoff:
+                continue
+            params = snapshot["search_parameters"]
+            print(f"Refreshing {path}...")
+            fetch(params["location_requested"], params["q"])
+
+    elif args.command == "list":
+        for path, snapshot in load_snapshots():
+            params = snapshot.get("search_parameters", {})
+            age_hours = (time.time() - snapshot.get("fetched_at", 0)) / 3600
+            places = len(snapshot.get("local_results", {}).get("places", []))
+            organic = len(snapshot.get("organic_results", []))
+            print(f"{os.path.basename(path)}: \"{params.get('q')}\" in {params.get('location_requested')} "
+                  f"({places} places, {organic} organic, {age_hours:.0f}h old)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
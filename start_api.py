@@ -2,14 +2,31 @@
 """
 Startup script for deep-research API server.
 Loads environment variables from root .env file and starts the Node.js API server.
+
+Pass --warm (or set CACHE_WARMER=true) to also run cache_warmer.py, which keeps reports
+for common searches fresh in the research cache.
+
+Pass --workers N (or set BACKEND_WORKERS) to also serve the FastAPI backend with N uvicorn
+worker processes. Sessions, research jobs and deep-research slots are then kept in SQLite so
+every worker sees them (RESEARCH_MAX_CONCURRENCY caps research runs across all workers), and
+all processes share the same cache files in the repository root.
 """
 
+import argparse
 import os
 import subprocess
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
+parser = argparse.ArgumentParser(description="Start the deep-research API (and optionally the backend).")
+parser.add_argument("--warm", action="store_true", help="also run the cache warmer")
+parser.add_argument("--workers", type=int, default=int(os.getenv("BACKEND_WORKERS", "0")),
+                    help="backend worker processes to start (default: 0, backend not started)")
+parser.add_argument("--host", default=os.getenv("BACKEND_HOST", "127.0.0.1"))
+parser.add_argument("--port", type=int, default=int(os.getenv("BACKEND_PORT", "8000")))
+args = parser.parse_args()
+
 # Load environment variables from root .env file
 root_dir = Path(__file__).parent
 env_file = root_dir / ".env"
@@ -47,6 +64,42 @@ if os.getenv("FIRECRAWL_BASE_URL"):
 if os.getenv("CONCURRENCY_LIMIT"):
     env["CONCURRENCY_LIMIT"] = os.getenv("CONCURRENCY_LIMIT")
 
+# Python processes (warmer, backend workers) share state through files in the repo root
+shared_env = os.environ.copy()
+for name, filename in (("RESEARCH_CACHE_PATH", "research_cache.sqlite3"),
+                       ("RESOURCE_INDEX_PATH", "resource_index.sqlite3"),
+                       ("SESSION_DB_PATH", "sessions.sqlite3"),
+                       ("JOB_DB_PATH", "jobs.sqlite3"),
+                       ("RESEARCH_SLOTS_DB_PATH", "research_slots.sqlite3")):
+    shared_env.setdefault(name, str(root_dir / filename))
+
+# Optionally keep the research cache warm alongside the server
+warmer = None
+if args.warm or os.getenv("CACHE_WARMER", "false").lower() == "true":
+    print("Starting cache warmer...")
+    # The warmer's runs take research slots shared with the backend, behind its searches
+    shared_env.setdefault("RESEARCH_SLOTS", "sqlite")
+    warmer = subprocess.Popen([sys.executable, str(root_dir / "cache_warmer.py")], cwd=root_dir, env=shared_env)
+
+# Optionally serve the backend with several worker processes
+backend = None
+if args.workers > 0:
+    backend_env = dict(shared_env)
+    if args.workers > 1:
+        backend_env.setdefault("SESSION_STORE", "sqlite")
+        backend_env.setdefault("JOB_STORE", "sqlite")
+        # One research capacity and urgency queue for all workers, not one per worker
+        backend_env.setdefault("RESEARCH_SLOTS", "sqlite")
+    # The warmer above is the only one; workers must not each start their own
+    backend_env["CACHE_WARMER"] = "false"
+    print(f"Starting backend with {args.workers} worker(s) on http://{args.host}:{args.port}...")
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", str(root_dir / "backend"),
+         "--host", args.host, "--port", str(args.port), "--workers", str(args.workers)],
+        cwd=root_dir,
+        env=backend_env,
+    )
+
 # Start the deep-research API server
 deep_research_dir = root_dir / "deep-research"
 os.chdir(deep_research_dir)
@@ -69,3 +122,7 @@ except KeyboardInterrupt:
 except subprocess.CalledProcessError as e:
     print(f"\nError starting API server: {e}")
     sys.exit(1)
+finally:
+    for process in (warmer, backend):
+        if process:
+            process.terminate()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the bounded tool-calling loop (backend/agent_loop.py).
+
+A scripted model asks for several slow tools in one turn (e.g. a resource search, a page
+scrape and a benefits lookup). The turn is run with the tools executed one after another,
+as the chat endpoint used to, and concurrently through run_agent. Two more turns check the
+bounds: a model that never stops calling tools is cut off after max_iterations, and a tool
+that hangs is abandoned at its timeout.
+
+Usage:
+    python tests/benchmark_agent_loop.py [--tools 3] [--tool-latency 1]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "backend"))
+
+from agent_loop import AgentLimits, run_agent
+
+
+def tool_schemas(n_tools: int) -> list:
+    return [{"type": "function", "function": {"name": f"tool_{i}", "parameters": {"type": "object", "properties": {}}}}
+            for i in range(n_tools)]
+
+
+def scripted_model(n_tools: int, rounds: int):
+    """Requests n_tools tools in each of the first `rounds` calls, then answers."""
+    calls = []
+
+    async def complete(stage, messages, tools):
+        calls.append(stage)
+        if tools and len(calls) <= rounds:
+            return "", [
+                {"id": f"call_{len(calls)}_{i}", "type": "function",
+                 "function": {"name": f"tool_{i}", "arguments": "{}"}}
+                for i in range(n_tools)
+            ]
+        return "Here are some resources that can help.", []
+
+    return complete, calls
+
+
+async def sequential_turn(n_tools: int, execute) -> float:
+    start = time.perf_counter()
+    for i in range(n_tools):
+        await execute(f"tool_{i}", {})
+    return time.perf_counter() - start
+
+
+async def run(n_tools: int, tool_latency: float) -> None:
+    async def execute(name, parsed):
+        await asyncio.sleep(tool_latency)
+        return {"tool": name}
+
+    sequential = await sequential_turn(n_tools, execute)
+
+    complete, _ = scripted_model(n_tools, rounds=1)
+    start = time.perf_counter()
+    turn = await run_agent(complete, [], tool_schemas(n_tools), execute, AgentLimits(max_iterations=3))
+    concurrent = time.perf_counter() - start
+
+    complete, calls = scripted_model(n_tools, rounds=100)
+    bounded = await run_agent(complete, [], tool_schemas(n_tools), execute, AgentLimits(max_iterations=2))
+
+    async def hanging(name, parsed):
+        await asyncio.sleep(3600 if name == "tool_0" else tool_latency)
+        return {"tool": name}
+
+    complete, _ = scripted_model(n_tools, rounds=1)
+    start = time.perf_counter()
+    timed_out = await run_agent(complete, [], tool_schemas(n_tools), hanging,
+                                AgentLimits(tool_timeout_seconds=tool_latency * 2))
+    timeout_wall = time.perf_counter() - start
+
+    print("=" * 72)
+    print(f"{n_tools} tools of {tool_latency:g}s in one turn")
+    print("-" * 72)
+    print(f"One after another:            {sequential:6.2f}s")
+    print(f"Concurrent (run_agent):       {concurrent:6.2f}s   ({len(turn.tool_results)} results)")
+    print(f"Endless tool calls:           stopped after {bounded.iterations} rounds, {len(calls)} model calls")
+    print(f"Hanging tool:                 {timeout_wall:6.2f}s   -> {timed_out.tool_results[0]}")
+    print("=" * 72)
+    if concurrent > sequential / n_tools * 1.5 or bounded.iterations != 2 or "error" not in timed_out.tool_results[0]:
+        print("✗ Expected concurrent tools and enforced bounds")
+        sys.exit(1)
+    print(f"✓ Multi-tool turn took the slowest tool's time, {sequential / concurrent:.1f}x faster")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tools", type=int, default=3)
+    parser.add_argument("--tool-latency", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.tools, args.tool_latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the caseworker batch endpoint.
+
+Builds a batch of intake conversations over a few cities and needs (several clients per
+city and need, plus some that need the LLM to interpret them) and answers it against the
+mock servers twice, from an empty cache each time:
+  1. one client after another, as through /chat's resource search;
+  2. all at once through POST /batch, which extracts queries concurrently and groups
+     clients with the same needs and location into one search.
+Reports clients per minute and deep-research runs for both.
+
+Usage:
+    python tests/benchmark_batch.py [--clients 40] [--llm-latency 0.5] [--research-latency 1]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(ROOT_DIR))
+sys.path.append(os.path.join(os.path.dirname(ROOT_DIR), "backend"))
+
+import httpx
+
+from mock_servers import MockServer, create_mock_app
+
+CITIES = ["Oakland", "San Francisco", "Seattle", "Denver", "Portland"]
+NEEDS = ["a shelter bed", "food", "a medical clinic"]
+
+
+def intake_batch(clients: int) -> list:
+    batch = []
+    for i in range(clients):
+        if i % 4 == 3:
+            # Vague enough that the query has to come from the LLM
+            text = f"Client {i}: lost my place last week, not sure what I need or where to go"
+        else:
+            text = f"Client {i} is in {CITIES[i % len(CITIES)]} and needs {NEEDS[i % len(NEEDS)]}"
+        batch.append({"client_id": f"client-{i}", "conversation_history": [{"role": "user", "content": text}]})
+    return batch
+
+
+def reset(resource_finder) -> None:
+    resource_finder.research_cache.clear()
+    resource_finder._query_memo.clear()
+
+
+async def sequential(resource_finder, batch: list, limiter) -> float:
+    start = time.perf_counter()
+    for client in batch:
+        await resource_finder.find_eligible_resources_async(client["conversation_history"], limiter=limiter)
+    return time.perf_counter() - start
+
+
+async def batched(backend, batch: list) -> tuple:
+    """Returns (seconds, result events, the "done" event)."""
+    transport = httpx.ASGITransport(app=backend.app)
+    start = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://backend", timeout=None) as client:
+        response = await client.post("/batch", json={"clients": batch})
+        response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    events = [
+        (block.split("\n")[0].removeprefix("event: "), json.loads(block.split("\n")[1].removeprefix("data: ")))
+        for block in response.text.strip().split("\n\n")
+    ]
+    return elapsed, [data for name, data in events if name == "result"], events[-1][1]
+
+
+async def run(resource_finder, backend, app, clients: int) -> None:
+    batch = intake_batch(clients)
+
+    reset(resource_finder)
+    calls_before = app.state.research_calls
+    one_by_one = await sequential(resource_finder, batch, backend.job_manager.research_slots)
+    sequential_runs = app.state.research_calls - calls_before
+
+    reset(resource_finder)
+    calls_before = app.state.research_calls
+    together, results, done = await batched(backend, batch)
+    batch_runs = app.state.research_calls - calls_before
+
+    print("=" * 72)
+    print(f"{clients} intake conversations, {len(CITIES)} cities x {len(NEEDS)} needs plus vague ones")
+    print("-" * 72)
+    for label, seconds, runs in (("one by one", one_by_one, sequential_runs), ("POST /batch", together, batch_runs)):
+        print(f"{label:<12} {seconds:6.2f}s   {clients / seconds * 60:7.0f} clients/min   research runs: {runs}")
+    print(f"batch summary: {done}")
+    print("=" * 72)
+
+    answered = {r["client_id"] for r in results}
+    failed = False
+    if len(answered) != clients or done["failed"]:
+        print(f"✗ Expected a result for every client (got {len(answered)})")
+        failed = True
+    if batch_runs > sequential_runs or together >= one_by_one:
+        print("✗ Expected the batch to be faster without extra research runs")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print(f"✓ Batch answered {clients} clients with {done['searches']} searches, "
+          f"{one_by_one / together:.1f}x the clients per minute")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=40)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--research-latency", type=float, default=1.0)
+    args = parser.parse_args()
+
+    app = create_mock_app(llm_latency=args.llm_latency, research_latency=args.research_latency)
+    with MockServer(app) as server:
+        os.environ.update({
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": f"{server.url}/v1",
+            "DEEP_RESEARCH_API_URL": server.url,
+            "RESEARCH_CACHE_PATH": ":memory:",
+            "RESOURCE_INDEX_PATH": ":memory:",
+            "SERP_FAST_PATH": "false",
+            "RESOURCE_DB_FAST_PATH": "false",
+            "RESEARCH_MAX_CONCURRENCY": "4",
+            "CACHE_WARMER": "false",
+            "LOG_LEVEL": "WARNING",
+        })
+        import main as backend
+        import resource_finder
+        asyncio.run(run(resource_finder, backend, app, args.clients))
+
+
+if __name__ == "__main__":
+    main()
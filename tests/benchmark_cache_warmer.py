@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the research cache warmer.
+
+Measures the latency of first requests for common searches (a shelter in San Francisco, and
+a shelter and food in Oakland) against the mock servers with a cold cache, then after one
+warmer cycle over a small matrix. Requests go through the progressive search /chat uses by
+default, so the warmed reports must match its deep tier's setting and per-need split. Also
+checks that warmer runs hold the scheduler's single planning slot and that a second cycle
+finds nothing stale to refresh.
+
+Usage:
+    python tests/benchmark_cache_warmer.py [--research-latency 2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(ROOT_DIR))
+
+from mock_servers import MockServer, create_mock_app
+
+MATRIX = {
+    "cities": ["San Francisco", "Oakland"],
+    "needs": [["shelter"], ["food"], ["shelter", "food"]],
+    "demographics": [[]],
+}
+CONVERSATIONS = [
+    [{"role": "user", "content": "I'm in San Francisco and need a shelter tonight"}],
+    [{"role": "user", "content": "I'm in Oakland and I need a shelter and some food"}],
+]
+
+
+async def first_requests(resource_finder) -> float:
+    """Seconds for one progressive search per conversation, run one after another."""
+    start = time.perf_counter()
+    for conversation in CONVERSATIONS:
+        await resource_finder.find_eligible_resources_progressive(conversation)
+    return time.perf_counter() - start
+
+
+async def run(resource_finder, warmer, app) -> None:
+    resource_finder.research_cache.clear()
+    cold = await first_requests(resource_finder)
+
+    resource_finder.research_cache.clear()
+    calls_before = app.state.research_calls
+    app.state.research_peak = 0
+    start = time.perf_counter()
+    first_cycle = await warmer.run_once()
+    cycle_wall = time.perf_counter() - start
+    cycle_peak = app.state.research_peak
+    calls_before_requests = app.state.research_calls
+    warm = await first_requests(resource_finder)
+    request_runs = app.state.research_calls - calls_before_requests
+    second_cycle = await warmer.run_once()
+
+    print("=" * 72)
+    print(f"Warmer cycle: {first_cycle['refreshed']} reports in {cycle_wall:.2f}s "
+          f"({app.state.research_calls - calls_before} research runs, at most {cycle_peak} at once)")
+    print(f"First requests, cold cache:   {cold:5.2f}s")
+    print(f"First requests, warmed cache: {warm:5.2f}s   research runs: {request_runs}")
+    print(f"Second cycle refreshed:       {second_cycle['refreshed']}")
+    print("=" * 72)
+    # Per city: shelter and food at the deep breadth, and at half of it for the two-need search
+    if (first_cycle["refreshed"] != 8 or second_cycle["due"] != 0 or request_runs or warm >= cold
+            or cycle_peak > 1):
+        print("✗ Expected the warmer to fill the cache once, one planning run at a time, "
+              "and serve the first requests from it")
+        sys.exit(1)
+    print("✓ Warmed reports served the first progressive requests without a research run")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--research-latency", type=float, default=2.0)
+    args = parser.parse_args()
+
+    app = create_mock_app(llm_latency=0.1, research_latency=args.research_latency)
+    with MockServer(app) as server, tempfile.NamedTemporaryFile("w", suffix=".json") as matrix:
+        json.dump(MATRIX, matrix)
+        matrix.flush()
+        os.environ.update({
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": f"{server.url}/v1",
+            "DEEP_RESEARCH_API_URL": server.url,
+            "RESEARCH_CACHE_PATH": ":memory:",
+            "RESOURCE_INDEX_PATH": ":memory:",
+            "SERP_FAST_PATH": "false",
+            "RESOURCE_DB_FAST_PATH": "false",
+        })
+        import resource_finder
+        from cache_warmer import CacheWarmer
+        from research_scheduler import ResearchScheduler
+
+        # Capacity 2 leaves one slot for planning work, whatever the warmer's own concurrency
+        warmer = CacheWarmer(resource_finder.research_cache, matrix_path=matrix.name,
+                             max_concurrency=2, max_runs_per_cycle=10, stagger_seconds=0.1,
+                             limiter=ResearchScheduler(capacity=2).limiter("planning"))
+        asyncio.run(run(resource_finder, warmer, app))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark for coalescing identical in-flight deep-research requests.
+
+Starts many concurrent resource searches from different conversations that normalize to
+the same query (an evening rush for shelter beds in one city) against the mock servers,
+with and without RESEARCH_COALESCING, and counts the deep-research runs each needs.
+
+Usage:
+    python tests/benchmark_coalescing.py [--sessions 50] [--research-latency 3]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(ROOT_DIR))
+
+from mock_servers import MockServer, create_mock_app
+
+MESSAGES = [
+    "I'm in San Francisco and need a shelter tonight",
+    "need a place to sleep in SF",
+    "Where is an emergency shelter in San Francisco?",
+    "I'm in SF, I need somewhere to stay",
+]
+
+
+async def rush(resource_finder, sessions: int) -> float:
+    resource_finder.research_cache.clear()
+    limiter = asyncio.Semaphore(sessions)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        resource_finder.find_eligible_resources_async(
+            [{"role": "user", "content": MESSAGES[i % len(MESSAGES)]}], limiter=limiter
+        )
+        for i in range(sessions)
+    ))
+    return time.perf_counter() - start
+
+
+async def run(resource_finder, app, sessions: int) -> None:
+    results = {}
+    for coalescing in (False, True):
+        resource_finder.RESEARCH_COALESCING = coalescing
+        calls_before = app.state.research_calls
+        coalesced_before = resource_finder.COALESCED_CALLS.value()
+        wall = await rush(resource_finder, sessions)
+        results[coalescing] = (app.state.research_calls - calls_before,
+                               resource_finder.COALESCED_CALLS.value() - coalesced_before, wall)
+
+    print("=" * 72)
+    print(f"{sessions} concurrent sessions asking for the same resources")
+    print("-" * 72)
+    for coalescing, (calls, coalesced, wall) in results.items():
+        label = "with coalescing" if coalescing else "without coalescing"
+        print(f"{label:<20} research runs: {calls:>4}   coalesced: {coalesced:>4}   wall: {wall:5.2f}s")
+    print("=" * 72)
+    if results[True][0] != 1:
+        print("✗ Expected a single research run with coalescing")
+        sys.exit(1)
+    print("✓ One research run served every session")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--research-latency", type=float, default=3.0)
+    args = parser.parse_args()
+
+    app = create_mock_app(llm_latency=0.1, research_latency=args.research_latency)
+    with MockServer(app) as server:
+        os.environ.update({
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": f"{server.url}/v1",
+            "DEEP_RESEARCH_API_URL": server.url,
+            "RESEARCH_CACHE_PATH": ":memory:",
+            "RESOURCE_INDEX_PATH": ":memory:",
+            "SERP_FAST_PATH": "false",
+            "RESOURCE_DB_FAST_PATH": "false",
+        })
+        import resource_finder
+
+        asyncio.run(run(resource_finder, app, args.sessions))
+
+
+if __name__ == "__main__":
+    main()
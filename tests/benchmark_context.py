@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark for conversation compaction and token budgeting.
+
+Builds synthetic conversations of growing length (a user in one city describing several
+needs over many turns, with long assistant answers and resource-search updates) and
+compares, for the query-extraction prompt and the /chat prompt, the tokens sent before
+(whole history, the former indented JSON for extraction) and after compaction, plus the
+time compaction takes. Also checks that the user's city and needs survive in the summary.
+
+Usage:
+    python tests/benchmark_context.py [--turns 10 50 200]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from conversation_context import ConversationContext, count_tokens, messages_tokens
+from query_profile import summarize_profile
+
+USER_TURNS = [
+    "Hi, I'm 19 and I'm in Oakland. I need a place to sleep tonight.",
+    "I also haven't eaten since yesterday.",
+    "Do any of them take people with a dog?",
+    "Is there somewhere I can take a shower?",
+    "What about help finding a job?",
+    "Thanks, can you remind me of the hours?",
+]
+ANSWER = ("Here are some options that may help you. " * 12).strip()
+UPDATE = "Updated resource search results: " + json.dumps(
+    [{"name": f"Resource {i}", "address": f"{i} Main St, Oakland, CA", "phone": "(510) 555-0100",
+      "services": "Emergency shelter, meals and case management"} for i in range(8)]
+)
+
+
+def conversation(turns: int) -> list:
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": USER_TURNS[i % len(USER_TURNS)]})
+        messages.append({"role": "assistant", "content": ANSWER})
+        if i % 5 == 1:
+            messages.append({"role": "assistant", "content": UPDATE})
+    return messages
+
+
+def extraction_tokens(window: list, indent) -> int:
+    separators = None if indent else (",", ":")
+    return count_tokens(json.dumps(window, indent=indent, separators=separators, ensure_ascii=False))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 50, 200])
+    args = parser.parse_args()
+
+    query_context = ConversationContext(budget_tokens=1000)
+    chat_context = ConversationContext(budget_tokens=2000)
+    failures = 0
+
+    print("=" * 96)
+    print(f"{'turns':>6}{'extraction before':>20}{'after':>10}{'chat before':>14}{'after':>10}"
+          f"{'compaction':>14}   summary keeps")
+    print("-" * 96)
+    for turns in args.turns:
+        history = conversation(turns)
+        start = time.perf_counter()
+        window = query_context.compact(history, max_messages=10)
+        prompt = chat_context.compact(history)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        profile = summarize_profile(prompt[:1])
+        kept = f"{profile.location}, {', '.join(profile.needs)}"
+        if len(history) > 10 and (profile.location != "oakland" or "shelter" not in profile.needs):
+            failures += 1
+        print(f"{turns:>6}{extraction_tokens(history, 2):>20}{extraction_tokens(window, None):>10}"
+              f"{messages_tokens(history):>14}{messages_tokens(prompt):>10}{elapsed_ms:>12.2f}ms   {kept}")
+    print("=" * 96)
+    if failures:
+        print("✗ The summary lost the user's city or needs")
+        sys.exit(1)
+    print("✓ Prompts stay within budget and keep the user's profile")
+
+
+if __name__ == "__main__":
+    main()
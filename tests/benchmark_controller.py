@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the adaptive breadth/depth controller.
+
+Runs uncached shelter research against mock servers where breadth matters like depth: run
+time grows with breadth x depth and small settings find fewer resources (4 at 1x1, 6 at
+2x1 or 1x2, all 10 from 2x2 up). Against a --target latency, compares fixed settings with
+the controller:
+  1. searches one at a time: 1x2 (the old default), 4x2 (the most thorough) and adaptive,
+     which should learn to use the cheapest setting finding everything within the target;
+  2. a burst of concurrent searches through 2 research slots, where the queue wait should
+     push the controller to cheaper settings;
+  3. the deep-research server slowing down, which should make it downgrade;
+  4. an open deep-research circuit, which should make it pick the cheapest setting;
+  5. a report cached at another setting, which should be reused without counting the
+     settings probed on the way as cache hits.
+Ends with the controller's report of the latency/quality tradeoff, as served on /research/settings.
+
+Usage:
+    python tests/benchmark_controller.py [--searches 10] [--burst 8] [--research-latency 0.4] [--target 1]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(ROOT_DIR))
+
+from mock_servers import MockServer, create_mock_app
+
+
+def city_query(tag: str, i: int) -> str:
+    # A different (made-up) city each time, so searches neither coalesce nor hit the cache
+    return f"Search for emergency shelter in {tag.title()}{i}ville"
+
+
+async def timed_search(resource_finder, query: str, setting, limiter=None) -> tuple:
+    """(seconds, resources in the report, "BxD" researched at)."""
+    settings = []
+    breadth, depth = setting if setting else (None, None)
+    start = time.perf_counter()
+    report = await resource_finder.call_deep_research_cached_async(
+        query, breadth=breadth, depth=depth, limiter=limiter,
+        on_progress=lambda stage, d: settings.append(f"{d['breadth']}x{d['depth']}") if stage == "researching" else None,
+    )
+    elapsed = time.perf_counter() - start
+    return elapsed, len(resource_finder.parse_report(report)), settings[-1] if settings else "cached"
+
+
+def summarize(label: str, runs: list, target: float) -> dict:
+    seconds = [s for s, _, _ in runs]
+    met = sum(s <= target for s in seconds)
+    settings = " ".join(setting for _, _, setting in runs)
+    print(f"{label:<10} p50 {statistics.median(seconds):5.2f}s   max {max(seconds):5.2f}s   "
+          f"within target {met:>2}/{len(runs)}   resources {statistics.mean(r for _, r, _ in runs):4.1f}   {settings}")
+    return {"met": met, "resources": statistics.mean(r for _, r, _ in runs), "max": max(seconds)}
+
+
+def fresh(resource_finder, research_controller) -> None:
+    resource_finder.research_cache.clear()
+    resource_finder.research_controller = research_controller.ResearchController.from_env()
+
+
+async def run(resource_finder, research_controller, research_scheduler, latency: dict, args) -> None:
+    failed = False
+    target = args.target
+
+    print("=" * 100)
+    print(f"{args.searches} searches one at a time, target {target:g}s (1x2 takes {args.research_latency:g}s)")
+    print("-" * 100)
+    sequential = {}
+    for label, setting in (("fixed 1x2", (1, 2)), ("fixed 4x2", (4, 2)), ("adaptive", None)):
+        fresh(resource_finder, research_controller)
+        runs = [await timed_search(resource_finder, city_query(label.replace(" ", ""), i), setting)
+                for i in range(args.searches)]
+        sequential[label] = summarize(label, runs, target)
+    adaptive = sequential["adaptive"]
+    if adaptive["resources"] <= sequential["fixed 1x2"]["resources"] or adaptive["met"] < args.searches - 2:
+        print("✗ Expected the controller to find more resources than 1x2 while meeting the target")
+        failed = True
+
+    print("-" * 100)
+    print(f"a burst of {args.burst} searches through 2 research slots")
+    print("-" * 100)
+    learned = resource_finder.research_controller
+    best = learned.choose("shelter").setting
+    burst = {}
+    for label, setting in ((f"fixed {best}", (best.breadth, best.depth)), ("adaptive", None)):
+        resource_finder.research_cache.clear()
+        scheduler = research_scheduler.ResearchScheduler(capacity=2)
+        runs = await asyncio.gather(*(
+            timed_search(resource_finder, city_query("burst" + label[:5], i), setting, scheduler.limiter("normal"))
+            for i in range(args.burst)
+        ))
+        burst[label] = summarize(label, runs, target)
+    if burst["adaptive"]["max"] >= burst[f"fixed {best}"]["max"]:
+        print("✗ Expected the queue wait to move the controller to cheaper settings")
+        failed = True
+
+    print("-" * 100)
+    print("the deep-research server becomes 3x slower")
+    print("-" * 100)
+    latency["value"] *= 3
+    slow = {}
+    for label, setting in ((f"fixed {best}", (best.breadth, best.depth)), ("adaptive", None)):
+        resource_finder.research_cache.clear()
+        runs = [await timed_search(resource_finder, city_query("slow" + label[:5], i), setting)
+                for i in range(args.searches)]
+        slow[label] = summarize(label, runs, target)
+    latency["value"] /= 3
+    print(f"slowdown estimate: {resource_finder.research_controller.slowdown:.2f}")
+    if slow["adaptive"]["met"] <= slow[f"fixed {best}"]["met"]:
+        print("✗ Expected the controller to downgrade when research slowed down")
+        failed = True
+
+    print("-" * 100)
+    breaker = resource_finder.DEEP_RESEARCH.breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    resource_finder.choose_research_setting("Search for emergency shelter in Circuitville")
+    breaker.record_success()
+    decision = resource_finder.research_controller.report()["decisions"][0]
+    print(f"with the deep-research circuit open: {decision['setting']} ({decision['reason']})")
+    if decision["reason"] != "saturated":
+        print("✗ Expected an open circuit to be treated as saturation")
+        failed = True
+
+    print("-" * 100)
+    cache = resource_finder.research_cache
+    cache.clear()
+    query = "Search for emergency shelter in Probeville"
+    cache.put(resource_finder.research_cache_key(query, 2, 2), query, "# Cached report")
+    hits, misses = cache.hits, cache.misses
+    reused = resource_finder.choose_research_setting(query)
+    counted = (cache.hits - hits, cache.misses - misses, cache.popular(10))
+    print(f"report cached at 2x2: reused {reused}, cache hits/misses counted while probing: {counted[0]}/{counted[1]}")
+    if str(reused) != "2x2" or counted != (0, 0, []):
+        print("✗ Expected the cached report to be found without touching the cache statistics")
+        failed = True
+
+    print("-" * 100)
+    print("tradeoff for the shelter class (GET /research/settings)")
+    for row in resource_finder.research_controller.report()["classes"]["shelter"]:
+        resources = "?" if row["resources"] is None else f"{row['resources']:4.1f}"
+        print(f"  {row['setting']}  samples {row['samples']:>2}   {row['seconds']:5.2f}s   resources {resources:>4}   "
+              f"per minute {row['resources_per_minute'] or '?'}")
+    print("=" * 100)
+    if failed:
+        sys.exit(1)
+    print(f"✓ Adaptive research found {adaptive['resources']:.1f} resources per search "
+          f"(1x2: {sequential['fixed 1x2']['resources']:.1f}) with {adaptive['met']}/{args.searches} within "
+          f"{target:g}s, and kept {slow['adaptive']['met']}/{args.searches} within it on a slow server "
+          f"(fixed {best}: {slow[f'fixed {best}']['met']})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--searches", type=int, default=10)
+    parser.add_argument("--burst", type=int, default=8)
+    parser.add_argument("--research-latency", type=float, default=0.4, help="seconds per mock report at 1x2")
+    parser.add_argument("--target", type=float, default=1.0, help="target seconds per search")
+    args = parser.parse_args()
+
+    latency = {"value": args.research_latency}
+    app = create_mock_app(llm_latency=0.05, research_latency=lambda: latency["value"], breadth_scaling=True)
+    with MockServer(app) as server:
+        os.environ.update({
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": f"{server.url}/v1",
+            "DEEP_RESEARCH_API_URL": server.url,
+            "RESEARCH_CACHE_PATH": ":memory:",
+            "RESOURCE_INDEX_PATH": ":memory:",
+            "SERP_FAST_PATH": "false",
+            "RESOURCE_DB_FAST_PATH": "false",
+            "RESEARCH_TARGET_SECONDS": str(args.target),
+            # Run time per unit of breadth x depth before any run is observed
+            "RESEARCH_PRIOR_SECONDS": str(args.research_latency / 2),
+        })
+        import research_controller
+        import research_scheduler
+        import resource_finder
+        asyncio.run(run(resource_finder, research_controller, research_scheduler, latency, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark for splitting multi-need searches into one research run per need.
+
+A first conversation asks for shelter and food for LGBTQ youth in San Francisco; a second
+one, later, asks for shelter and a clinic for the same group. With RESEARCH_FANOUT each
+search runs one narrower research per need concurrently, and the second reuses the shelter
+report cached by the first. Without it each search needs its own broad research run.
+
+Usage:
+    python tests/benchmark_fanout.py [--research-latency 2]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(ROOT_DIR))
+
+from mock_servers import MockServer, create_mock_app
+
+CONVERSATIONS = [
+    "I'm 19 and LGBTQ, I'm in San Francisco and need a place to sleep tonight and food",
+    "I'm 20 and LGBTQ in San Francisco, I need a shelter and a clinic",
+]
+
+
+async def run_conversations(resource_finder, app) -> list:
+    rows = []
+    for message in CONVERSATIONS:
+        calls_before = app.state.research_calls
+        start = time.perf_counter()
+        result = await resource_finder.find_eligible_resources_async(
+            [{"role": "user", "content": message}], breadth=4
+        )
+        names = [r["name"] for r in result["resources"]]
+        rows.append((time.perf_counter() - start, app.state.research_calls - calls_before,
+                     len(names), len(names) - len(set(names))))
+    return rows
+
+
+async def run(resource_finder, app) -> None:
+    results = {}
+    for fanout in (False, True):
+        resource_finder.RESEARCH_FANOUT = fanout
+        resource_finder.research_cache.clear()
+        results[fanout] = await run_conversations(resource_finder, app)
+
+    print("=" * 78)
+    print(f"{'':<16}{'conversation':<16}{'wall':>10}{'research runs':>16}{'resources':>12}{'dupes':>8}")
+    print("-" * 78)
+    for fanout, rows in results.items():
+        label = "fan-out" if fanout else "single query"
+        for i, (wall, calls, resources, dupes) in enumerate(rows):
+            print(f"{label if i == 0 else '':<16}{'#' + str(i + 1):<16}{wall:>9.2f}s{calls:>16}{resources:>12}{dupes:>8}")
+    print("=" * 78)
+    if results[True][1][1] != 1 or any(row[3] for row in results[True]):
+        print("✗ Expected the second conversation to reuse the cached shelter report without duplicates")
+        sys.exit(1)
+    print("✓ The shelter report was reused by the second conversation")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--research-latency", type=float, default=2.0)
+    args = parser.parse_args()
+
+    app = create_mock_app(llm_latency=0.1, research_latency=args.research_latency)
+    with MockServer(app) as server:
+        os.environ.update({
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": f"{server.url}/v1",
+            "DEEP_RESEARCH_API_URL": server.url,
+            "RESEARCH_CACHE_PATH": ":memory:",
+            "RESOURCE_INDEX_PATH": ":memory:",
+            "SERP_FAST_PATH": "false",
+            "RESOURCE_DB_FAST_PATH": "false",
+        })
+        import resource_finder
+
+        asyncio.run(run(resource_finder, app))
+
+
+if __name__ == "__main__":
+    main()
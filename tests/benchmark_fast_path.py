@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the SERP snapshot fast path versus deep research.
+
+Runs find_eligible_resources_async against mock OpenAI and deep-research servers for a
+query the snapshots in serpertest/snapshots/ cover, once with SERP_FAST_PATH enabled and
+once with it disabled, and times the snapshot lookup on its own. Also checks that a search
+for a group the snapshots don't serve (veterans, where they list youth shelters) is not
+answered from them.
+
+Usage:
+    python tests/benchmark_fast_path.py [--research-latency 5] [--llm-latency 0.3] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(ROOT_DIR))
+
+from mock_servers import MockServer, create_mock_app
+
+QUERY = "Find emergency shelter for homeless youth in San Francisco"
+OTHER_GROUP_QUERY = "Find emergency shelter for veterans in San Francisco"
+CONVERSATION = [
+    {"role": "user", "content": "I'm 19 and got kicked out, I'm in San Francisco. Where can I stay tonight?"},
+]
+
+
+async def time_search(resource_finder, runs: int) -> list:
+    samples = []
+    for _ in range(runs):
+        # Each run should pay for the research, not read the previous run's cached report
+        resource_finder.research_cache.clear()
+        start = time.perf_counter()
+        result = await resource_finder.find_eligible_resources_async(CONVERSATION)
+        samples.append(time.perf_counter() - start)
+    print(f"  source={result['source']} resources={len(result['resources'])}")
+    return samples
+
+
+async def compare(resource_finder, runs: int) -> tuple:
+    # One event loop for both phases, since the async clients are bound to the loop they first ran in
+    print(f"Query: {QUERY}")
+    # Compare against research, not the resource index the snapshots feed
+    resource_finder.RESOURCE_DB_FAST_PATH = False
+    resource_finder.SERP_FAST_PATH = True
+    fast = await time_search(resource_finder, runs)
+    resource_finder.SERP_FAST_PATH = False
+    slow = await time_search(resource_finder, runs)
+    return fast, slow
+
+
+def report(label: str, samples: list) -> None:
+    print(f"{label:<28} median {statistics.median(samples) * 1000:10.2f} ms   max {max(samples) * 1000:10.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--research-latency", type=float, default=5.0, help="seconds per mock deep-research report")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per mock LLM call")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_mock_app(llm_latency=args.llm_latency, research_latency=args.research_latency,
+                          search_query=QUERY)
+    with MockServer(app) as server:
+        os.environ.update({
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": f"{server.url}/v1",
+            "DEEP_RESEARCH_API_URL": server.url,
+            "RESEARCH_CACHE_PATH": ":memory:",
+            "RESOURCE_INDEX_PATH": ":memory:",
+        })
+        import resource_finder
+
+        lookups = []
+        for _ in range(100):
+            start = time.perf_counter()
+            resource_finder.serp_index.resolve(QUERY)
+            lookups.append(time.perf_counter() - start)
+
+        other_group = resource_finder.serp_index.resolve(OTHER_GROUP_QUERY)
+        fast, slow = asyncio.run(compare(resource_finder, args.runs))
+
+    print()
+    report("Snapshot lookup only", lookups)
+    report("Fast path (end to end)", fast)
+    report("Deep research (end to end)", slow)
+    print(f"\nSpeed-up: {statistics.median(slow) / statistics.median(fast):.1f}x")
+    if other_group is not None:
+        print(f"✗ Expected snapshots of youth shelters not to answer: {OTHER_GROUP_QUERY}")
+        sys.exit(1)
+    print("✓ Snapshots answered the youth search and left the veterans search to research")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark for rendering resource reports locally from the deep-research API's learnings.
+
+Runs the same resource searches against the mock servers in both DEEP_RESEARCH_MODEs:
+  - "report": /api/generate-report, which spends --synthesis-latency seconds writing the
+    report with an LLM after the research itself;
+  - "learnings": /api/research, whose raw learnings and sources are rendered here.
+Compares time per search and the resources each mode finds, and times the local rendering.
+
+Usage:
+    python tests/benchmark_learnings.py [--searches 4] [--research-latency 1] [--synthesis-latency 1.5]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(ROOT_DIR))
+
+from mock_servers import SAMPLE_LEARNINGS, MockServer, create_mock_app
+
+CITIES = ["San Francisco", "Oakland", "Seattle", "Denver", "Portland", "Austin"]
+
+
+async def searches(resource_finder, count: int) -> tuple:
+    """Returns (seconds per search, name keys of the resources found)."""
+    resource_finder.research_cache.clear()
+    # A fresh index, so each mode only finds what its own reports contain
+    resource_finder.resource_index = resource_finder.ResourceIndex(":memory:")
+    timings, names = [], set()
+    for i in range(count):
+        conversation = [{"role": "user", "content": f"I'm 19, LGBTQ and need a shelter in {CITIES[i % len(CITIES)]}"}]
+        start = time.perf_counter()
+        result = await resource_finder.find_eligible_resources_async(conversation, top_k=20)
+        timings.append(time.perf_counter() - start)
+        names.update(resource_finder.ResourceRecord(name=r["name"]).key() for r in result["resources"])
+    return timings, names
+
+
+async def both_modes(resource_finder, count: int) -> dict:
+    results = {}
+    for mode in ("report", "learnings"):
+        resource_finder.DEEP_RESEARCH_MODE = mode
+        results[mode] = await searches(resource_finder, count)
+    return results
+
+
+def render_ms(resource_index, query: str, repeats: int = 200) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        resource_index.learnings_to_markdown(SAMPLE_LEARNINGS["learnings"], SAMPLE_LEARNINGS["visitedUrls"], query)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--searches", type=int, default=4)
+    parser.add_argument("--research-latency", type=float, default=1.0)
+    parser.add_argument("--synthesis-latency", type=float, default=1.5)
+    args = parser.parse_args()
+
+    app = create_mock_app(llm_latency=0.05, research_latency=args.research_latency,
+                          synthesis_latency=args.synthesis_latency)
+    with MockServer(app) as server:
+        os.environ.update({
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": f"{server.url}/v1",
+            "DEEP_RESEARCH_API_URL": server.url,
+            "RESEARCH_CACHE_PATH": ":memory:",
+            "RESOURCE_INDEX_PATH": ":memory:",
+            "SERP_FAST_PATH": "false",
+            "RESOURCE_DB_FAST_PATH": "false",
+        })
+        import resource_finder
+        import resource_index
+
+        results = asyncio.run(both_modes(resource_finder, args.searches))
+        rendering = render_ms(resource_index, "Search for emergency shelter for LGBTQ youth in San Francisco")
+
+    print("=" * 72)
+    print(f"{args.searches} searches, research {args.research_latency:g}s + report writing {args.synthesis_latency:g}s")
+    print("-" * 72)
+    for mode, (timings, names) in results.items():
+        print(f"{mode:<10} p50: {statistics.median(timings):5.2f}s per search   resources found: {len(names)}")
+    print(f"local rendering of {len(SAMPLE_LEARNINGS['learnings'])} learnings: {rendering:.2f} ms")
+    print("=" * 72)
+
+    report_names, learning_names = results["report"][1], results["learnings"][1]
+    missing = report_names - learning_names
+    failed = False
+    if len(missing) > len(report_names) // 4:
+        print(f"✗ The rendered report misses resources the written one has: {sorted(missing)}")
+        failed = True
+    speedup = statistics.median(results["report"][0]) / statistics.median(results["learnings"][0])
+    if speedup < 1.2:
+        print(f"✗ Expected skipping report writing to speed up searches (got {speedup:.2f}x)")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print(f"✓ Local rendering found {len(learning_names & report_names)}/{len(report_names)} of the same resources, "
+          f"{speedup:.1f}x faster per search")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmark for retries, circuit breaking and stale fallback on deep-research calls.
+
+Runs against the mock servers:
+  1. a flaky deep-research API (a fraction of reports fail with HTTP 500), with and without
+     retries, comparing how many searches succeed;
+  2. a deep-research API that is down, with and without the circuit breaker, comparing how
+     long failing searches take and how many requests reach the dead server;
+  3. an expired cached report while the API is down, which should be served stale;
+  4. a half-open probe cancelled by a deadline, after which the next probe should go through.
+
+Usage:
+    python tests/benchmark_outbound.py [--searches 40] [--error-rate 0.3]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(ROOT_DIR))
+
+from mock_servers import MockServer, create_mock_app
+
+
+async def use_server(resource_finder, server) -> None:
+    """Points the pooled deep-research client at another mock server."""
+    await resource_finder.aclose_http_client()
+    resource_finder.DEEP_RESEARCH_API_URL = server.url
+
+
+def configure(outbound, attempts: int, failure_threshold: int) -> None:
+    outbound.DEEP_RESEARCH.policy = outbound.RetryPolicy(attempts=attempts, base_delay=0.05, max_delay=0.5)
+    outbound.DEEP_RESEARCH.breaker = outbound.CircuitBreaker(failure_threshold=failure_threshold, reset_seconds=2)
+
+
+async def searches(resource_finder, count: int, concurrent: bool) -> tuple:
+    """Runs count uncached research calls; returns (successes, wall seconds)."""
+    async def one(i: int) -> bool:
+        try:
+            await resource_finder.call_deep_research_async(f"shelter in city {i}", timeout=10)
+            return True
+        except Exception:
+            return False
+
+    start = time.perf_counter()
+    if concurrent:
+        outcomes = await asyncio.gather(*(one(i) for i in range(count)))
+    else:
+        outcomes = [await one(i) for i in range(count)]
+    return sum(outcomes), time.perf_counter() - start
+
+
+async def run(resource_finder, outbound, flaky, down, count: int, error_rate: float) -> None:
+    failed = False
+    print("=" * 72)
+
+    await use_server(resource_finder, flaky.server)
+    print(f"{count} searches, {error_rate:.0%} of reports failing with HTTP 500")
+    print("-" * 72)
+    succeeded = {}
+    for attempts in (1, 3):
+        configure(outbound, attempts, failure_threshold=count)
+        retries_before = outbound.RETRIES.value(service="deep_research")
+        ok, wall = await searches(resource_finder, count, concurrent=True)
+        succeeded[attempts] = ok
+        retries = outbound.RETRIES.value(service="deep_research") - retries_before
+        print(f"attempts={attempts}   succeeded: {ok:>3}/{count}   retries: {retries:>3.0f}   wall: {wall:5.2f}s")
+    if succeeded[3] <= succeeded[1]:
+        print("✗ Expected retries to recover failed searches")
+        failed = True
+
+    await use_server(resource_finder, down.server)
+    print("-" * 72)
+    print(f"{count} searches one after another while the deep-research API is down")
+    print("-" * 72)
+    walls = {}
+    for threshold in (count * 3 + 1, 5):
+        configure(outbound, 3, failure_threshold=threshold)
+        calls_before = down.app.state.research_calls
+        _, wall = await searches(resource_finder, count, concurrent=False)
+        walls[threshold] = wall
+        label = "with breaker" if threshold == 5 else "without breaker"
+        print(f"{label:<16} requests to dead server: {down.app.state.research_calls - calls_before:>3}   "
+              f"wall: {wall:5.2f}s   circuit: {outbound.DEEP_RESEARCH.breaker.state}")
+    if walls[5] >= walls[count * 3 + 1]:
+        print("✗ Expected the open circuit to fail fast")
+        failed = True
+
+    print("-" * 72)
+    query = "Search for emergency shelter for youth in Oakland"
+    cache = resource_finder.research_cache
+    cache.put(resource_finder.research_cache_key(query, 1, 2), query, "# Stale report")
+    ttl = cache.ttl_seconds
+    cache.ttl_seconds = 0
+    await asyncio.sleep(0.01)
+    try:
+        report = await resource_finder.call_deep_research_cached_async(query, timeout=10)
+        print(f"expired report served while the API is down: {report == '# Stale report'}")
+    except Exception as e:
+        report = None
+        print(f"stale fallback failed: {e}")
+    finally:
+        cache.ttl_seconds = ttl
+    if report != "# Stale report":
+        failed = True
+
+    print("-" * 72)
+    service = outbound.OutboundService("probe", outbound.http_transient, outbound.RetryPolicy(attempts=1),
+                                       outbound.CircuitBreaker(failure_threshold=1, reset_seconds=0.2))
+    service.breaker.record_failure()
+    await asyncio.sleep(0.25)
+    try:
+        await asyncio.wait_for(service.acall(asyncio.sleep, 10), timeout=0.05)
+    except asyncio.TimeoutError:
+        pass
+    await asyncio.sleep(0.25)
+    try:
+        recovered = await service.acall(asyncio.sleep, 0, "ok") == "ok"
+    except outbound.CircuitOpenError:
+        recovered = False
+    print(f"probe after a cancelled probe went through: {recovered}   circuit: {service.breaker.state}")
+    if not recovered:
+        print("✗ Expected a cancelled probe to let the circuit probe again")
+        failed = True
+
+    print("=" * 72)
+    if failed:
+        sys.exit(1)
+    print("✓ Retries recovered transient failures, the breaker failed fast, stale reports were served "
+          "and a cancelled probe did not wedge the circuit")
+
+
+class Mock:
+    def __init__(self, research_error_rate: float, research_latency: float):
+        self.app = create_mock_app(llm_latency=0.05, research_latency=research_latency,
+                                   research_error_rate=research_error_rate)
+        self.server = MockServer(self.app)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--searches", type=int, default=40)
+    parser.add_argument("--error-rate", type=float, default=0.3)
+    args = parser.parse_args()
+
+    flaky, down = Mock(args.error_rate, 0.2), Mock(1.0, 0.05)
+    with flaky.server, down.server:
+        os.environ.update({
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": f"{flaky.server.url}/v1",
+            "DEEP_RESEARCH_API_URL": flaky.server.url,
+            "RESEARCH_CACHE_PATH": ":memory:",
+        })
+        import outbound
+        import resource_finder
+        asyncio.run(run(resource_finder, outbound, flaky, down, args.searches, args.error_rate))
+
+
+if __name__ == "__main__":
+    main()
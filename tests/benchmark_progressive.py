@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark for progressive (tiered) research.
+
+Runs find_eligible_resources_progressive against mock OpenAI and deep-research servers and
+reports when the quick and deep results arrive, compared with a single deep run. A second
+scenario gives the deep tier a deadline shorter than its research time to check that the
+request is cancelled on time and the quick results are kept; a third gives it a budget no
+deeper run fits, which keeps the quick results without starting one.
+
+Usage:
+    python tests/benchmark_progressive.py [--research-latency 4] [--llm-latency 0.2]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(ROOT_DIR))
+
+from mock_servers import MockServer, create_mock_app
+
+CONVERSATION = [
+    {"role": "user", "content": "I'm 19, LGBTQ, in San Francisco. I need somewhere to sleep and food."},
+]
+
+
+async def timed_run(resource_finder, **tiers) -> tuple:
+    resource_finder.research_cache.clear()
+    start = time.perf_counter()
+    arrivals = []
+
+    def on_progress(stage, details):
+        if stage == "result":
+            arrivals.append((details["tier"], time.perf_counter() - start))
+
+    result = await resource_finder.find_eligible_resources_progressive(
+        CONVERSATION, on_progress=on_progress, **tiers
+    )
+    return arrivals, result["tier"], time.perf_counter() - start
+
+
+async def run(resource_finder, app, research_latency: float) -> None:
+    quick = resource_finder.ResearchTier("quick", breadth=2, depth=1,
+                                         budget_seconds=research_latency, deadline_seconds=research_latency * 2)
+    deep = resource_finder.ResearchTier("deep", breadth=4, depth=2,
+                                        budget_seconds=research_latency * 2, deadline_seconds=research_latency * 4)
+
+    # Baseline: the single deep run the chatbot used to wait for
+    resource_finder.research_cache.clear()
+    start = time.perf_counter()
+    await resource_finder.find_eligible_resources_async(CONVERSATION, breadth=deep.breadth, depth=deep.depth)
+    baseline = time.perf_counter() - start
+
+    arrivals, tier, total = await timed_run(resource_finder, quick=quick, deep=deep)
+    print(f"Single deep run:                 {baseline:6.2f}s")
+    for name, at in arrivals:
+        print(f"Progressive, first {name + ' result:':<13} {at:6.2f}s")
+    print(f"Progressive, final ({tier}) result: {total:6.2f}s")
+
+    # Budgeted for a normal deep run, on a server that has become slower than that
+    deadline = research_latency / 2
+    short = resource_finder.ResearchTier("deep", breadth=4, depth=2, budget_seconds=research_latency * 2,
+                                         deadline_seconds=deadline)
+    arrivals, tier, total = await timed_run(resource_finder, quick=quick, deep=short)
+    deep_ran_for = total - arrivals[-1][1]
+    print(f"\nDeep tier with a {deadline:g}s deadline: returned {tier} results after {total:.2f}s "
+          f"(deep tier gave up after {deep_ran_for:.2f}s)")
+
+    tight = resource_finder.ResearchTier("deep", breadth=4, depth=2, budget_seconds=research_latency / 4,
+                                         deadline_seconds=research_latency * 4)
+    calls_before = app.state.research_calls
+    arrivals, tight_tier, tight_total = await timed_run(resource_finder, quick=quick, deep=tight)
+    # The quick tier's runs, one per need
+    deep_runs = app.state.research_calls - calls_before - 2
+    print(f"Deep tier with a {tight.budget_seconds:g}s budget: returned {tight_tier} results after "
+          f"{tight_total:.2f}s ({deep_runs} deep runs)")
+    if tier != "quick" or deep_ran_for > deadline + 0.5 or tight_tier != "quick" or deep_runs:
+        print("✗ Expected the quick results to be kept")
+        sys.exit(1)
+    print("✓ Deep request cancelled at its deadline; no deep run started when none fit its budget")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--research-latency", type=float, default=4.0,
+                        help="seconds per mock report at depth 2 (depth 1 takes half)")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    app = create_mock_app(llm_latency=args.llm_latency, research_latency=args.research_latency)
+    with MockServer(app) as server:
+        os.environ.update({
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": f"{server.url}/v1",
+            "DEEP_RESEARCH_API_URL": server.url,
+            "RESEARCH_CACHE_PATH": ":memory:",
+            "RESOURCE_INDEX_PATH": ":memory:",
+            "RESOURCE_DB_FAST_PATH": "false",
+        })
+        import resource_finder
+
+        asyncio.run(run(resource_finder, app, args.research_latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark for search-query extraction: local rules and memo cache versus the LLM call.
+
+Extracts queries for a set of sample conversations twice (the second pass repeats the
+same conversations, as follow-up tool calls do) against a mock OpenAI server, first with
+LLM-only extraction and then with local extraction and memoization enabled. Also checks the
+population groups read from messages that mention ages and abuse in passing.
+With --live, uses the real OpenAI API instead of the mock (needs OPENAI_API_KEY).
+
+Usage:
+    python tests/benchmark_query_extraction.py [--llm-latency 2.0] [--live]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(ROOT_DIR))
+
+from mock_servers import MockServer, create_mock_app
+
+CONVERSATIONS = [
+    [
+        {"role": "user", "content": "Hi, I need help. I'm homeless and don't know where to go."},
+        {"role": "assistant", "content": "I'm here to help. What city are you in?"},
+        {"role": "user", "content": "I'm in San Francisco."},
+        {"role": "assistant", "content": "What are your most urgent needs right now?"},
+        {"role": "user", "content": "I need a place to sleep tonight and I haven't eaten in a day. I'm 19 and LGBTQ."},
+    ],
+    [{"role": "user", "content": "I'm a veteran in Los Angeles looking for housing and a job."}],
+    [{"role": "user", "content": "My kids and I need a family shelter in Seattle, and childcare so I can work."}],
+    [{"role": "user", "content": "Where can I get a shower and do laundry in Portland?"}],
+    [{"role": "user", "content": "I'm 67 and need a clinic and food pantry in Chicago."}],
+    # Ambiguous: no city, two cities, or a negated need
+    [{"role": "user", "content": "I just got out of the hospital and have nowhere to go."}],
+    [{"role": "user", "content": "I'm leaving Oakland for Sacramento next week, I need housing there."}],
+    [{"role": "user", "content": "I'm in SF. I don't need food, I need somewhere safe from my ex."}],
+]
+
+# Message -> population groups local extraction should find
+GROUP_CASES = [
+    ("I've been homeless for 20 years in Seattle and need a shelter.", ()),
+    ("I'm 19 years old and need a shelter in Seattle.", ("youth",)),
+    ("I need substance abuse treatment in Seattle.", ()),
+    ("I'm escaping domestic abuse and need a shelter in Seattle.", ("domestic_violence",)),
+]
+
+# Message -> needs local extraction should find
+NEED_CASES = [
+    ("I am in SF and need a bed. I work at a bar.", ("shelter",)),
+    ("I'm in Oakland, out of work and need to find work.", ("employment",)),
+]
+
+
+def run_pass(resource_finder, label: str) -> list:
+    samples = []
+    for conversation in CONVERSATIONS * 2:
+        start = time.perf_counter()
+        resource_finder.extract_search_query_from_conversation(conversation)
+        samples.append(time.perf_counter() - start)
+    print(f"{label:<26} mean {statistics.mean(samples) * 1000:8.1f} ms   "
+          f"total {sum(samples):6.2f}s for {len(samples)} extractions")
+    return samples
+
+
+def run() -> None:
+    import resource_finder
+
+    resource_finder.LOCAL_QUERY_EXTRACTION = False
+    resource_finder.QUERY_MEMO_SIZE = 0
+    baseline = run_pass(resource_finder, "LLM every time")
+
+    resource_finder.LOCAL_QUERY_EXTRACTION = True
+    resource_finder.QUERY_MEMO_SIZE = 1024
+    resource_finder._query_memo.clear()
+    optimized = run_pass(resource_finder, "Local rules + memo")
+
+    local = sum(1 for c in CONVERSATIONS if resource_finder.profile_conversation(c) is not None)
+    print(f"\nAnswered locally: {local}/{len(CONVERSATIONS)} conversations; the rest call the LLM once "
+          f"and then hit the memo")
+    print(f"Speed-up: {sum(baseline) / sum(optimized):.1f}x")
+
+    wrong = []
+    for message, expected in GROUP_CASES:
+        profile = resource_finder.profile_conversation([{"role": "user", "content": message}])
+        if profile is None or profile.demographics != expected:
+            wrong.append((message, profile and profile.demographics))
+    for message, found in wrong:
+        print(f"✗ Expected {dict(GROUP_CASES)[message]} as groups, got {found}: {message}")
+    wrong_needs = []
+    for message, expected in NEED_CASES:
+        profile = resource_finder.profile_conversation([{"role": "user", "content": message}])
+        if profile is None or profile.needs != expected:
+            wrong_needs.append((message, profile and profile.needs))
+    for message, found in wrong_needs:
+        print(f"✗ Expected {dict(NEED_CASES)[message]} as needs, got {found}: {message}")
+    if wrong or wrong_needs:
+        sys.exit(1)
+    print(f"✓ Population groups and needs read correctly in {len(GROUP_CASES) + len(NEED_CASES)} conversations")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="seconds per mock LLM call")
+    parser.add_argument("--live", action="store_true", help="use the real OpenAI API")
+    args = parser.parse_args()
+
+    if args.live:
+        run()
+        return
+    with MockServer(create_mock_app(llm_latency=args.llm_latency)) as server:
+        os.environ.update({
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": f"{server.url}/v1",
+            "RESEARCH_CACHE_PATH": ":memory:",
+            "RESOURCE_INDEX_PATH": ":memory:",
+        })
+        run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the persistent resource index.
+
+Against the mock servers:
+  1. researches one city and need, expires the report cache, and answers the same need
+     again from the index instead of a new research run;
+  2. re-indexes the same report (every record unchanged) and a report with one changed
+     record, counting what was rewritten;
+  3. checks that records for one population group don't cover searches for another, and that
+     re-loading an old snapshot does not make its records look freshly verified;
+  4. times nearest-resource lookups among many records with coordinates, with the R*Tree
+     spatial index and with a plain coordinate scan.
+
+Usage:
+    python tests/benchmark_resource_db.py [--records 20000] [--lookups 500]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(ROOT_DIR))
+
+from mock_servers import SAMPLE_REPORT, MockServer, create_mock_app
+
+
+def percentile_ms(samples, q: float) -> float:
+    return statistics.quantiles(samples, n=100)[int(q) - 1] * 1000
+
+
+async def repeat_search(resource_finder, app) -> tuple:
+    conversation = [{"role": "user", "content": "I'm in Oakland and I need food"}]
+    start = time.perf_counter()
+    first = await resource_finder.find_eligible_resources_async(conversation)
+    cold = time.perf_counter() - start
+
+    resource_finder.research_cache.clear()
+    calls_before = app.state.research_calls
+    start = time.perf_counter()
+    second = await resource_finder.find_eligible_resources_async(
+        [{"role": "user", "content": "where can I get a free meal in oakland"}]
+    )
+    return first["source"], cold, second["source"], time.perf_counter() - start, app.state.research_calls - calls_before
+
+
+def change_detection(resource_index_module, resource_finder) -> tuple:
+    index = resource_finder.resource_index
+    changes = resource_index_module.RECORD_CHANGES
+    query = "Search for food assistance in Oakland, California"
+    before = {c: changes.value(change=c) for c in ("new", "changed", "unchanged")}
+    resource_finder.index_report(query, SAMPLE_REPORT)
+    records = resource_index_module.parse_report(SAMPLE_REPORT, source=query)
+    edited = SAMPLE_REPORT.replace(records[0].phone, "(510) 555-0100", 1) if records[0].phone else SAMPLE_REPORT
+    resource_finder.index_report(query, edited)
+    after = {c: changes.value(change=c) - before[c] for c in before}
+    return len(records), after, len(index)
+
+
+def coverage_checks(resource_index_module) -> dict:
+    index = resource_index_module.ResourceIndex(":memory:")
+    youth_meals = [
+        resource_index_module.ResourceRecord(name=f"Youth Meal Program {i}", services="free meals for youth",
+                                             location="oakland")
+        for i in range(3)
+    ]
+    index.add(youth_meals)
+    # A month-old snapshot, loaded twice (as on two process starts)
+    month_ago = time.time() - 30 * 86400
+    old_shelters = [
+        resource_index_module.ResourceRecord(name=f"Shelter {i}", services="emergency shelter", location="oakland")
+        for i in range(3)
+    ]
+    for _ in range(2):
+        index.add(old_shelters, verified_at=month_ago)
+    return {
+        "youth search covered": index.covers("Search for food for youth in Oakland"),
+        "general search covered": index.covers("Search for food in Oakland"),
+        "veteran search covered": index.covers("Search for food for veterans in Oakland"),
+        "old snapshot covered": index.covers("Search for emergency shelter in Oakland", max_age=7 * 86400),
+    }
+
+
+def nearest_timings(resource_index_module, records: int, lookups: int, spatial: bool) -> list:
+    index = resource_index_module.ResourceIndex(":memory:")
+    index.spatial = index.spatial and spatial
+    rng = random.Random(7)
+    # Spread over the Bay Area
+    index.add(
+        resource_index_module.ResourceRecord(
+            name=f"Resource {i}", address=f"{i} Market St", location="san francisco",
+            latitude=37.2 + rng.random() * 0.8, longitude=-122.6 + rng.random() * 0.8,
+        )
+        for i in range(records)
+    )
+    timings = []
+    for _ in range(lookups):
+        lat, lon = 37.3 + rng.random() * 0.6, -122.5 + rng.random() * 0.6
+        start = time.perf_counter()
+        index.nearest(lat, lon, k=8, radius_km=2)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--research-latency", type=float, default=2.0)
+    args = parser.parse_args()
+
+    app = create_mock_app(llm_latency=0.05, research_latency=args.research_latency)
+    with MockServer(app) as server, tempfile.TemporaryDirectory() as state_dir:
+        os.environ.update({
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": f"{server.url}/v1",
+            "DEEP_RESEARCH_API_URL": server.url,
+            "RESEARCH_CACHE_PATH": ":memory:",
+            "RESOURCE_INDEX_PATH": os.path.join(state_dir, "resources.sqlite3"),
+            "SERP_FAST_PATH": "false",
+        })
+        import resource_finder
+        import resource_index
+
+        first_source, cold, second_source, warm, research_runs = asyncio.run(repeat_search(resource_finder, app))
+        parsed, changes, stored = change_detection(resource_index, resource_finder)
+        coverage = coverage_checks(resource_index)
+
+    rtree = nearest_timings(resource_index, args.records, args.lookups, spatial=True)
+    scan = nearest_timings(resource_index, args.records, args.lookups, spatial=False)
+
+    print("=" * 72)
+    print("Same need in the same city, after the report cache expired")
+    print("-" * 72)
+    print(f"first search   source: {first_source:<9} {cold * 1000:8.1f} ms")
+    print(f"second search  source: {second_source:<9} {warm * 1000:8.1f} ms   research runs: {research_runs}")
+    print("-" * 72)
+    print(f"Re-indexing a {parsed}-record report, then the same report with one phone number changed")
+    print("-" * 72)
+    print(f"new: {changes['new']:.0f}   changed: {changes['changed']:.0f}   unchanged: {changes['unchanged']:.0f}   "
+          f"stored: {stored}")
+    print("-" * 72)
+    print("   ".join(f"{label}: {covered}" for label, covered in coverage.items()))
+    print("-" * 72)
+    print(f"nearest(k=8, 2 km) among {args.records} records, {args.lookups} lookups")
+    print("-" * 72)
+    for label, timings in (("R*Tree", rtree), ("coordinate scan", scan)):
+        print(f"{label:<16} p50: {percentile_ms(timings, 50):7.3f} ms   p99: {percentile_ms(timings, 99):7.3f} ms")
+    print("=" * 72)
+
+    failed = False
+    if second_source != "database" or research_runs:
+        print("✗ Expected the index to answer the repeated search without research")
+        failed = True
+    if changes["changed"] != 1 or changes["new"]:
+        print("✗ Expected exactly one changed record and no new ones")
+        failed = True
+    expected = {"youth search covered": True, "general search covered": True,
+                "veteran search covered": False, "old snapshot covered": False}
+    if coverage != expected:
+        print("✗ Expected youth records to cover only youth and general searches, and an old snapshot "
+              "to stay old when reloaded")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print(f"✓ Repeated search answered from the index {cold / warm:.0f}x faster; only the changed record was rewritten")
+
+
+if __name__ == "__main__":
+    main()
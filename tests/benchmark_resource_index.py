@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Prompt-size benchmark for structured resource records versus raw research reports.
+
+Compares the tool message the chatbot's second LLM call used to receive (the whole report
+as JSON) with the compact top-k records returned now, and times parsing and lookup.
+With --live, also times the second gpt-4o-mini call for both payloads (needs OPENAI_API_KEY).
+
+Usage:
+    python tests/benchmark_resource_index.py [--report tests/fixtures/sample_report.md] [--top-k 5] [--live]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from resource_index import ResourceIndex, parse_report, records_to_json
+
+QUERY = "Search for emergency shelter and food assistance for LGBTQ youth in San Francisco"
+
+
+def count_tokens(text: str) -> int:
+    try:
+        import tiktoken
+        return len(tiktoken.encoding_for_model("gpt-4o-mini").encode(text))
+    except ImportError:
+        return len(text) // 4  # rough estimate for English text
+
+
+def time_second_call(tool_content: str, runs: int) -> float:
+    from openai import OpenAI
+
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    messages = [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": "I'm 19, LGBTQ, in San Francisco and need a place to sleep tonight and food."},
+        {"role": "assistant", "content": "", "tool_calls": [{
+            "id": "call_1", "type": "function",
+            "function": {"name": "search_eligible_resources", "arguments": "{}"},
+        }]},
+        {"role": "tool", "tool_call_id": "call_1", "content": tool_content},
+    ]
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        client.chat.completions.create(model="gpt-4o-mini", messages=messages)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--report", default=os.path.join(ROOT_DIR, "tests", "fixtures", "sample_report.md"))
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--live", action="store_true")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.report) as f:
+        report = f.read()
+
+    start = time.perf_counter()
+    records = parse_report(report, source=QUERY)
+    parse_ms = (time.perf_counter() - start) * 1000
+
+    index = ResourceIndex(":memory:")
+    index.add(records)
+    start = time.perf_counter()
+    top = index.search(QUERY, k=args.top_k)
+    search_ms = (time.perf_counter() - start) * 1000
+
+    raw_payload = json.dumps(report)
+    compact_payload = json.dumps(
+        {"query": QUERY, "resources": json.loads(records_to_json(top))}, separators=(",", ":"), ensure_ascii=False
+    )
+    raw_tokens = count_tokens(raw_payload)
+    compact_tokens = count_tokens(compact_payload)
+
+    print("=" * 80)
+    print("STRUCTURED RESOURCE INDEX BENCHMARK")
+    print("=" * 80)
+    print(f"Records parsed from report:   {len(records)} ({parse_ms:.1f} ms)")
+    print(f"Top-{args.top_k} lookup:                {search_ms:.2f} ms")
+    print(f"Tool message, raw report:     {raw_tokens:>6} tokens")
+    print(f"Tool message, top-k records:  {compact_tokens:>6} tokens")
+    print(f"Reduction:                    {raw_tokens / compact_tokens:.1f}x")
+    if args.live:
+        raw_latency = time_second_call(raw_payload, args.runs)
+        compact_latency = time_second_call(compact_payload, args.runs)
+        print(f"Second LLM call, raw report:  {raw_latency:.2f}s (median of {args.runs})")
+        print(f"Second LLM call, records:     {compact_latency:.2f}s (median of {args.runs})")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
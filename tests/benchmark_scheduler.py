@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Benchmark for urgency-aware scheduling of deep research.
+
+Runs uncached research calls against the mock servers through a few research slots:
+  1. a burst of long-term planning searches followed by a few urgent ones, first through a
+     first-come, first-served semaphore and then through the ResearchScheduler, comparing
+     how long the urgent searches wait;
+  2. one planning search under a steady stream of urgent ones, with and without aging,
+     to show planning work is not starved;
+  3. an urgent search joining the queued planning run for the same query, which should
+     lift that run to the front of the queue.
+Queue waits per class are read from the research_queue_wait_seconds histogram.
+
+Usage:
+    python tests/benchmark_scheduler.py [--planning 12] [--urgent 4] [--research-latency 0.5]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(ROOT_DIR))
+
+from mock_servers import MockServer, create_mock_app
+
+
+def city_query(tag: str, i: int) -> str:
+    # A different (made-up) city each time, so searches neither coalesce nor hit the cache
+    return f"Search for emergency shelter in {tag.title()}{i}ville"
+
+
+async def timed_search(resource_finder, query: str, limiter, delay: float = 0) -> float:
+    """Seconds from submitting the search (after delay) to having its report."""
+    await asyncio.sleep(delay)
+    start = time.perf_counter()
+    await resource_finder.call_deep_research_cached_async(query, limiter=limiter, timeout=60)
+    return time.perf_counter() - start
+
+
+async def burst(resource_finder, limiters: dict, planning: int, urgent: int, tag: str) -> dict:
+    """Planning searches at t=0 and urgent ones just after; returns seconds per class."""
+    tasks = {
+        "planning": [timed_search(resource_finder, city_query(tag + "plan", i), limiters["planning"])
+                     for i in range(planning)],
+        "urgent": [timed_search(resource_finder, city_query(tag + "urgent", i), limiters["urgent"], delay=0.05)
+                   for i in range(urgent)],
+    }
+    results = await asyncio.gather(*(asyncio.gather(*t) for t in tasks.values()))
+    return dict(zip(tasks, results))
+
+
+async def starvation(resource_finder, scheduler, arrivals: int, interval: float, tag: str) -> float:
+    """Seconds until one planning search finishes while urgent ones arrive faster than they are served."""
+    urgent = [
+        asyncio.create_task(timed_search(
+            resource_finder, city_query(tag + "urgent", i), scheduler.limiter("urgent"), delay=i * interval
+        ))
+        for i in range(arrivals)
+    ]
+    waited = await timed_search(
+        resource_finder, city_query(tag + "plan", 0), scheduler.limiter("planning"), delay=0.05
+    )
+    await asyncio.gather(*urgent)
+    return waited
+
+
+async def escalation(resource_finder, scheduler, backlog: int) -> tuple:
+    """(urgent joiner's seconds, position among the queued runs it finished in)."""
+    finished = []
+
+    async def search(query: str, urgency: str) -> float:
+        waited = await timed_search(resource_finder, query, scheduler.limiter(urgency))
+        finished.append(query)
+        return waited
+
+    shared = city_query("shared", 0)
+    normal = [asyncio.create_task(search(city_query("normal", i), "normal")) for i in range(backlog)]
+    await asyncio.sleep(0)
+    planned = asyncio.create_task(search(shared, "planning"))
+    await asyncio.sleep(0.05)
+    joined = await search(shared, "urgent")
+    await asyncio.gather(planned, *normal)
+    # The planning run and its urgent joiner share one entry; two normal runs hold the slots first
+    return joined, finished.index(shared) + 1
+
+
+async def run(resource_finder, research_scheduler, args) -> None:
+    failed = False
+    wait_before = research_scheduler.QUEUE_WAIT.totals()
+    print("=" * 72)
+    print(f"{args.planning} planning searches, then {args.urgent} urgent ones, through 2 research slots")
+    print("-" * 72)
+    fifo = asyncio.Semaphore(2)
+    scheduler = research_scheduler.ResearchScheduler(capacity=2)
+    bursts = {
+        "first come, first served": await burst(resource_finder, {"planning": fifo, "urgent": fifo},
+                                                args.planning, args.urgent, "fifo"),
+        "urgency scheduler": await burst(resource_finder, {u: scheduler.limiter(u) for u in ("planning", "urgent")},
+                                         args.planning, args.urgent, "scheduled"),
+    }
+    for label, times in bursts.items():
+        print(f"{label:<26} urgent p50: {statistics.median(times['urgent']):5.2f}s   "
+              f"planning p50: {statistics.median(times['planning']):5.2f}s   "
+              f"all done: {max(max(t) for t in times.values()):5.2f}s")
+    fifo_urgent = statistics.median(bursts["first come, first served"]["urgent"])
+    scheduled_urgent = statistics.median(bursts["urgency scheduler"]["urgent"])
+    if scheduled_urgent >= fifo_urgent / 2:
+        print("✗ Expected urgent searches to jump the planning queue")
+        failed = True
+
+    print("-" * 72)
+    arrivals, interval = 15, args.research_latency * 0.8
+    print(f"one planning search while {arrivals} urgent ones arrive every {interval:g}s, one research slot")
+    print("-" * 72)
+    waits = {}
+    for aging in (0, 1.0):
+        scheduler = research_scheduler.ResearchScheduler(capacity=1, aging_seconds=aging)
+        waits[aging] = await starvation(resource_finder, scheduler, arrivals, interval, f"aging{aging:g}")
+        label = f"aging every {aging:g}s" if aging else "no aging"
+        print(f"{label:<26} planning search done after {waits[aging]:5.2f}s")
+    if waits[1.0] >= waits[0]:
+        print("✗ Expected aging to run the planning search before the urgent backlog drained")
+        failed = True
+
+    print("-" * 72)
+    scheduler = research_scheduler.ResearchScheduler(capacity=2, aging_seconds=0)
+    joined, position = await escalation(resource_finder, scheduler, backlog=6)
+    print(f"urgent search joining a queued planning run: {joined:5.2f}s, finished {position} of 7")
+    if position > 3:
+        print("✗ Expected the joined run to be lifted ahead of the normal queue")
+        failed = True
+
+    print("-" * 72)
+    print("research_queue_wait_seconds by urgency (mean)")
+    for (urgency,), (count, total) in sorted(research_scheduler.QUEUE_WAIT.totals().items()):
+        count -= wait_before.get((urgency,), (0, 0))[0]
+        total -= wait_before.get((urgency,), (0, 0))[1]
+        print(f"  {urgency:<10} runs: {count:>3}   mean wait: {total / max(count, 1):5.2f}s")
+    print("=" * 72)
+    if failed:
+        sys.exit(1)
+    print(f"✓ Urgent searches waited {fifo_urgent / scheduled_urgent:.1f}x less; "
+          f"planning work still ran under urgent load")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--planning", type=int, default=12)
+    parser.add_argument("--urgent", type=int, default=4)
+    parser.add_argument("--research-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    app = create_mock_app(llm_latency=0.05, research_latency=args.research_latency)
+    with MockServer(app) as server:
+        os.environ.update({
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": f"{server.url}/v1",
+            "DEEP_RESEARCH_API_URL": server.url,
+            "RESEARCH_CACHE_PATH": ":memory:",
+        })
+        import research_scheduler
+        import resource_finder
+        asyncio.run(run(resource_finder, research_scheduler, args))
+
+
+if __name__ == "__main__":
+    main()
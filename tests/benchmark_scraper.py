@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the MCP scraping tools' page fetcher.
+
+Serves resource pages from a local mock site (with ETags, a robots.txt and per-page
+latency) and batch-scrapes them three times: with a cold page cache, after the TTL has
+passed (pages are revalidated with If-None-Match and come back as 304), and within the TTL
+(served from disk). Compares the cold batch with fetching the same pages one by one.
+Then checks that a slow, rate-limited batch on one host does not hold up another host's page,
+and that internal addresses are refused, directly or through a redirect.
+
+Usage:
+    python tests/benchmark_scraper.py [--pages 20] [--page-latency 0.3]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(ROOT_DIR))
+sys.path.append(os.path.join(os.path.dirname(ROOT_DIR), "backend"))
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import RedirectResponse
+
+from mock_servers import MockServer
+import page_fetcher
+from page_fetcher import PageCache, PageFetcher
+
+
+def create_site(page_latency: float) -> FastAPI:
+    app = FastAPI()
+    app.state.downloads = 0
+
+    @app.get("/robots.txt")
+    async def robots():
+        return Response("User-agent: *\nDisallow: /private/\n", media_type="text/plain")
+
+    @app.get("/redirect")
+    async def redirect(to: str):
+        return RedirectResponse(to)
+
+    @app.get("/{section}/{page}")
+    async def page(section: str, page: str, request: Request):
+        await asyncio.sleep(page_latency)
+        html = (f"<html><head><title>Resource {page}</title><style>p {{}}</style></head>"
+                f"<body><h1>Shelter {page}</h1><p>Beds every night. Call (415) 555-01{page[-2:]:0>2}.</p></body></html>")
+        etag = '"' + hashlib.sha256(html.encode()).hexdigest()[:16] + '"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        app.state.downloads += 1
+        return Response(html, media_type="text/html", headers={"ETag": etag})
+
+    return app
+
+
+async def batch(fetcher: PageFetcher, urls: list) -> tuple:
+    start = time.perf_counter()
+    pages = await fetcher.fetch_many(urls)
+    return time.perf_counter() - start, pages
+
+
+async def run(site, url: str, n_pages: int, cache_dir: str) -> None:
+    # Two host names for the same server, so the per-host interval applies to each separately
+    hosts = [url, url.replace("127.0.0.1", "localhost")]
+    urls = [f"{hosts[i % 2]}/shelters/{i}" for i in range(n_pages)]
+    cache = PageCache(cache_dir, ttl_seconds=3600)
+    fetcher = PageFetcher(cache, max_concurrency=8, domain_interval=0.02, allow_internal=True)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        one_by_one = PageFetcher(PageCache(scratch, 3600), domain_interval=0.02, allow_internal=True)
+        await one_by_one.fetch_many(hosts)  # robots.txt for both hosts, not timed
+        sequential_start = time.perf_counter()
+        for page_url in urls[:4]:
+            await one_by_one.fetch(page_url)
+        sequential = (time.perf_counter() - sequential_start) / 4 * n_pages
+        await one_by_one.aclose()
+
+    rows = []
+    downloads = site.state.downloads
+    wall, pages = await batch(fetcher, urls)
+    rows.append(("cold cache", wall, pages, site.state.downloads - downloads))
+
+    cache.ttl_seconds = 0
+    fetcher._robots.clear()
+    downloads = site.state.downloads
+    wall, pages = await batch(fetcher, urls)
+    rows.append(("revalidated", wall, pages, site.state.downloads - downloads))
+
+    cache.ttl_seconds = 3600
+    downloads = site.state.downloads
+    wall, pages = await batch(fetcher, urls)
+    rows.append(("fresh cache", wall, pages, site.state.downloads - downloads))
+
+    blocked = await fetcher.fetch(f"{url}/private/notes")
+    await fetcher.aclose()
+
+    # 6 pages 0.3s apart on one host and 1 page on another, through 2 slots
+    with tempfile.TemporaryDirectory() as scratch:
+        polite = PageFetcher(PageCache(scratch, 3600), max_concurrency=2, domain_interval=0.3,
+                             respect_robots=False, allow_internal=True)
+        start = time.perf_counter()
+
+        async def other_host() -> float:
+            await asyncio.sleep(0.05)
+            await polite.fetch(f"{hosts[1]}/other/1")
+            return time.perf_counter() - start
+
+        *_, other_done = await asyncio.gather(*(polite.fetch(f"{hosts[0]}/busy/{i}") for i in range(6)), other_host())
+        await polite.aclose()
+
+    unsafe = await internal_fetches(url)
+
+    print("=" * 72)
+    print(f"{n_pages} pages, fetched one by one (estimated): {sequential:6.2f}s")
+    print("-" * 72)
+    for label, wall, pages, downloaded in rows:
+        states = {p.get("cache", "error") for p in pages}
+        print(f"{label:<14} wall: {wall:6.2f}s   downloads: {downloaded:>3}   cache: {', '.join(sorted(states))}")
+    print(f"robots.txt:    {blocked.get('error')}")
+    print(f"other host's page during a rate-limited batch: done after {other_done:.2f}s")
+    for label, result in unsafe.items():
+        print(f"{label:<24} {result.get('error', 'fetched')}")
+    print("=" * 72)
+    failed = False
+    if rows[1][3] != 0 or rows[2][3] != 0 or "error" not in blocked or rows[0][1] >= sequential:
+        print("✗ Expected concurrent fetches, no re-downloads of unchanged pages and robots.txt respected")
+        failed = True
+    if other_done >= 1.0:
+        print("✗ Expected the other host's page not to wait for the rate-limited host")
+        failed = True
+    if any("internal address" not in result.get("error", "") for result in unsafe.values()):
+        print("✗ Expected internal addresses to be refused")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("✓ Unchanged pages were never downloaded twice, other hosts were not held up by a rate-limited one "
+          "and internal addresses were refused")
+
+
+async def internal_fetches(url: str) -> dict:
+    """Fetches internal URLs with the default settings; the mock site itself counts as public here."""
+    site_port = int(url.rsplit(":", 1)[1])
+    check = page_fetcher.check_public_host
+
+    async def site_is_public(host, port=None):
+        return None if (host, port) == ("127.0.0.1", site_port) else await check(host, port)
+
+    page_fetcher.check_public_host = site_is_public
+    try:
+        with tempfile.TemporaryDirectory() as scratch:
+            fetcher = PageFetcher(PageCache(scratch, 3600), respect_robots=False)
+            internal = url.replace("127.0.0.1", "localhost")
+            results = {
+                "loopback": await fetcher.fetch(f"{internal}/shelters/1"),
+                "metadata endpoint": await fetcher.fetch("http://169.254.169.254/latest/meta-data/"),
+                "redirect to loopback": await fetcher.fetch(f"{url}/redirect?to={internal}/shelters/1"),
+            }
+            await fetcher.aclose()
+    finally:
+        page_fetcher.check_public_host = check
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--page-latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    site = create_site(args.page_latency)
+    with MockServer(site) as server, tempfile.TemporaryDirectory() as cache_dir:
+        asyncio.run(run(site, server.url, args.pages, cache_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark of memory use and query-extraction prompt size for the chat history stores.
+
+Simulates thousands of chat sessions and compares the old single global history with
+the per-session stores (in-memory and SQLite).
+
+Usage:
+    python tests/benchmark_session_store.py [--sessions 5000] [--turns 15]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from session_store import InMemorySessionStore, SQLiteSessionStore
+
+
+def simulated_turns(session: int, turns: int):
+    for turn in range(turns):
+        yield {"role": "user", "content": f"Session {session}: I'm in San Francisco and need a shelter tonight (turn {turn})."}
+        yield {"role": "assistant", "content": f"I can help with that. Can you tell me a bit more about your situation? (turn {turn})"}
+
+
+def prompt_chars(history) -> int:
+    # Same serialization extract_search_query_from_conversation uses
+    return len(json.dumps(history, indent=2))
+
+
+def run_global(sessions: int, turns: int):
+    chat_history = {"messages": []}
+    for session in range(sessions):
+        for message in simulated_turns(session, turns):
+            chat_history["messages"].append(message)
+    return chat_history, prompt_chars(chat_history["messages"])
+
+
+def run_store(store, sessions: int, turns: int):
+    for session in range(sessions):
+        for message in simulated_turns(session, turns):
+            store.append(f"session-{session}", message)
+    return store, prompt_chars(store.get_messages(f"session-{sessions - 1}"))
+
+
+def measure(label: str, fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept, prompt = fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{label:<28} {current / 1e6:>10.1f} MB {peak / 1e6:>10.1f} MB {prompt:>14,} {elapsed:>9.2f}s")
+    return kept
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--turns", type=int, default=15)
+    parser.add_argument("--max-messages", type=int, default=20)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"SESSION STORE BENCHMARK ({args.sessions} sessions x {args.turns * 2} messages)")
+    print("=" * 80)
+    print(f"{'Store':<28} {'Retained':>13} {'Peak':>13} {'Prompt chars':>14} {'Time':>10}")
+    print("-" * 80)
+
+    measure("Global chat_history", run_global, args.sessions, args.turns)
+    measure(
+        "InMemorySessionStore",
+        run_store, InMemorySessionStore(max_messages=args.max_messages), args.sessions, args.turns,
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        store = measure(
+            "SQLiteSessionStore",
+            run_store, SQLiteSessionStore(os.path.join(tmp, "sessions.sqlite3"), max_messages=args.max_messages),
+            args.sessions, args.turns,
+        )
+        size = os.path.getsize(os.path.join(tmp, "sessions.sqlite3"))
+        print(f"{'  (SQLite file on disk)':<28} {size / 1e6:>10.1f} MB")
+        store._conn.close()
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
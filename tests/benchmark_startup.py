@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the backend's cold start.
+
+Measures, each in a fresh interpreter as on a newly scaled-up worker:
+  1. the time to import backend/main.py, and whether the OpenAI SDK, httpx and requests
+     (imported on first use) stay out of it;
+  2. the backend started under uvicorn against the mock servers, with and without the
+     background warm-up: time until the port answers, until GET /ready returns 200, and
+     until the first POST /chat succeeds. With the warm-up, the first /chat should not pay
+     for creating and connecting the API clients.
+
+Usage:
+    python tests/benchmark_startup.py [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from mock_servers import MockServer, _free_port, create_mock_app
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED = ("openai", "httpx", "requests")
+
+IMPORT_MAIN = f"""
+import json, sys, time
+start = time.perf_counter()
+import main
+print(json.dumps({{"seconds": time.perf_counter() - start,
+                  "loaded": [m for m in {DEFERRED!r} if m in sys.modules]}}))
+"""
+
+
+def import_time(env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_MAIN], cwd=os.path.join(ROOT_DIR, "backend"), env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def cold_start(env: dict) -> dict:
+    """Seconds from launching uvicorn until it answers, until /ready is 200 and until the first /chat succeeds."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", os.path.join(ROOT_DIR, "backend"),
+         "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    times = {}
+    try:
+        with httpx.Client(base_url=url, timeout=60) as client:
+            while "ready" not in times:
+                if time.perf_counter() - start > 60:
+                    raise RuntimeError("Backend did not become ready")
+                try:
+                    response = client.get("/ready")
+                except httpx.TransportError:
+                    time.sleep(0.02)
+                    continue
+                times.setdefault("listening", time.perf_counter() - start)
+                if response.status_code == 200:
+                    times["ready"] = time.perf_counter() - start
+                    times["checks"] = response.json()["checks"]
+                else:
+                    time.sleep(0.02)
+            chat_start = time.perf_counter()
+            client.post("/chat", json={"user_message": "I need a shelter in San Francisco"}).raise_for_status()
+            times["first_chat"] = time.perf_counter() - start
+            times["first_chat_latency"] = time.perf_counter() - chat_start
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    app = create_mock_app(llm_latency=0.05, research_latency=0.2)
+    with MockServer(app) as mock:
+        env = {
+            **os.environ,
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": f"{mock.url}/v1",
+            "DEEP_RESEARCH_API_URL": mock.url,
+            "RESEARCH_CACHE_PATH": ":memory:",
+            "RESOURCE_INDEX_PATH": ":memory:",
+            "RESEARCH_PROGRESSIVE": "false",
+            "LOG_LEVEL": "WARNING",
+        }
+        imports = [import_time(env) for _ in range(args.runs)]
+        starts = {
+            warm: [cold_start({**env, "STARTUP_WARM_UP": warm}) for _ in range(args.runs)]
+            for warm in ("false", "true")
+        }
+
+    def p50(runs: list, key: str) -> float:
+        return statistics.median(r[key] for r in runs)
+
+    print("=" * 80)
+    print(f"import backend/main.py: p50 {p50(imports, 'seconds'):.2f}s over {args.runs} fresh interpreters; "
+          f"deferred modules loaded: {imports[0]['loaded'] or 'none'}")
+    print("-" * 80)
+    print(f"{'':<16}{'listening':>12}{'ready':>12}{'first /chat':>14}{'/chat latency':>16}")
+    for warm, runs in starts.items():
+        label = "warm-up" if warm == "true" else "no warm-up"
+        print(f"{label:<16}{p50(runs, 'listening'):>11.2f}s{p50(runs, 'ready'):>11.2f}s"
+              f"{p50(runs, 'first_chat'):>13.2f}s{p50(runs, 'first_chat_latency'):>15.2f}s")
+    print(f"warm-up checks: {starts['true'][0]['checks']}")
+    print("=" * 80)
+
+    failed = False
+    if imports[0]["loaded"]:
+        print(f"✗ Expected {', '.join(imports[0]['loaded'])} to be imported on first use, not with main")
+        failed = True
+    if any(outcome != "ok" for outcome in starts["true"][0]["checks"].values()):
+        print("✗ Expected every warm-up check to pass against the mock servers")
+        failed = True
+    cold, warmed = p50(starts["false"], "first_chat_latency"), p50(starts["true"], "first_chat_latency")
+    if warmed >= cold:
+        print("✗ Expected the warm-up to make the first /chat faster")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print(f"✓ main imports in {p50(imports, 'seconds'):.2f}s; after warm-up the first /chat took "
+          f"{warmed:.2f}s instead of {cold:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Time-to-first-token comparison between /chat and /chat/stream.
+
+Serves the backend over HTTP against local mock OpenAI and deep-research servers and
+measures when the first byte of the answer reaches the client for each endpoint.
+
+Usage:
+    python tests/benchmark_streaming.py [--runs 5] [--answer-tokens 300] [--token-latency 0.02]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "backend"))
+
+from mock_servers import MockServer, create_mock_app
+
+
+def time_blocking(client: httpx.Client, url: str) -> tuple:
+    start = time.perf_counter()
+    response = client.post(f"{url}/chat", json={"user_message": "I need a shelter in San Francisco"})
+    response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+def time_streaming(client: httpx.Client, url: str) -> tuple:
+    start = time.perf_counter()
+    first_token = None
+    with client.stream("POST", f"{url}/chat/stream", json={"user_message": "I need a shelter in San Francisco"}) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if first_token is None and line.startswith("event: delta"):
+                first_token = time.perf_counter() - start
+    return first_token, time.perf_counter() - start
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--research-latency", type=float, default=0.5)
+    parser.add_argument("--answer-tokens", type=int, default=300)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    mock_app = create_mock_app(args.llm_latency, args.research_latency, args.token_latency, args.answer_tokens)
+    with MockServer(mock_app) as mock:
+        os.environ["OPENAI_API_KEY"] = "test-key"
+        os.environ["OPENAI_BASE_URL"] = f"{mock.url}/v1"
+        os.environ["DEEP_RESEARCH_API_URL"] = mock.url
+        os.environ["RESEARCH_CACHE_PATH"] = ":memory:"
+        os.environ["RESOURCE_INDEX_PATH"] = ":memory:"
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        import main
+
+        with MockServer(main.app) as backend, httpx.Client(timeout=None) as client:
+            results = {"/chat": [], "/chat/stream": []}
+            for _ in range(args.runs):
+                results["/chat"].append(time_blocking(client, backend.url))
+                results["/chat/stream"].append(time_streaming(client, backend.url))
+
+    print("=" * 80)
+    print(f"TIME TO FIRST TOKEN ({args.runs} runs, {args.answer_tokens}-token answer)")
+    print("=" * 80)
+    print(f"{'Endpoint':<16} {'First token (median)':>22} {'Complete (median)':>20}")
+    print("-" * 80)
+    medians = {}
+    for endpoint, samples in results.items():
+        medians[endpoint] = statistics.median(s[0] for s in samples)
+        total = statistics.median(s[1] for s in samples)
+        print(f"{endpoint:<16} {medians[endpoint]:>21.2f}s {total:>19.2f}s")
+    print("-" * 80)
+    print(f"Streaming reaches the first token {medians['/chat'] / medians['/chat/stream']:.1f}x sooner")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main_cli()
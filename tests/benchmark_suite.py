@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the resource pipeline.
+
+Drives resource_finder.list_eligible_resources (from a thread pool) and the FastAPI /chat
+app (concurrent async clients) against local mock OpenAI and deep-research servers, and
+reports throughput, p50/p95/p99 latency, error counts and memory. Results can be saved as
+JSON and compared with an earlier run, so architectural changes can be measured run to run.
+
+Caches, the SERP fast path and progressive research are disabled by default so every
+request pays for a full pipeline run; pass --keep-caches to measure them too.
+
+Latencies accept a distribution: "2" (fixed), "uniform:1,3", "normal:2,0.5", "exp:2",
+"lognormal:2,0.5" (see mock_servers.parse_latency).
+
+Usage:
+    python tests/benchmark_suite.py [--scenario all|resource_finder|chat] [--requests 40]
+        [--concurrency 10] [--llm-latency lognormal:0.5,0.4] [--research-latency uniform:1,3]
+        [--llm-error-rate 0] [--research-error-rate 0.05] [--report-size 20000]
+        [--save results.json] [--compare baseline.json] [--trace-memory]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "backend"))
+
+from mock_servers import MockServer, create_mock_app, parse_latency
+
+CITIES = ["San Francisco", "Oakland", "Seattle", "Portland", "Denver", "Chicago", "Austin", "Boston"]
+NEEDS = ["a place to sleep tonight", "food", "a shelter and a shower", "a clinic", "a job"]
+
+
+def conversation(i: int) -> list:
+    # Vary the conversation so requests do not share cache keys when caches are kept
+    return [{"role": "user", "content": f"I'm in {CITIES[i % len(CITIES)]} and need {NEEDS[i % len(NEEDS)]}."}]
+
+
+def summarize(name: str, latencies: list, errors: int, wall: float) -> dict:
+    ordered = sorted(latencies)
+    if len(ordered) >= 2:
+        cuts = statistics.quantiles(ordered, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = ordered[0] if ordered else 0.0
+    return {
+        "scenario": name,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round((len(latencies) + errors) / wall, 3) if wall else 0.0,
+        "p50_seconds": round(p50, 3),
+        "p95_seconds": round(p95, 3),
+        "p99_seconds": round(p99, 3),
+        "max_seconds": round(ordered[-1], 3) if ordered else 0.0,
+    }
+
+
+def run_resource_finder(n_requests: int, concurrency: int) -> dict:
+    import resource_finder
+
+    def one(i: int):
+        start = time.perf_counter()
+        try:
+            resource_finder.list_eligible_resources(conversation(i))
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, e
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, range(n_requests)))
+    wall = time.perf_counter() - start
+    latencies = [elapsed for elapsed, error in outcomes if error is None]
+    return summarize("resource_finder", latencies, len(outcomes) - len(latencies), wall)
+
+
+async def run_chat(n_requests: int, concurrency: int) -> dict:
+    import main
+
+    limit = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://backend", timeout=None) as backend:
+        async def one(i: int):
+            async with limit:
+                start = time.perf_counter()
+                response = await backend.post("/chat", json={"user_message": conversation(i)[0]["content"]})
+                return time.perf_counter() - start, response.status_code == 200
+
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*(one(i) for i in range(n_requests)))
+        wall = time.perf_counter() - start
+    latencies = [elapsed for elapsed, ok in outcomes if ok]
+    return summarize("chat", latencies, len(outcomes) - len(latencies), wall)
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+
+
+def print_results(results: list, baseline: dict) -> None:
+    columns = ["throughput_rps", "p50_seconds", "p95_seconds", "p99_seconds", "errors", "peak_rss_mb"]
+    if any("peak_heap_mb" in r for r in results):
+        columns.append("peak_heap_mb")
+    print("=" * 100)
+    print(f"{'scenario':<18}" + "".join(f"{c:>14}" for c in columns))
+    print("-" * 100)
+    for result in results:
+        print(f"{result['scenario']:<18}" + "".join(f"{result.get(c, ''):>14}" for c in columns))
+        previous = baseline.get(result["scenario"])
+        if previous:
+            deltas = []
+            for c in columns:
+                if previous.get(c):
+                    change = (result.get(c, 0) - previous[c]) / previous[c] * 100
+                    deltas.append(f"{change:>+13.1f}%")
+                else:
+                    deltas.append(f"{'':>14}")
+            print(f"{'  vs baseline':<18}" + "".join(deltas))
+    print("=" * 100)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenario", choices=["all", "resource_finder", "chat"], default="all")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--llm-latency", default="lognormal:0.5,0.4", help="seconds per mock LLM call")
+    parser.add_argument("--research-latency", default="uniform:1,3", help="seconds per mock report at depth 2")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--research-error-rate", type=float, default=0.0)
+    parser.add_argument("--report-size", type=int, default=0, help="report length in characters (0: sample report)")
+    parser.add_argument("--keep-caches", action="store_true", help="leave caches and fast paths enabled")
+    parser.add_argument("--trace-memory", action="store_true", help="also report peak Python heap (slower)")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier --save to compare against")
+    args = parser.parse_args()
+
+    app = create_mock_app(
+        llm_latency=parse_latency(args.llm_latency),
+        research_latency=parse_latency(args.research_latency),
+        llm_error_rate=args.llm_error_rate,
+        research_error_rate=args.research_error_rate,
+        report_size=args.report_size,
+    )
+    with MockServer(app) as mock:
+        os.environ.update({
+            "OPENAI_API_KEY": "test-key",
+            "OPENAI_BASE_URL": f"{mock.url}/v1",
+            "DEEP_RESEARCH_API_URL": mock.url,
+            "RESEARCH_CACHE_PATH": ":memory:",
+            "RESOURCE_INDEX_PATH": ":memory:",
+            "SESSION_STORE": "memory",
+            "RESEARCH_MAX_CONCURRENCY": str(args.concurrency),
+        })
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        if not args.keep_caches:
+            os.environ.update({
+                "RESEARCH_CACHE_TTL_SECONDS": "0",
+                "SERP_FAST_PATH": "false",
+                "RESOURCE_DB_FAST_PATH": "false",
+                "LOCAL_QUERY_EXTRACTION": "false",
+                "QUERY_MEMO_SIZE": "0",
+                "RESEARCH_PROGRESSIVE": "false",
+            })
+
+        scenarios = {
+            "resource_finder": lambda: run_resource_finder(args.requests, args.concurrency),
+            "chat": lambda: asyncio.run(run_chat(args.requests, args.concurrency)),
+        }
+        if args.trace_memory:
+            tracemalloc.start()
+        results = []
+        for name, run in scenarios.items():
+            if args.scenario not in ("all", name):
+                continue
+            if args.trace_memory:
+                tracemalloc.reset_peak()
+            result = run()
+            # Peak RSS is process-wide (it includes the mock servers) and never goes down
+            result["peak_rss_mb"] = peak_rss_mb()
+            if args.trace_memory:
+                result["peak_heap_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+            results.append(result)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {r["scenario"]: r for r in json.load(f)["results"]}
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"config": vars(args), "timestamp": time.time(), "results": results}, f, indent=2)
+        print(f"Saved results to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
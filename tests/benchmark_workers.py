@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Benchmark for running the backend with several worker processes.
+
+Starts the backend under uvicorn against the mock servers, with SQLite session and job
+stores in a temporary directory, first with one worker and then with --workers N:
+  1. fires concurrent /chat requests and compares throughput (large reports make each
+     request CPU-bound, so throughput should grow with the number of cores);
+  2. starts a research job that outlives its /chat request and polls it, and streams its
+     events, over fresh connections, which land on different workers;
+  3. starts research for several cities at once and checks that the deep-research server
+     never sees more than RESEARCH_MAX_CONCURRENCY runs at a time, however many workers.
+
+Usage:
+    python tests/benchmark_workers.py [--workers 4] [--requests 200] [--concurrency 32]
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from mock_servers import MockServer, _free_port, create_mock_app
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESEARCH_CAPACITY = 2
+CITIES = ["Seattle", "Portland", "Denver", "Chicago", "Boston", "Atlanta"]
+
+
+class Backend:
+    """Runs the backend with uvicorn in a subprocess for the duration of a `with` block."""
+
+    def __init__(self, workers: int, env: dict):
+        self.workers = workers
+        self.env = env
+        self.url = f"http://127.0.0.1:{_free_port()}"
+
+    def __enter__(self) -> "Backend":
+        port = self.url.rsplit(":", 1)[1]
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", os.path.join(ROOT_DIR, "backend"),
+             "--port", port, "--workers", str(self.workers), "--log-level", "warning"],
+            cwd=ROOT_DIR, env=self.env, stdout=subprocess.DEVNULL,
+        )
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            try:
+                if httpx.get(f"{self.url}/metrics").status_code == 200:
+                    # Give the remaining workers a moment to finish importing
+                    time.sleep(1 + self.workers * 0.5)
+                    return self
+            except httpx.TransportError:
+                time.sleep(0.2)
+        self._process.kill()
+        raise RuntimeError("Backend did not start")
+
+    def __exit__(self, *exc) -> None:
+        self._process.terminate()
+        self._process.wait(timeout=30)
+
+
+async def throughput(url: str, requests: int, concurrency: int) -> float:
+    limiter = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+        async def one(i: int) -> None:
+            async with limiter:
+                response = await client.post("/chat", json={"user_message": f"I need a shelter in San Francisco ({i})"})
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        return requests / (time.perf_counter() - start)
+
+
+async def cross_worker_job(url: str, polls: int) -> tuple:
+    """Returns (polls answered, stream reached 'done') for a job polled over fresh connections."""
+    async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+        response = await client.post("/chat", json={"user_message": "I need food in Oakland"})
+        response.raise_for_status()
+        job_id = response.json()["job_id"]
+    if job_id is None:
+        raise RuntimeError("Expected the research to outlive the /chat request")
+
+    answered = 0
+    for _ in range(polls):
+        # A new connection each time, so the kernel spreads them over the workers
+        async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+            answered += (await client.get(f"/jobs/{job_id}")).status_code == 200
+
+    async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+        async with client.stream("GET", f"/jobs/{job_id}/events") as stream:
+            events = [line async for line in stream.aiter_lines() if line.startswith("event:")]
+    return answered, events[-1:] == ["event: done"]
+
+
+async def research_burst(url: str, app) -> int:
+    """Most deep-research runs in progress at once while every city in CITIES is researched."""
+    app.state.research_peak = 0
+    calls_before = app.state.research_calls
+    async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+        await asyncio.gather(*(
+            client.post("/chat", json={"user_message": f"I need a shelter in {city}"}) for city in CITIES
+        ))
+    deadline = time.time() + 120
+    while app.state.research_calls - calls_before < len(CITIES) or app.state.research_running:
+        if time.time() > deadline:
+            raise RuntimeError("Research for the burst did not finish")
+        await asyncio.sleep(0.2)
+    return app.state.research_peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--polls", type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_mock_app(llm_latency=0.05, research_latency=3.0, report_size=200_000)
+    results = {}
+    with MockServer(app) as mock, tempfile.TemporaryDirectory() as state_dir:
+        for workers in (1, args.workers):
+            env = {
+                **os.environ,
+                "OPENAI_API_KEY": "test",
+                "OPENAI_BASE_URL": f"{mock.url}/v1",
+                "DEEP_RESEARCH_API_URL": mock.url,
+                "LOG_LEVEL": "WARNING",
+                "SESSION_STORE": "sqlite",
+                "JOB_STORE": "sqlite",
+                "RESEARCH_PROGRESSIVE": "false",
+                "SERP_FAST_PATH": "false",
+                "RESOURCE_DB_FAST_PATH": "false",
+                "RESEARCH_INLINE_WAIT_SECONDS": "1",
+                "RESEARCH_MAX_CONCURRENCY": str(RESEARCH_CAPACITY),
+                "RESEARCH_SLOTS": "sqlite",
+                **{name: os.path.join(state_dir, f"{workers}-{filename}") for name, filename in (
+                    ("RESEARCH_CACHE_PATH", "research.sqlite3"), ("RESOURCE_INDEX_PATH", "index.sqlite3"),
+                    ("SESSION_DB_PATH", "sessions.sqlite3"), ("JOB_DB_PATH", "jobs.sqlite3"),
+                    ("RESEARCH_SLOTS_DB_PATH", "slots.sqlite3"),
+                )},
+            }
+            with Backend(workers, env) as backend:
+                # Warm the report cache so the load measures the backend, not the research latency
+                httpx.post(f"{backend.url}/chat", json={"user_message": "I need a shelter in San Francisco"},
+                           timeout=None)
+                time.sleep(3.5)
+                rate = asyncio.run(throughput(backend.url, args.requests, args.concurrency))
+                answered, done = asyncio.run(cross_worker_job(backend.url, args.polls))
+                peak = asyncio.run(research_burst(backend.url, app))
+                results[workers] = (rate, answered, done, peak)
+
+    print("=" * 72)
+    print(f"{args.requests} /chat requests, {args.concurrency} at a time, on {os.cpu_count()} CPU(s)")
+    print("-" * 72)
+    for workers, (rate, answered, done, peak) in results.items():
+        print(f"{workers} worker(s)   {rate:6.1f} req/s   job polls answered: {answered}/{args.polls}   "
+              f"event stream finished: {done}   research runs at once: {peak}/{RESEARCH_CAPACITY}")
+    print("=" * 72)
+
+    failed = any(answered != args.polls or not done for _, answered, done, _ in results.values())
+    if failed:
+        print("✗ Some workers could not see a job started by another")
+    if any(peak > RESEARCH_CAPACITY for *_, peak in results.values()):
+        print(f"✗ Expected at most {RESEARCH_CAPACITY} research runs at once across all workers")
+        failed = True
+    speedup = results[args.workers][0] / results[1][0]
+    if (os.cpu_count() or 1) > 1 and speedup < 1.2:
+        print(f"✗ Expected throughput to grow with workers (got {speedup:.2f}x)")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print(f"✓ Every worker served every job and research stayed within {RESEARCH_CAPACITY} runs at once; "
+          f"{args.workers} workers: {speedup:.2f}x the throughput of one")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+Pytest setup: modules are imported flat from the repository root and backend/, as the
+backend does, with every store in memory. The benchmark_*.py scripts and test_timing.py
+run on their own against mock or live servers and are not collected.
+"""
+
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT_DIR, os.path.join(ROOT_DIR, "backend")]
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("RESEARCH_CACHE_PATH", ":memory:")
+os.environ.setdefault("RESOURCE_INDEX_PATH", ":memory:")
+
+collect_ignore = ["test_timing.py"]
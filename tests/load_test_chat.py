@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Load test showing that concurrent /chat requests are served in parallel.
+
+Runs the FastAPI app against local mock OpenAI and deep-research servers, fires
+N concurrent /chat requests that each trigger a research run, and compares the
+wall-clock time with what a serialized server would take.
+
+Usage:
+    python tests/load_test_chat.py [--requests 10] [--research-latency 2.0]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "backend"))
+
+from mock_servers import MockServer, create_mock_app
+
+
+async def run_load(n_requests: int) -> tuple:
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://backend", timeout=None) as backend:
+        async def one(i: int) -> float:
+            start = time.perf_counter()
+            response = await backend.post("/chat", json={"user_message": f"I need a shelter in San Francisco ({i})"})
+            response.raise_for_status()
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one(i) for i in range(n_requests)))
+        return time.perf_counter() - start, latencies
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--llm-latency", type=float, default=0.1)
+    parser.add_argument("--research-latency", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with MockServer(create_mock_app(args.llm_latency, args.research_latency)) as mock:
+        os.environ["OPENAI_API_KEY"] = "test-key"
+        os.environ["OPENAI_BASE_URL"] = f"{mock.url}/v1"
+        os.environ["DEEP_RESEARCH_API_URL"] = mock.url
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        # Every request should pay for a research run, not hit a warm report cache
+        os.environ["RESEARCH_CACHE_PATH"] = ":memory:"
+        os.environ["RESOURCE_INDEX_PATH"] = ":memory:"
+        os.environ["RESEARCH_CACHE_TTL_SECONDS"] = "0"
+        os.environ["SERP_FAST_PATH"] = "false"
+        os.environ["RESOURCE_DB_FAST_PATH"] = "false"
+        # Measure event-loop concurrency, not the deep-research slot cap
+        os.environ["RESEARCH_MAX_CONCURRENCY"] = str(args.requests)
+        os.environ["RESEARCH_PROGRESSIVE"] = "false"
+
+        wall, latencies = asyncio.run(run_load(args.requests))
+
+    per_request = 3 * args.llm_latency + args.research_latency
+    serialized = per_request * args.requests
+
+    print("=" * 80)
+    print("CONCURRENT /chat LOAD TEST")
+    print("=" * 80)
+    print(f"Requests:                     {args.requests}")
+    print(f"Single request (mocked):      {per_request:.2f}s")
+    print(f"Serialized server would take: {serialized:.2f}s")
+    print(f"Actual wall-clock time:       {wall:.2f}s")
+    print(f"Slowest request:              {max(latencies):.2f}s")
+    print(f"Speedup vs serialized:        {serialized / wall:.1f}x")
+    print("=" * 80)
+
+    import metrics
+    print("Mean time per stage:")
+    for (stage,), (count, total) in sorted(metrics.STAGE_SECONDS.totals().items()):
+        print(f"  {stage:<24} {total / count:6.2f}s  (x{count})")
+    print("=" * 80)
+
+    if wall > serialized / 2:
+        print("✗ Requests are serializing on the event loop")
+        sys.exit(1)
+    print("✓ Requests ran concurrently")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,254 @@
+"""
+Local stand-ins for the OpenAI chat-completions API and the deep-research API.
+
+Used by the load tests and benchmarks so the backend can be exercised offline, without API
+keys. Latencies can be fixed or drawn from a distribution (see parse_latency), a fraction
+of requests can fail, and the report size can be set.
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from typing import Callable, Union
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SEARCH_QUERY = "Search for emergency shelter and food assistance for LGBTQ youth in San Francisco"
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+with open(os.path.join(FIXTURES_DIR, "sample_report.md")) as f:
+    SAMPLE_REPORT = f.read()
+# The same resources as the API's raw /api/research output
+with open(os.path.join(FIXTURES_DIR, "sample_learnings.json")) as f:
+    SAMPLE_LEARNINGS = json.load(f)
+
+
+Latency = Union[float, Callable[[], float]]
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """
+    Parses a latency distribution given on the command line, in seconds.
+
+    "2" is fixed, "uniform:1,3" is uniform between 1 and 3, "normal:2,0.5" is normal with
+    mean 2 and standard deviation 0.5, "exp:2" is exponential with mean 2 and
+    "lognormal:2,0.5" is log-normal with median 2 and shape 0.5. Samples are never negative.
+    """
+    kind, _, args = spec.partition(":")
+    if not args:
+        value = float(kind)
+        return lambda: value
+    params = [float(x) for x in args.split(",")]
+    samplers = {
+        "uniform": lambda: random.uniform(params[0], params[1]),
+        "normal": lambda: random.gauss(params[0], params[1]),
+        "exp": lambda: random.expovariate(1 / params[0]),
+        "lognormal": lambda: random.lognormvariate(math.log(params[0]), params[1]),
+    }
+    if kind not in samplers:
+        raise ValueError(f"Unknown latency distribution: {spec}")
+    sampler = samplers[kind]
+    return lambda: max(0.0, sampler())
+
+
+def _sample(latency: Latency) -> float:
+    return latency() if callable(latency) else latency
+
+
+def sized_report(size: int) -> str:
+    """The sample report repeated or truncated to about size characters (0 keeps it as is)."""
+    if size <= 0:
+        return SAMPLE_REPORT
+    return (SAMPLE_REPORT * (size // len(SAMPLE_REPORT) + 1))[:size]
+
+
+def partial_report(report: str, fraction: float) -> str:
+    """The report keeping only the first fraction of its "### " resource entries (at least one)."""
+    entries = list(re.finditer(r"^### .*?(?=^#)", report, re.M | re.S))
+    keep = max(1, math.ceil(len(entries) * fraction))
+    for entry in reversed(entries[keep:]):
+        report = report[:entry.start()] + report[entry.end():]
+    return report
+
+
+def _error() -> JSONResponse:
+    return JSONResponse({"error": {"message": "Injected mock failure", "type": "server_error"}}, status_code=500)
+
+
+def _completion(message: dict, finish_reason: str) -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def _chunk(delta: dict, finish_reason=None) -> str:
+    chunk = {
+        "id": "chatcmpl-stream",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+def create_mock_app(llm_latency: Latency = 0.1, research_latency: Latency = 2.0,
+                    token_latency: float = 0.0, answer_tokens: int = 8,
+                    search_query: str = SEARCH_QUERY, llm_error_rate: float = 0.0,
+                    research_error_rate: float = 0.0, report_size: int = 0,
+                    synthesis_latency: Latency = 0.0, breadth_scaling: bool = False) -> FastAPI:
+    """
+    Builds an app serving both mock APIs.
+
+    Args:
+        llm_latency: Seconds before a chat completion produces its first token, or a sampler
+        research_latency: Seconds each deep-research report takes at depth 2 (scales with depth), or a sampler
+        token_latency: Seconds to generate each token of a final answer
+        answer_tokens: Number of tokens in a final answer
+        search_query: Query returned for the query-extraction prompt
+        llm_error_rate: Fraction of chat completions that fail with HTTP 500
+        research_error_rate: Fraction of reports that fail with HTTP 500
+        report_size: Approximate report length in characters (0: the sample report as is)
+        synthesis_latency: Extra seconds /api/generate-report spends writing the report, which
+            /api/research (raw learnings and sources) skips
+        breadth_scaling: Make breadth matter like depth: research_latency becomes the time at
+            breadth 1, depth 2 and scales with breadth x depth, and a report lists breadth x depth / 4
+            of the sample report's resources (all of them from 2x2 up)
+
+    The number of research requests to either endpoint so far is kept in app.state.research_calls,
+    and the most that were in progress at once in app.state.research_peak.
+    """
+    app = FastAPI()
+    app.state.research_calls = 0
+    app.state.research_running = 0
+    app.state.research_peak = 0
+    report = sized_report(report_size)
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model", "created": 0, "owned_by": "mock"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        last = body["messages"][-1]
+        stream = body.get("stream", False)
+        latency = _sample(llm_latency)
+        if random.random() < llm_error_rate:
+            await asyncio.sleep(latency)
+            return _error()
+
+        # First /chat turn: ask the backend to run the resource search tool
+        if body.get("tools") and last["role"] == "user":
+            tool_call = {
+                "id": f"call_{uuid.uuid4().hex[:8]}",
+                "type": "function",
+                "function": {"name": "search_eligible_resources", "arguments": "{}"},
+            }
+            await asyncio.sleep(latency)
+            if stream:
+                async def tool_call_stream():
+                    yield _chunk({"role": "assistant", "tool_calls": [{"index": 0, **tool_call}]})
+                    yield _chunk({}, "tool_calls")
+                    yield "data: [DONE]\n\n"
+                return StreamingResponse(tool_call_stream(), media_type="text/event-stream")
+            return _completion({"role": "assistant", "content": None, "tool_calls": [tool_call]}, "tool_calls")
+
+        # Query extraction prompt
+        if body["messages"][0]["content"].startswith("You are an expert at analyzing conversations"):
+            await asyncio.sleep(latency)
+            return _completion({"role": "assistant", "content": search_query}, "stop")
+
+        tokens = ["Here", " are", " some", " resources", " that", " can", " help", "."]
+        tokens = [tokens[i % len(tokens)] for i in range(answer_tokens)]
+        if stream:
+            async def answer_stream():
+                await asyncio.sleep(latency)
+                yield _chunk({"role": "assistant", "content": ""})
+                for token in tokens:
+                    await asyncio.sleep(token_latency)
+                    yield _chunk({"content": token})
+                yield _chunk({}, "stop")
+                yield "data: [DONE]\n\n"
+            return StreamingResponse(answer_stream(), media_type="text/event-stream")
+
+        await asyncio.sleep(latency + token_latency * answer_tokens)
+        return _completion({"role": "assistant", "content": "".join(tokens)}, "stop")
+
+    def research_seconds(body: dict) -> float:
+        scale = body.get("depth", 2) / 2
+        if breadth_scaling:
+            scale *= body.get("breadth", 1)
+        return _sample(research_latency) * scale
+
+    async def researching(seconds: float) -> None:
+        app.state.research_running += 1
+        app.state.research_peak = max(app.state.research_peak, app.state.research_running)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            app.state.research_running -= 1
+
+    @app.post("/api/generate-report")
+    async def generate_report(request: Request):
+        body = await request.json()
+        app.state.research_calls += 1
+        await researching(research_seconds(body) + _sample(synthesis_latency))
+        if random.random() < research_error_rate:
+            return _error()
+        if breadth_scaling:
+            return {"reportMarkdown": partial_report(report, body.get("breadth", 1) * body.get("depth", 2) / 4)}
+        return {"reportMarkdown": report}
+
+    @app.post("/api/research")
+    async def research(request: Request):
+        body = await request.json()
+        app.state.research_calls += 1
+        await researching(research_seconds(body))
+        if random.random() < research_error_rate:
+            return _error()
+        return {"success": True, **SAMPLE_LEARNINGS}
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class MockServer:
+    """Runs an app with uvicorn on a background thread for the duration of a `with` block."""
+
+    def __init__(self, app: FastAPI):
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning")
+        )
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self) -> "MockServer":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join()
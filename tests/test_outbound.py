@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+import pytest
+
+from outbound import CircuitBreaker, CircuitOpenError, OutboundService, RetryPolicy
+
+
+class Flaky(Exception):
+    pass
+
+
+def service(reset_seconds: float = 0.05) -> OutboundService:
+    return OutboundService("test", lambda e: (isinstance(e, Flaky), None), RetryPolicy(attempts=1),
+                           CircuitBreaker(failure_threshold=1, reset_seconds=reset_seconds))
+
+
+def fail():
+    raise Flaky()
+
+
+def test_open_circuit_fails_fast():
+    svc = service(reset_seconds=60)
+    with pytest.raises(Flaky):
+        svc.call(fail)
+    assert svc.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        svc.call(lambda: "ok")
+
+
+def test_successful_probe_closes_the_circuit():
+    svc = service()
+    with pytest.raises(Flaky):
+        svc.call(fail)
+    time.sleep(0.06)
+    assert svc.breaker.state == "half_open"
+    assert svc.call(lambda: "ok") == "ok"
+    assert svc.breaker.state == "closed"
+
+
+def test_failed_probe_reopens_the_circuit():
+    svc = service()
+    with pytest.raises(Flaky):
+        svc.call(fail)
+    time.sleep(0.06)
+    with pytest.raises(Flaky):
+        svc.call(fail)
+    assert svc.breaker.state == "open"
+
+
+def test_cancelled_probe_releases_the_half_open_circuit():
+    svc = service()
+    with pytest.raises(Flaky):
+        svc.call(fail)
+    time.sleep(0.06)
+
+    async def run() -> str:
+        probe = asyncio.create_task(svc.acall(asyncio.sleep, 10))
+        await asyncio.sleep(0.01)
+        # While the probe is in flight, other calls are rejected
+        with pytest.raises(CircuitOpenError):
+            await svc.acall(asyncio.sleep, 0, "ok")
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+        await asyncio.sleep(0.06)
+        return await svc.acall(asyncio.sleep, 0, "ok")
+
+    assert asyncio.run(run()) == "ok"
+    assert svc.breaker.state == "closed"
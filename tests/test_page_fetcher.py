@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+import httpx
+
+from page_fetcher import PageCache, PageFetcher
+
+
+def fetch_times(tmp_path, interval: float) -> list:
+    """
+    Sends three pages of one host while a slow page of another host holds the only slot,
+    and returns when each page of the first host was requested.
+    """
+    sent = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        sent.append((request.url.host, time.monotonic()))
+        if request.url.host == "slow.example":
+            await asyncio.sleep(0.5)
+        return httpx.Response(200, text="<title>Page</title>Text", headers={"content-type": "text/html"})
+
+    async def run() -> None:
+        fetcher = PageFetcher(PageCache(str(tmp_path)), max_concurrency=1, domain_interval=interval,
+                              respect_robots=False, allow_internal=True)
+        fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        fetcher._slots = asyncio.Semaphore(1)
+        slow = asyncio.create_task(fetcher.fetch("http://slow.example/"))
+        await asyncio.sleep(0.05)
+        await asyncio.gather(slow, *(fetcher.fetch(f"http://host.example/{i}") for i in range(3)))
+        await fetcher.aclose()
+
+    asyncio.run(run())
+    return [at for host, at in sent if host == "host.example"]
+
+
+def test_requests_to_one_host_stay_spaced_after_waiting_for_a_slot(tmp_path):
+    times = fetch_times(tmp_path, interval=0.2)
+    assert len(times) == 3
+    assert all(b - a >= 0.19 for a, b in zip(times, times[1:]))
@@ -0,0 +1,38 @@
+from query_profile import extract_location, match_needs, parse_query, profile_conversation
+
+
+def key(query: str) -> str:
+    return parse_query(query).cache_key(2, 2)
+
+
+def test_same_search_worded_differently_shares_a_key():
+    assert key("Search for emergency shelter and food assistance for LGBTQ youth in San Francisco") == \
+        key("Find food and emergency shelters for LGBTQ youth in SF")
+
+
+def test_place_after_a_final_comma_is_the_location():
+    assert parse_query("Emergency shelters for LGBTQ youth, San Jose").location == "san jose"
+    assert key("Emergency shelters for LGBTQ youth, San Jose") != key("Emergency shelters for LGBTQ youth, Oakland")
+
+
+def test_known_city_named_anywhere_is_the_location():
+    assert extract_location("Seattle shelters for veterans") == "seattle"
+
+
+def test_trailing_need_is_not_a_location():
+    assert parse_query("Need Food, Shelter").location is None
+
+
+def test_county_is_dropped():
+    assert key("shelter in Los Angeles County") == key("shelter in Los Angeles") == key("shelter in LA County")
+
+
+def test_queries_without_a_location_only_share_a_key_when_worded_alike():
+    assert key("emergency shelter for youth") != key("shelter for youth please")
+    assert key("emergency shelter for youth") == key("Emergency shelter for youth")
+
+
+def test_working_is_not_an_employment_need():
+    profile = profile_conversation([{"role": "user", "content": "I am in SF and need a bed. I work at a bar."}])
+    assert profile.needs == ("shelter",)
+    assert match_needs("I'm out of work and need to find work") == ("employment",)
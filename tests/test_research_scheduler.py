@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from research_scheduler import ResearchScheduler, SharedResearchScheduler
+
+
+@pytest.mark.parametrize("capacity, reserved", [(1, 0), (2, 1), (4, 1), (8, 2)])
+def test_reserved_slots_default(monkeypatch, capacity, reserved):
+    monkeypatch.delenv("RESEARCH_URGENT_RESERVED", raising=False)
+    assert ResearchScheduler.from_env(capacity).reserved == reserved
+
+
+async def hold(scheduler, urgency: str, started: list, release: asyncio.Event) -> None:
+    async with scheduler.limiter(urgency):
+        started.append(urgency)
+        await release.wait()
+
+
+async def fill(scheduler) -> list:
+    """Queues two normal runs, then an urgent one; returns what started."""
+    started, release = [], asyncio.Event()
+    tasks = [asyncio.create_task(hold(scheduler, "normal", started, release)) for _ in range(2)]
+    await asyncio.sleep(0.3)
+    tasks.append(asyncio.create_task(hold(scheduler, "urgent", started, release)))
+    await asyncio.sleep(0.3)
+    result = list(started)
+    release.set()
+    await asyncio.gather(*tasks)
+    return result
+
+
+def test_reserved_slot_is_kept_for_urgent_work():
+    assert asyncio.run(fill(ResearchScheduler(capacity=2, reserved=1))) == ["normal", "urgent"]
+
+
+def test_without_a_reserved_slot_normal_work_takes_every_slot():
+    assert asyncio.run(fill(ResearchScheduler(capacity=2, reserved=0))) == ["normal", "normal"]
+
+
+def test_shared_scheduler_keeps_the_reserved_slot(tmp_path):
+    scheduler = SharedResearchScheduler(str(tmp_path / "slots.sqlite3"), capacity=2, reserved=1, poll_seconds=0.02)
+    assert asyncio.run(fill(scheduler)) == ["normal", "urgent"]
+    assert scheduler.running() == scheduler.queued() == 0
+
+
+def test_shared_scheduler_drops_cancelled_runs(tmp_path):
+    scheduler = SharedResearchScheduler(str(tmp_path / "slots.sqlite3"), capacity=1, poll_seconds=0.02)
+
+    async def run() -> None:
+        started, release = [], asyncio.Event()
+        holder = asyncio.create_task(hold(scheduler, "normal", started, release))
+        await asyncio.sleep(0.1)
+        waiter = asyncio.create_task(hold(scheduler, "normal", started, release))
+        await asyncio.sleep(0.1)
+        assert scheduler.queued() == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        release.set()
+        await holder
+
+    asyncio.run(run())
+    assert scheduler.running() == scheduler.queued() == 0
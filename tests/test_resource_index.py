@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from resource_index import ResourceIndex, ResourceRecord, parse_report
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "sample_report.md")
+LGBTQ_YOUTH_SHELTER = "Search for emergency shelter for LGBTQ youth in San Francisco"
+MEAL_PROGRAMS = {"GLIDE Daily Free Meals", "St. Anthony's Dining Room", "San Francisco-Marin Food Bank Pantry Locator"}
+
+
+@pytest.fixture
+def index() -> ResourceIndex:
+    """The sample shelter report, indexed the way resource_finder.index_report does."""
+    index = ResourceIndex(":memory:")
+    with open(FIXTURE) as f:
+        index.add(parse_report(f.read(), source=LGBTQ_YOUTH_SHELTER), demographics=("lgbtq", "youth"))
+    return index
+
+
+def test_the_searched_groups_are_covered(index):
+    assert index.covers(LGBTQ_YOUTH_SHELTER)
+
+
+def test_other_groups_are_not_covered(index):
+    veterans = "Search for emergency shelter for veterans in San Francisco"
+    assert not index.covers(veterans)
+    assert index.lookup(veterans) is None
+
+
+def test_records_only_serve_the_needs_they_name(index):
+    shelters = {r.name for r in index.lookup(LGBTQ_YOUTH_SHELTER)}
+    food = {r.name for r in index.lookup("Search for food for youth in San Francisco", min_matches=1)}
+    assert not shelters & MEAL_PROGRAMS
+    assert "GLIDE Daily Free Meals" in food
+
+
+def test_general_records_do_not_cover_a_group():
+    index = ResourceIndex(":memory:")
+    index.add([ResourceRecord(name=f"Shelter {i}", services="Emergency shelter beds", location="oakland")
+               for i in range(3)])
+    assert index.covers("Search for emergency shelter in Oakland")
+    assert not index.covers("Search for emergency shelter for veterans in Oakland")
+
+
+def test_stale_records_do_not_cover(index):
+    assert not index.covers(LGBTQ_YOUTH_SHELTER, max_age=-1)
+
+
+def test_search_without_a_city_ignores_other_cities(index):
+    assert index.search("emergency shelter for LGBTQ youth") == []